@@ -0,0 +1,97 @@
+"""
+Microbenchmark for response decoding and DTO validation.
+
+Compares the previous parsing paths (json + full `model_validate` / per-item construction)
+with the fast paths in `src.services.dto_parsing` (orjson, cached TypeAdapters and lean
+projection models) over the recorded payloads in `benchmarks/payloads/`.
+
+Run from the project root (needs the project's environment / .env like the app):
+    python -m benchmarks.bench_dto_parsing [--number 2000]
+"""
+
+import argparse
+import json
+import timeit
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from src.services.dto_parsing import loads_json, parse_dto
+from src.tools.hubspot.conversation.dto_responses import (
+    MessageDetailResponse,
+    MessageSummary,
+    ThreadDetail,
+    ThreadSummary,
+)
+from src.tools.sticker_api.dtos.responses import ProductDetail
+
+PAYLOADS_DIR = Path(__file__).resolve().parent / "payloads"
+
+
+def _load_raw(name: str) -> bytes:
+    return (PAYLOADS_DIR / f"{name}.json").read_bytes()
+
+
+def _build_cases() -> List[Tuple[str, Callable[[], object], Callable[[], object]]]:
+    """Returns (case name, baseline callable, fast-path callable) tuples."""
+    message_raw = _load_raw("hubspot_message_detail")
+    thread_raw = _load_raw("hubspot_thread_detail")
+    products_raw = _load_raw("sy_product_list")
+
+    message_data = json.loads(message_raw)
+    thread_data = json.loads(thread_raw)
+    products_data = json.loads(products_raw)
+
+    return [
+        (
+            "decode message detail",
+            lambda: json.loads(message_raw),
+            lambda: loads_json(message_raw),
+        ),
+        (
+            "decode product list",
+            lambda: json.loads(products_raw),
+            lambda: loads_json(products_raw),
+        ),
+        (
+            "validate message (full vs summary)",
+            lambda: MessageDetailResponse.model_validate(message_data),
+            lambda: parse_dto(MessageSummary, message_data),
+        ),
+        (
+            "validate thread (full vs summary)",
+            lambda: ThreadDetail.model_validate(thread_data),
+            lambda: parse_dto(ThreadSummary, thread_data),
+        ),
+        (
+            "validate product list (loop vs adapter)",
+            lambda: [ProductDetail(**product) for product in products_data],
+            lambda: parse_dto(List[ProductDetail], products_data),
+        ),
+        (
+            "end-to-end message (json+full vs orjson+summary)",
+            lambda: MessageDetailResponse.model_validate(json.loads(message_raw)),
+            lambda: parse_dto(MessageSummary, loads_json(message_raw)),
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DTO decoding/validation fast paths.")
+    parser.add_argument("--number", type=int, default=2000, help="Iterations per measurement.")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per case (best is reported).")
+    args = parser.parse_args()
+
+    print(f"{'case':<52} {'baseline ops/s':>15} {'fast ops/s':>12} {'speedup':>8}")
+    for name, baseline, fast in _build_cases():
+        # Warm up caches (TypeAdapter construction, imports) before measuring
+        baseline()
+        fast()
+        baseline_best = min(timeit.repeat(baseline, number=args.number, repeat=args.repeat))
+        fast_best = min(timeit.repeat(fast, number=args.number, repeat=args.repeat))
+        baseline_ops = args.number / baseline_best
+        fast_ops = args.number / fast_best
+        print(f"{name:<52} {baseline_ops:>15,.0f} {fast_ops:>12,.0f} {fast_ops / baseline_ops:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
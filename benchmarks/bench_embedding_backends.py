@@ -0,0 +1,111 @@
+"""
+Latency and memory benchmark for the embedding backends (torch, onnx, onnx-int8).
+
+Each backend runs in its own subprocess so load time and resident memory are measured
+from a clean interpreter. Reports model load time, RSS growth after loading and after
+encoding, single-query latency (p50/p99) and batch throughput.
+
+Run from the project root (needs the project's environment / .env, and the ONNX models
+exported with `python export_onnx_embedding_model.py`):
+    python -m benchmarks.bench_embedding_backends [--backends torch onnx onnx-int8 --queries 200]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+
+SAMPLE_QUERIES = [
+    "What is your return policy?",
+    "How long does shipping to Canada take?",
+    "Can I order holographic die-cut stickers?",
+    "What file formats do you accept for artwork?",
+    "Do you offer discounts for bulk orders?",
+    "How durable are vinyl stickers outdoors?",
+    "Can I get a proof before printing?",
+    "What is the minimum order quantity for labels?",
+]
+BATCH_SIZE = 16
+
+
+def _rss_mb() -> float:
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _run_backend(backend: str, queries: int) -> dict:
+    """Measures one backend in the current process. Returns the results as a dict."""
+    import config
+    from src.services.chromadb.custom_embedding_function import ModernBertEmbeddingFunction
+
+    rss_before = _rss_mb()
+    started_at = time.perf_counter()
+    embedding_function = ModernBertEmbeddingFunction(backend=backend, onnx_model_dir=config.KB_EMBEDDING_ONNX_DIR)
+    load_seconds = time.perf_counter() - started_at
+    rss_loaded = _rss_mb()
+
+    embedding_function(SAMPLE_QUERIES[:2])  # Warm up
+
+    latencies = []
+    for i in range(queries):
+        started_at = time.perf_counter()
+        embedding_function([SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]])
+        latencies.append(time.perf_counter() - started_at)
+
+    batch = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(BATCH_SIZE)]
+    batch_rounds = max(1, queries // BATCH_SIZE)
+    started_at = time.perf_counter()
+    for _ in range(batch_rounds):
+        embedding_function(batch)
+    batch_seconds = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "rss_loaded_mb": rss_loaded - rss_before,
+        "rss_peak_mb": _rss_mb() - rss_before,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p99_ms": latencies[min(len(latencies) - 1, int(0.99 * (len(latencies) - 1)))] * 1000,
+        "batch_texts_per_s": batch_rounds * BATCH_SIZE / batch_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding backends.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"], help="Backends to measure.")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes per backend.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)  # Internal: measure one backend and print JSON
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_run_backend(args.child, args.queries)))
+        return
+
+    print(
+        f"{'backend':<10} {'load s':>7} {'RSS load MB':>12} {'RSS peak MB':>12} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'batch texts/s':>14}"
+    )
+    for backend in args.backends:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_embedding_backends", "--child", backend, "--queries", str(args.queries)],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if completed.returncode != 0:
+            print(f"{backend:<10} failed: {completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'unknown error'}")
+            continue
+        # The last line is the JSON result (model loading may log before it)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"{backend:<10} {result['load_s']:>7.2f} {result['rss_loaded_mb']:>12.1f} {result['rss_peak_mb']:>12.1f} "
+            f"{result['latency_p50_ms']:>8.2f} {result['latency_p99_ms']:>8.2f} {result['batch_texts_per_s']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Event-loop lag benchmark for knowledge-base retrieval under concurrent load.
+
+Runs the same batch of concurrent lookups (query embedding + ChromaDB search) twice:
+inline on the event loop (the previous behaviour) and through the retrieval executor.
+A probe task sleeps in short intervals meanwhile and records how late it wakes up,
+which is the delay any other coroutine (webhook acks, WebSocket sends) would see.
+
+Run from the project root (needs the project's environment / .env and the local
+ChromaDB directory like the app):
+    python -m benchmarks.bench_retrieval_event_loop [--concurrency 16 --rounds 4]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from src.services.chromadb.client_manager import (
+    close_chroma_client,
+    get_chroma_collection,
+    get_embedding_function,
+    initialize_chroma_client,
+)
+from src.services.chromadb.retrieval_executor import (
+    close_retrieval_executor,
+    get_retrieval_executor_stats,
+    initialize_retrieval_executor,
+    run_retrieval,
+)
+
+PROBE_INTERVAL_SECONDS = 0.005
+
+SAMPLE_QUERIES = [
+    "What is your return policy?",
+    "How long does shipping to Canada take?",
+    "Can I order holographic die-cut stickers?",
+    "What file formats do you accept for artwork?",
+    "Do you offer discounts for bulk orders?",
+    "How durable are vinyl stickers outdoors?",
+    "Can I get a proof before printing?",
+    "What is the minimum order quantity for labels?",
+]
+
+
+def _lookup(query_text: str):
+    """One blocking lookup, exactly as the tool performs it (embedding + search)."""
+    embedding = get_embedding_function()([f"search_query: {query_text}"])[0]
+    return get_chroma_collection().query(
+        query_embeddings=[embedding],
+        n_results=3,
+        include=["documents", "metadatas", "distances"],
+    )
+
+
+async def _inline_lookup(query_text: str):
+    return _lookup(query_text)
+
+
+async def _executor_lookup(query_text: str):
+    return await run_retrieval(_lookup, query_text)
+
+
+async def _probe_lag(lags: List[float], stop: asyncio.Event):
+    """Measures how late the event loop wakes a sleeping coroutine."""
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL_SECONDS
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _run_case(lookup, concurrency: int, rounds: int) -> dict:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_lag(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL_SECONDS * 2)  # Let the probe start
+
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(concurrency)]
+        await asyncio.gather(*(lookup(query) for query in queries))
+    elapsed = time.perf_counter() - started_at
+
+    stop.set()
+    await probe
+
+    ordered = sorted(lags) or [0.0]
+    return {
+        "lookups_per_s": concurrency * rounds / elapsed,
+        "lag_p50_ms": statistics.median(ordered) * 1000,
+        "lag_p99_ms": ordered[min(len(ordered) - 1, int(0.99 * (len(ordered) - 1)))] * 1000,
+        "lag_max_ms": ordered[-1] * 1000,
+    }
+
+
+async def _main(concurrency: int, rounds: int):
+    initialize_chroma_client()
+    initialize_retrieval_executor()
+    try:
+        _lookup(SAMPLE_QUERIES[0])  # Warm up the model and the collection
+
+        print(f"{'mode':<10} {'lookups/s':>10} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+        for name, lookup in (("inline", _inline_lookup), ("executor", _executor_lookup)):
+            result = await _run_case(lookup, concurrency, rounds)
+            print(
+                f"{name:<10} {result['lookups_per_s']:>10.1f} {result['lag_p50_ms']:>11.2f} "
+                f"{result['lag_p99_ms']:>11.2f} {result['lag_max_ms']:>11.2f}"
+            )
+        print(f"\nexecutor stats: {get_retrieval_executor_stats()}")
+    finally:
+        close_retrieval_executor()
+        close_chroma_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event-loop lag caused by knowledge-base retrieval.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent lookups per round.")
+    parser.add_argument("--rounds", type=int, default=4, help="Rounds of concurrent lookups per mode.")
+    args = parser.parse_args()
+    asyncio.run(_main(args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the conversation-state codecs.
+
+Compares each codec in `src.services.state_codec` with the legacy format (json.dumps with
+the app's serializer) over real exported states: stored size (the bytes Redis holds) relative
+to legacy JSON, and encode/decode time per state.
+
+Export states first with `python retrieve_redis_chat.py <conversation ids>` (written to
+`retrieved_conversations/`), then run from the project root (needs the project's .env):
+    python -m benchmarks.bench_state_codec [--states-dir retrieved_conversations] [--number 50]
+"""
+
+import argparse
+import json
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from src.services.json_utils import json_serializer_default
+from src.services.state_codec import (
+    STATE_CODEC_JSON,
+    STATE_CODEC_ORJSON,
+    STATE_CODEC_ORJSON_LZ4,
+    STATE_CODEC_ORJSON_ZSTD,
+    decode_state,
+    encode_state,
+)
+
+CODECS = (STATE_CODEC_JSON, STATE_CODEC_ORJSON, STATE_CODEC_ORJSON_ZSTD, STATE_CODEC_ORJSON_LZ4)
+
+
+def _load_states(states_dir: Path) -> List[Dict[str, Any]]:
+    states = [json.loads(path.read_text(encoding="utf-8")) for path in sorted(states_dir.glob("*.json"))]
+    return [state for state in states if "raw_content" not in state]
+
+
+def _best_ms(function: Callable[[], object], number: int, repeat: int) -> float:
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation-state codecs on exported states.")
+    parser.add_argument("--states-dir", type=Path, default=Path("retrieved_conversations"), help="Exported states (*.json).")
+    parser.add_argument("--number", type=int, default=50, help="Encodes/decodes per measurement.")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per state (best is reported).")
+    args = parser.parse_args()
+
+    states = _load_states(args.states_dir)
+    if not states:
+        raise SystemExit(f"No exported states in '{args.states_dir}'. Run retrieve_redis_chat.py first.")
+
+    legacy_values = [json.dumps(state, default=json_serializer_default) for state in states]
+    legacy_bytes = sum(len(value.encode("utf-8")) for value in legacy_values)
+    legacy_encode_ms = sum(
+        _best_ms(lambda state=state: json.dumps(state, default=json_serializer_default), args.number, args.repeat)
+        for state in states
+    )
+    legacy_decode_ms = sum(_best_ms(lambda value=value: json.loads(value), args.number, args.repeat) for value in legacy_values)
+    print(f"{len(states)} states, {legacy_bytes / len(states) / 1024:.1f} KiB average as legacy JSON\n")
+
+    print(f"{'codec':<14} {'avg KiB':>9} {'size ratio':>11} {'encode ms':>10} {'decode ms':>10}")
+    print(
+        f"{'legacy json':<14} {legacy_bytes / len(states) / 1024:>9.1f} {1:>11.3f} "
+        f"{legacy_encode_ms / len(states):>10.3f} {legacy_decode_ms / len(states):>10.3f}"
+    )
+    for codec_name in CODECS:
+        try:
+            values = [encode_state(state, codec_name) for state in states]
+        except ImportError as e:
+            print(f"{codec_name:<14} skipped ({e})")
+            continue
+        assert all(decode_state(value) == json.loads(legacy) for value, legacy in zip(values, legacy_values))
+
+        stored_bytes = sum(len(value) for value in values)
+        encode_ms = sum(
+            _best_ms(lambda state=state: encode_state(state, codec_name), args.number, args.repeat) for state in states
+        )
+        decode_ms = sum(_best_ms(lambda value=value: decode_state(value), args.number, args.repeat) for value in values)
+        print(
+            f"{codec_name:<14} {stored_bytes / len(states) / 1024:>9.1f} {stored_bytes / legacy_bytes:>11.3f} "
+            f"{encode_ms / len(states):>10.3f} {decode_ms / len(states):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Retrieval-quality and latency evaluation: vector-only vs hybrid (vector + BM25 with RRF).
+
+Each labelled query (JSONL, see `benchmarks/payloads/kb_labelled_queries.jsonl`) lists
+either `relevant_sources` (a hit's `source` metadata must match one of them) or
+`relevant_keywords` (a hit's content must contain all of them, case-insensitive).
+Reports hit rate@k, MRR@k and search latency percentiles for both modes.
+
+Run from the project root (needs the project's environment / .env and the local
+ChromaDB directory like the app):
+    python -m benchmarks.eval_hybrid_retrieval [--queries path.jsonl --top-k 3 --repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import config
+from src.services.chromadb.bm25_index import get_bm25_index, initialize_bm25_index
+from src.services.chromadb.client_manager import (
+    close_chroma_client,
+    get_chroma_collection,
+    initialize_chroma_client,
+)
+from src.services.chromadb.hybrid_search import _hybrid_query_sync
+from src.services.chromadb.query_embedding_cache import get_query_embedding
+from src.services.chromadb.retrieval_executor import close_retrieval_executor
+
+DEFAULT_QUERIES_PATH = Path(__file__).resolve().parent / "payloads" / "kb_labelled_queries.jsonl"
+DEFAULT_CANDIDATES = 20
+
+
+def load_labelled_queries(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as queries_file:
+        return [json.loads(line) for line in queries_file if line.strip()]
+
+
+def is_relevant(hit: Dict[str, Any], labelled_query: Dict[str, Any]) -> bool:
+    sources = labelled_query.get("relevant_sources")
+    if sources:
+        return hit["metadata"].get("source") in sources
+    content = (hit["document"] or "").lower()
+    return all(keyword.lower() in content for keyword in labelled_query.get("relevant_keywords", []))
+
+
+def percentile_ms(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(percentile / 100 * (len(ordered) - 1)))] * 1000
+
+
+def latency_summary_ms(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile_ms(samples, 50), 3),
+        "p99": round(percentile_ms(samples, 99), 3),
+        "mean": round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+def first_relevant_rank(matches: Sequence[Any]) -> Optional[int]:
+    """1-based rank of the first truthy match, or None if no hit is relevant."""
+    return next((rank for rank, match in enumerate(matches, start=1) if match), None)
+
+
+async def embed_query_like_the_tool(query: str) -> List[float]:
+    """The query embedding exactly as `query_knowledge_base` computes it (prefix, normalization, cache, batcher)."""
+    return await get_query_embedding(f"search_query: {query}")
+
+
+async def run_labelled_queries(
+    labelled_queries: List[Dict[str, Any]],
+    embed: Callable[[str], Awaitable[List[float]]],
+    search: Callable[[List[float], str], List[Dict[str, Any]]],
+    repeat: int,
+) -> Dict[str, Any]:
+    """
+    Embeds and searches every labelled query `repeat` times, timing both steps.
+    Returns the (labelled query, hits of the last run) pairs and the embedding/search times (seconds).
+    """
+    runs, embedding_times, search_times = [], [], []
+    for labelled_query in labelled_queries:
+        query = labelled_query["query"]
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            query_embedding = await embed(query)
+            embedding_times.append(time.perf_counter() - started_at)
+
+            started_at = time.perf_counter()
+            hits = search(query_embedding, query)
+            search_times.append(time.perf_counter() - started_at)
+        runs.append((labelled_query, hits))
+    return {"runs": runs, "embedding_times": embedding_times, "search_times": search_times}
+
+
+async def evaluate(labelled_queries: List[Dict[str, Any]], top_k: int, candidates: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    collection = get_chroma_collection()
+    modes = {"vector": None, "hybrid": get_bm25_index()}
+
+    report = {}
+    for mode, index in modes.items():
+        measured = await run_labelled_queries(
+            labelled_queries,
+            embed_query_like_the_tool,
+            lambda query_embedding, query: _hybrid_query_sync(collection, index, query_embedding, query, top_k, candidates),
+            repeat,
+        )
+        first_ranks = [
+            first_relevant_rank([is_relevant(hit, labelled_query) for hit in hits])
+            for labelled_query, hits in measured["runs"]
+        ]
+        report[mode] = {
+            f"hit_rate@{top_k}": sum(1 for rank in first_ranks if rank) / len(labelled_queries),
+            f"mrr@{top_k}": statistics.mean(1.0 / rank if rank else 0.0 for rank in first_ranks),
+            "search_p50_ms": percentile_ms(measured["search_times"], 50),
+            "search_p99_ms": percentile_ms(measured["search_times"], 99),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate vector-only vs hybrid knowledge-base retrieval.")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES_PATH, help="Labelled queries (JSONL).")
+    parser.add_argument("--top-k", type=int, default=3, help="Results returned per query.")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES, help="Candidates taken from each retriever.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed searches per query and mode.")
+    args = parser.parse_args()
+
+    config.KB_EMBEDDING_CACHE_USE_REDIS = False  # Offline: no Redis
+    initialize_chroma_client()
+    try:
+        if get_bm25_index() is None:
+            initialize_bm25_index(get_chroma_collection())
+
+        labelled_queries = load_labelled_queries(args.queries)
+        report = asyncio.run(evaluate(labelled_queries, args.top_k, args.candidates, args.repeat))
+
+        print(f"{len(labelled_queries)} labelled queries, top_k={args.top_k}, candidates={args.candidates}")
+        columns = list(next(iter(report.values())).keys())
+        print(f"{'mode':<8} " + " ".join(f"{column:>14}" for column in columns))
+        for mode, metrics in report.items():
+            print(f"{mode:<8} " + " ".join(f"{metrics[column]:>14.3f}" for column in columns))
+    finally:
+        close_retrieval_executor()
+        close_chroma_client()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Routing regression check of the modular Planner prompt against the monolithic one.
+
+For each scenario (a user message, optionally after a few earlier exchanges), the Planner's
+first step is generated with the full system message and with the core plus the modules
+`detect_prompt_modules` picks, and the routing decisions are compared: the agent the Planner
+delegates to (or `User_Proxy_Agent` when it answers the user) and the action (tool called,
+"Find ID for", "Guide custom quote", TASK COMPLETE / TASK FAILED reply...). Also reports the
+prompt tokens per call of each variant and the token budget of every prompt module.
+
+Scenarios are JSONL objects with `id`, `message` and optional `history`, a list of
+`{"source": <agent name>, "content": ...}` messages as the Planner saw them.
+
+Run from the project root (needs the project's .env; makes 2 x runs LLM calls per scenario):
+    python -m benchmarks.eval_planner_prompt_modules [--runs 3 --output planner_prompt_report.json]
+    python -m benchmarks.eval_planner_prompt_modules --budget-only   # Token budget per module, no LLM calls
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from autogen_core.models import AssistantMessage, LLMMessage, SystemMessage, UserMessage
+
+from src.agents.agent_names import PLANNER_AGENT_NAME, USER_PROXY_AGENT_NAME
+from src.agents.agents_services import AgentService
+from src.agents.planner.prompt_modules import count_prompt_tokens, detect_prompt_modules, get_planner_prompt_budget
+from src.agents.planner.system_message import PLANNER_ASSISTANT_SYSTEM_MESSAGE, build_planner_system_message
+from src.markdown_info.quick_replies.quick_reply_markdown import QUICK_REPLIES_START_TAG
+
+DEFAULT_SCENARIOS_PATH = Path(__file__).resolve().parent / "payloads" / "planner_routing_scenarios.jsonl"
+
+_DELEGATION_PATTERN = re.compile(r"^\s*<(\w+)>\s*:\s*(.*)", re.DOTALL)
+_TOOL_CALL_PATTERN = re.compile(r"^Call (\w+)")
+
+
+def load_scenarios(path: Path) -> List[Dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def routing_decision(output: Any) -> str:
+    """The routing decision of a Planner step, as "<target agent>/<action>"."""
+    if not isinstance(output, str):
+        return "tool_call/-"
+    text = output.strip()
+    match = _DELEGATION_PATTERN.match(text)
+    if match and match.group(1) != USER_PROXY_AGENT_NAME:
+        request = match.group(2).strip()
+        tool_call = _TOOL_CALL_PATTERN.match(request)
+        action = tool_call.group(1) if tool_call else " ".join(request.split()[:3]).rstrip(":.").lower()
+        return f"{match.group(1)}/{action}"
+    if text.endswith(f"<{USER_PROXY_AGENT_NAME}>"):
+        if text.startswith("TASK COMPLETE"):
+            return f"{USER_PROXY_AGENT_NAME}/task_complete"
+        if text.startswith("TASK FAILED"):
+            return f"{USER_PROXY_AGENT_NAME}/task_failed"
+        if QUICK_REPLIES_START_TAG in text:
+            return f"{USER_PROXY_AGENT_NAME}/quick_replies"
+        return f"{USER_PROXY_AGENT_NAME}/reply"
+    return "unparsed/-"
+
+
+def _scenario_state(history: List[Dict[str, str]]) -> Dict[str, Any]:
+    """A minimal saved group-chat state holding the history in the Planner's model context."""
+    messages = [
+        {"type": "AssistantMessage", "source": entry["source"], "content": entry["content"]}
+        if entry["source"] == PLANNER_AGENT_NAME
+        else {"type": "UserMessage", "source": entry["source"], "content": entry["content"]}
+        for entry in history
+    ]
+    return {"agent_states": {PLANNER_AGENT_NAME: {"agent_state": {"llm_context": {"messages": messages}}}}}
+
+
+def _planner_messages(system_message: str, scenario: Dict[str, Any]) -> List[LLMMessage]:
+    # Same shape as the Planner's model call: system message, memory, history, new user message
+    memory = (
+        "\nRelevant memory content (in chronological order):\n"
+        "1. Current_HubSpot_Thread_ID: benchmark-thread\n2. Is_Currently_Business_Hours: True\n"
+    )
+    history: List[LLMMessage] = [
+        AssistantMessage(content=entry["content"], source=PLANNER_AGENT_NAME)
+        if entry["source"] == PLANNER_AGENT_NAME
+        else UserMessage(content=entry["content"], source=entry["source"])
+        for entry in scenario.get("history", [])
+    ]
+    return [
+        SystemMessage(content=system_message),
+        SystemMessage(content=memory),
+        *history,
+        UserMessage(content=scenario["message"], source=USER_PROXY_AGENT_NAME),
+    ]
+
+
+async def _run_variant(model_client, system_message: str, scenario: Dict[str, Any], runs: int) -> Dict[str, Any]:
+    decisions: List[str] = []
+    prompt_tokens: List[int] = []
+    latencies_ms: List[float] = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = await model_client.create(_planner_messages(system_message, scenario))
+        latencies_ms.append((time.perf_counter() - start_time) * 1000)
+        decisions.append(routing_decision(result.content))
+        prompt_tokens.append(result.usage.prompt_tokens)
+    decision, count = Counter(decisions).most_common(1)[0]
+    return {
+        "decision": decision,
+        "consistency": round(count / runs, 3),
+        "decisions": decisions,
+        "prompt_tokens": round(sum(prompt_tokens) / runs, 1),
+        "latency_ms": round(sum(latencies_ms) / runs, 1),
+    }
+
+
+async def _evaluate_scenario(model_client, scenario: Dict[str, Any], runs: int, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    modules: FrozenSet[str] = detect_prompt_modules(scenario["message"], _scenario_state(scenario.get("history", [])))
+    async with semaphore:
+        monolithic, modular = await asyncio.gather(
+            _run_variant(model_client, PLANNER_ASSISTANT_SYSTEM_MESSAGE, scenario, runs),
+            _run_variant(model_client, build_planner_system_message(modules), scenario, runs),
+        )
+    return {
+        "id": scenario["id"],
+        "modules": sorted(modules),
+        "estimated_prompt_tokens": {"monolithic": count_prompt_tokens(None), "modular": count_prompt_tokens(modules)},
+        "monolithic": monolithic,
+        "modular": modular,
+        "target_agrees": monolithic["decision"].split("/")[0] == modular["decision"].split("/")[0],
+        "decision_agrees": monolithic["decision"] == modular["decision"],
+    }
+
+
+def _print_budget(budget: Dict[str, int]):
+    print(f"{'prompt part':<14} {'tokens':>8} {'of full':>8}")
+    for part, tokens in budget.items():
+        print(f"{part:<14} {tokens:>8} {tokens / budget['monolithic']:>8.1%}")
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    AgentService.initialize_shared_state()
+    if not AgentService.primary_model_client:
+        raise SystemExit("Could not create the primary model client (check the .env).")
+
+    scenarios = load_scenarios(args.scenarios)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = await asyncio.gather(
+        *(_evaluate_scenario(AgentService.primary_model_client, scenario, args.runs, semaphore) for scenario in scenarios)
+    )
+    monolithic_tokens = sum(result["monolithic"]["prompt_tokens"] for result in results)
+    modular_tokens = sum(result["modular"]["prompt_tokens"] for result in results)
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "settings": {"scenarios_file": str(args.scenarios), "scenarios": len(scenarios), "runs": args.runs},
+        "budget_tokens": get_planner_prompt_budget(),
+        "summary": {
+            "target_agreement": round(sum(result["target_agrees"] for result in results) / len(results), 4),
+            "decision_agreement": round(sum(result["decision_agrees"] for result in results) / len(results), 4),
+            # How often the monolithic prompt repeats its own decision (the noise floor of the comparison)
+            "monolithic_consistency": round(sum(result["monolithic"]["consistency"] for result in results) / len(results), 4),
+            "avg_prompt_tokens_monolithic": round(monolithic_tokens / len(results), 1),
+            "avg_prompt_tokens_modular": round(modular_tokens / len(results), 1),
+            "prompt_token_reduction": round(1 - modular_tokens / monolithic_tokens, 4) if monolithic_tokens else 0.0,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Planner routing with the modular and the monolithic prompt.")
+    parser.add_argument("--scenarios", type=Path, default=DEFAULT_SCENARIOS_PATH, help="Routing scenarios (JSONL).")
+    parser.add_argument("--runs", type=int, default=3, help="Planner calls per scenario and prompt (majority decision).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Scenarios evaluated at the same time.")
+    parser.add_argument("--min-agreement", type=float, default=0.0, help="Exit with an error below this decision agreement.")
+    parser.add_argument("--output", type=Path, default=Path("planner_prompt_report.json"), help="Where to write the JSON report.")
+    parser.add_argument("--budget-only", action="store_true", help="Only print the token budget per prompt module.")
+    args = parser.parse_args()
+
+    if args.budget_only:
+        _print_budget(get_planner_prompt_budget())
+        return
+
+    report = asyncio.run(_main(args))
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    _print_budget(report["budget_tokens"])
+    print(f"\n{'scenario':<34} {'modules':<34} {'monolithic':<44} {'modular':<44} {'tokens':>14}")
+    for result in report["results"]:
+        marker = "" if result["decision_agrees"] else "  <-- differs"
+        tokens = f"{result['monolithic']['prompt_tokens']:.0f}/{result['modular']['prompt_tokens']:.0f}"
+        print(
+            f"{result['id']:<34} {','.join(result['modules']) or '-':<34} {result['monolithic']['decision']:<44} "
+            f"{result['modular']['decision']:<44} {tokens:>14}{marker}"
+        )
+    summary = report["summary"]
+    print(
+        f"\nTarget agreement {summary['target_agreement']:.1%}, decision agreement {summary['decision_agreement']:.1%} "
+        f"(monolithic self-consistency {summary['monolithic_consistency']:.1%}); prompt tokens "
+        f"{summary['avg_prompt_tokens_monolithic']:.0f} -> {summary['avg_prompt_tokens_modular']:.0f} "
+        f"({summary['prompt_token_reduction']:.1%} fewer). Report written to {args.output}"
+    )
+    if summary["decision_agreement"] < args.min_agreement:
+        raise SystemExit(f"Decision agreement {summary['decision_agreement']:.1%} is below {args.min_agreement:.1%}.")
+
+
+if __name__ == "__main__":
+    main()
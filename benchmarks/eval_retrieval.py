@@ -0,0 +1,264 @@
+"""
+Retrieval evaluation and latency benchmark for the knowledge base.
+
+Runs offline against a local ChromaDB directory (no server, Redis or LLM) over a labelled
+query set and reports, per query-prefix variant and retrieval mode:
+  - recall@k for several k and MRR
+  - p50/p99 latency of the query embedding and of the search, measured separately
+  - the same recall/MRR on the query-aware compressed chunks the tool returns, and the
+    tokens per response before (pretty-printed, full chunks) and after compression
+The report is written as JSON (with the git commit) so runs can be compared across commits.
+
+Labelled queries are JSONL objects with `query` and one of `relevant_ids` (chunk IDs),
+`relevant_sources` (source URLs) or `relevant_keywords` (all must appear in a hit).
+
+Prefix variants: the tool prefixes `search_query:` and `ModernBertEmbeddingFunction.__call__`
+prefixes it again, so production embeds "search_query: search_query: ...". The "double"
+variant goes through `get_query_embedding` like the tool (normalization, micro-batcher and
+embedding function; the embedding cache is disabled so every timed run is a forward pass);
+"single" embeds with the prefix once, as the model expects.
+
+Run from the project root (needs the project's environment / .env):
+    python -m benchmarks.eval_retrieval [--output retrieval_report.json --k 1 3 5 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import chromadb
+
+import config
+from benchmarks.eval_hybrid_retrieval import (
+    DEFAULT_QUERIES_PATH,
+    embed_query_like_the_tool,
+    first_relevant_rank,
+    latency_summary_ms,
+    load_labelled_queries,
+    run_labelled_queries,
+)
+from src.services.chromadb.bm25_index import BM25Index
+from src.services.chromadb.client_manager import (
+    close_chroma_client,
+    get_chroma_collection,
+    get_embedding_function,
+    initialize_chroma_client,
+)
+from src.services.chromadb.custom_embedding_function import ModernBertEmbeddingFunction
+from src.services.chromadb.hybrid_search import _hybrid_query_sync
+from src.services.chromadb.result_compression import compress_chunk
+from src.services.chromadb.retrieval_executor import close_retrieval_executor, run_retrieval
+from src.services.token_counter import count_tokens
+from src.tools.chromadb.query_tool import KB_RESULTS_TOP_K
+
+PREFIX_VARIANTS = ("double", "single")
+RETRIEVAL_MODES = ("vector", "hybrid")
+
+
+def _relevance_keys(labelled_query: Dict[str, Any]) -> Set[str]:
+    """The distinct relevant items a query expects (used as the recall denominator)."""
+    if labelled_query.get("relevant_ids"):
+        return {f"id:{doc_id}" for doc_id in labelled_query["relevant_ids"]}
+    if labelled_query.get("relevant_sources"):
+        return {f"source:{source}" for source in labelled_query["relevant_sources"]}
+    return {"keywords"}
+
+
+def _matched_key(hit: Dict[str, Any], labelled_query: Dict[str, Any]) -> Optional[str]:
+    """The relevance key a hit satisfies, or None if it isn't relevant."""
+    if labelled_query.get("relevant_ids"):
+        return f"id:{hit['id']}" if hit["id"] in labelled_query["relevant_ids"] else None
+    if labelled_query.get("relevant_sources"):
+        source = hit["metadata"].get("source")
+        return f"source:{source}" if source in labelled_query["relevant_sources"] else None
+    content = (hit["document"] or "").lower()
+    keywords = labelled_query.get("relevant_keywords", [])
+    return "keywords" if keywords and all(keyword.lower() in content for keyword in keywords) else None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _embedder(embedding_function: ModernBertEmbeddingFunction, variant: str) -> Callable[[str], Awaitable[List[float]]]:
+    if variant == "double":
+        # Production path: the tool's prefix plus the embedding function's own prefix
+        return embed_query_like_the_tool
+
+    async def embed_single_prefix(query: str) -> List[float]:
+        embeddings = await run_retrieval(embedding_function.model.encode, [f"search_query: {query}"], normalize_embeddings=True)
+        return embeddings[0].tolist()
+
+    return embed_single_prefix
+
+
+async def evaluate(
+    collection: chromadb.Collection,
+    embedding_function: ModernBertEmbeddingFunction,
+    bm25_index: BM25Index,
+    labelled_queries: List[Dict[str, Any]],
+    k_values: List[int],
+    candidates: int,
+    repeat: int,
+    chunk_token_budget: int,
+) -> Dict[str, Any]:
+    max_k = max(k_values)
+    results: Dict[str, Any] = {}
+    per_query: List[Dict[str, Any]] = []
+
+    for variant in PREFIX_VARIANTS:
+        embed = _embedder(embedding_function, variant)
+        await embed(labelled_queries[0]["query"])  # Warm up
+
+        for mode in RETRIEVAL_MODES:
+            index = bm25_index if mode == "hybrid" else None
+            measured = await run_labelled_queries(
+                labelled_queries,
+                embed,
+                lambda query_embedding, query: _hybrid_query_sync(
+                    collection, index, query_embedding, query, max_k, max(candidates, max_k)
+                ),
+                repeat,
+            )
+            recalls = {k: [] for k in k_values}
+            compressed_recalls = {k: [] for k in k_values}
+            reciprocal_ranks, compressed_reciprocal_ranks, tokens_full, tokens_compressed = [], [], [], []
+
+            for labelled_query, hits in measured["runs"]:
+                query = labelled_query["query"]
+                expected = _relevance_keys(labelled_query)
+                matched = [_matched_key(hit, labelled_query) for hit in hits]
+                for k in k_values:
+                    recalls[k].append(len({key for key in matched[:k] if key}) / len(expected))
+                first_rank = first_relevant_rank(matched)
+                reciprocal_ranks.append(1.0 / first_rank if first_rank else 0.0)
+
+                # Same hits as the tool returns them: each chunk compressed for the query
+                compressed_hits = [
+                    {**hit, "document": compress_chunk(query, hit["document"] or "", chunk_token_budget, bm25_index)}
+                    for hit in hits
+                ]
+                compressed_matched = [_matched_key(hit, labelled_query) for hit in compressed_hits]
+                for k in k_values:
+                    compressed_recalls[k].append(len({key for key in compressed_matched[:k] if key}) / len(expected))
+                compressed_first_rank = first_relevant_rank(compressed_matched)
+                compressed_reciprocal_ranks.append(1.0 / compressed_first_rank if compressed_first_rank else 0.0)
+                tokens_full.append(count_tokens(json.dumps(
+                    [hit["document"] for hit in hits[:KB_RESULTS_TOP_K]], indent=2
+                )))
+                tokens_compressed.append(count_tokens(json.dumps(
+                    [hit["document"] for hit in compressed_hits[:KB_RESULTS_TOP_K]], separators=(",", ":"), ensure_ascii=False
+                )))
+                per_query.append({
+                    "variant": variant,
+                    "mode": mode,
+                    "query": query,
+                    "first_relevant_rank": first_rank,
+                    "top_ids": [hit["id"] for hit in hits],
+                })
+
+            results[f"{variant}/{mode}"] = {
+                **{f"recall@{k}": round(statistics.mean(recalls[k]), 4) for k in k_values},
+                f"mrr@{max_k}": round(statistics.mean(reciprocal_ranks), 4),
+                "embedding_ms": latency_summary_ms(measured["embedding_times"]),
+                "search_ms": latency_summary_ms(measured["search_times"]),
+                "compressed": {
+                    **{f"recall@{k}": round(statistics.mean(compressed_recalls[k]), 4) for k in k_values},
+                    f"mrr@{max_k}": round(statistics.mean(compressed_reciprocal_ranks), 4),
+                    "tokens_per_response_full": round(statistics.mean(tokens_full), 1),
+                    "tokens_per_response_compressed": round(statistics.mean(tokens_compressed), 1),
+                },
+            }
+
+    return {"results": results, "per_query": per_query}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate knowledge-base retrieval quality and latency offline.")
+    parser.add_argument("--chroma-path", default=config.CHROMA_DB_PATH_CONFIG, help="Local ChromaDB directory.")
+    parser.add_argument("--collection", default=config.CHROMA_COLLECTION_NAME_CONFIG, help="Collection name.")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES_PATH, help="Labelled queries (JSONL).")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Cut-offs for recall@k.")
+    parser.add_argument("--candidates", type=int, default=config.KB_HYBRID_CANDIDATES, help="Candidates per retriever.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query.")
+    parser.add_argument(
+        "--chunk-token-budget", type=int, default=config.KB_RESULT_CHUNK_TOKEN_BUDGET, help="Tokens kept per compressed chunk."
+    )
+    parser.add_argument("--backend", default=config.KB_EMBEDDING_BACKEND, help="Embedding backend (torch, onnx, onnx-int8).")
+    parser.add_argument("--output", type=Path, default=Path("retrieval_report.json"), help="Where to write the JSON report.")
+    parser.add_argument("--allow-download", action="store_true", help="Allow downloading the model from the Hugging Face Hub.")
+    args = parser.parse_args()
+
+    if not args.allow_download:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+    # The app's KB client on the chosen directory/backend, without Redis, the embedding cache
+    # (every timed run embeds), the batching window (a lone query would wait for it) or a saved BM25 index
+    config.CHROMA_DB_PATH_CONFIG = args.chroma_path
+    config.CHROMA_COLLECTION_NAME_CONFIG = args.collection
+    config.KB_EMBEDDING_BACKEND = args.backend
+    config.KB_EMBEDDING_CACHE_USE_REDIS = False
+    config.KB_EMBEDDING_CACHE_SIZE = 0
+    config.KB_EMBEDDING_BATCH_WAIT_MS = 0
+    config.KB_HYBRID_SEARCH = False
+    initialize_chroma_client()
+    try:
+        collection = get_chroma_collection()
+        embedding_function = get_embedding_function()
+        bm25_index = BM25Index.build(collection)
+        labelled_queries = load_labelled_queries(args.queries)
+
+        evaluation = asyncio.run(evaluate(
+            collection, embedding_function, bm25_index, labelled_queries, sorted(args.k), args.candidates, args.repeat, args.chunk_token_budget
+        ))
+        collection_size = collection.count()
+    finally:
+        close_retrieval_executor()
+        close_chroma_client()
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "settings": {
+            "chroma_path": args.chroma_path,
+            "collection": args.collection,
+            "collection_size": collection_size,
+            "queries_file": str(args.queries),
+            "queries": len(labelled_queries),
+            "k": sorted(args.k),
+            "candidates": args.candidates,
+            "repeat": args.repeat,
+            "chunk_token_budget": args.chunk_token_budget,
+            "embedding_model": embedding_function.model_name,
+            "embedding_backend": args.backend,
+        },
+        **evaluation,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    max_k = max(args.k)
+    print(f"{'variant/mode':<16} " + " ".join(f"{'R@' + str(k):>7}" for k in sorted(args.k)) + f" {'MRR':>7} {'emb p50/p99 ms':>16} {'search p50/p99 ms':>18}")
+    for name, metrics in report["results"].items():
+        recalls = " ".join(f"{metrics[f'recall@{k}']:>7.3f}" for k in sorted(args.k))
+        embedding = f"{metrics['embedding_ms']['p50']:.1f}/{metrics['embedding_ms']['p99']:.1f}"
+        search = f"{metrics['search_ms']['p50']:.1f}/{metrics['search_ms']['p99']:.1f}"
+        print(f"{name:<16} {recalls} {metrics[f'mrr@{max_k}']:>7.3f} {embedding:>16} {search:>18}")
+        compressed = metrics["compressed"]
+        compressed_recalls = " ".join(f"{compressed[f'recall@{k}']:>7.3f}" for k in sorted(args.k))
+        tokens = f"{compressed['tokens_per_response_full']:.0f} -> {compressed['tokens_per_response_compressed']:.0f} tokens"
+        print(f"{'  compressed':<16} {compressed_recalls} {compressed[f'mrr@{max_k}']:>7.3f} {tokens:>35}")
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
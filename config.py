@@ -70,6 +70,35 @@ LLM_SECONDARY_MODEL_FAMILY = get_required_env_variable("LLM_SECONDARY_MODEL_FAMI
 _CHROMA_DB_RELATIVE_PATH = get_required_env_variable("CHROMA_DB_PATH")
 CHROMA_COLLECTION_NAME_CONFIG = get_required_env_variable("CHROMA_COLLECTION_NAME")
 CHROMA_EMBEDDING_MODEL_NAME_CONFIG = get_required_env_variable("CHROMA_EMBEDDING_MODEL_NAME")
+# Run a dummy KB query at startup so the model and HNSW index are loaded before the first request
+KB_WARMUP_ON_STARTUP = os.getenv("KB_WARMUP_ON_STARTUP", "true").lower() == "true"
+# Query-embedding cache (in-process LRU, optionally backed by Redis so workers share it)
+KB_EMBEDDING_CACHE_SIZE = int(os.getenv("KB_EMBEDDING_CACHE_SIZE", "1024"))
+KB_EMBEDDING_CACHE_USE_REDIS = os.getenv("KB_EMBEDDING_CACHE_USE_REDIS", "false").lower() == "true"
+# Retrieval thread pool (embedding + ChromaDB queries run here instead of on the event loop)
+KB_RETRIEVAL_WORKERS = int(os.getenv("KB_RETRIEVAL_WORKERS", "2"))
+KB_RETRIEVAL_MAX_PENDING = int(os.getenv("KB_RETRIEVAL_MAX_PENDING", "32"))  # Submitted jobs before callers wait
+# Query-embedding micro-batching (concurrent queries are encoded together)
+KB_EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("KB_EMBEDDING_BATCH_MAX_SIZE", "16"))
+KB_EMBEDDING_BATCH_WAIT_MS = float(os.getenv("KB_EMBEDDING_BATCH_WAIT_MS", "5"))
+# Hybrid search: BM25 keyword results fused with vector results (RRF)
+KB_HYBRID_SEARCH = os.getenv("KB_HYBRID_SEARCH", "true").lower() == "true"
+KB_HYBRID_CANDIDATES = int(os.getenv("KB_HYBRID_CANDIDATES", "20"))  # Candidates taken from each retriever
+# Query-aware compression of KB tool results (most relevant sentences per chunk within a token budget)
+KB_RESULT_COMPRESSION = os.getenv("KB_RESULT_COMPRESSION", "true").lower() == "true"
+KB_RESULT_CHUNK_TOKEN_BUDGET = int(os.getenv("KB_RESULT_CHUNK_TOKEN_BUDGET", "160"))  # Tokens kept per chunk
+KB_TOKENIZER_ENCODING = os.getenv("KB_TOKENIZER_ENCODING", "o200k_base")  # tiktoken encoding used for budgets
+# Semantic answer cache: validated FAQ answers reused for near-duplicate first questions
+KB_ANSWER_CACHE_ENABLED = os.getenv("KB_ANSWER_CACHE_ENABLED", "false").lower() == "true"
+KB_ANSWER_CACHE_SIMILARITY = float(os.getenv("KB_ANSWER_CACHE_SIMILARITY", "0.95"))  # Min cosine similarity for a hit
+KB_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("KB_ANSWER_CACHE_MAX_ENTRIES", "2000"))
+KB_ANSWER_CACHE_TTL_SECONDS = int(os.getenv("KB_ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Fast path ahead of the Planner: rule + entity + embedding-classifier routing of simple intents straight to their tool
+FAST_PATH_ROUTER_ENABLED = os.getenv("FAST_PATH_ROUTER_ENABLED", "false").lower() == "true"
+FAST_PATH_CONFIDENCE_THRESHOLD = float(os.getenv("FAST_PATH_CONFIDENCE_THRESHOLD", "0.8"))  # Cosine similarity
+FAST_PATH_MAX_WORDS = int(os.getenv("FAST_PATH_MAX_WORDS", "30"))  # Longer messages always go to the Planner
+# Planner system message: core sections plus only the workflow modules of the conversation's phase (false = full prompt)
+PLANNER_MODULAR_PROMPT = os.getenv("PLANNER_MODULAR_PROMPT", "false").lower() == "true"
 
 # Resolve to an absolute path
 try:
@@ -81,6 +110,14 @@ try:
 except Exception as e:
     raise ValueError(f"Could not resolve CHROMA_DB_PATH '{_CHROMA_DB_RELATIVE_PATH}': {e}") from e
 
+# Embedding backend: "torch" (SentenceTransformer), "onnx" or "onnx-int8" (ONNX Runtime).
+# The ONNX backends load the model exported by export_onnx_embedding_model.py.
+KB_EMBEDDING_BACKEND = os.getenv("KB_EMBEDDING_BACKEND", "torch")
+KB_BM25_INDEX_PATH = os.getenv("KB_BM25_INDEX_PATH") or os.path.join(CHROMA_DB_PATH_CONFIG, "bm25_index.pkl")
+KB_EMBEDDING_ONNX_DIR = str(
+    (Path(__file__).resolve().parent / os.getenv("KB_EMBEDDING_ONNX_DIR", "onnx_models/modernbert-embed-base")).resolve(strict=False)
+)
+
 
 # --- HubSpot Configuration ---
 HUBSPOT_API_TOKEN = get_required_env_variable("HUBSPOT_API_TOKEN")
@@ -102,6 +139,32 @@ HUBSPOT_PIPELINE_STAGE_ID_AICHAT_CLOSED = get_required_env_variable("HUBSPOT_PIP
 REDIS_HOST = get_required_env_variable("REDIS_HOST")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6380"))
 REDIS_PASSWORD = get_required_env_variable("REDIS_PASSWORD")
+# Shared client: blocking pool (callers wait up to REDIS_POOL_TIMEOUT_SECONDS for a free connection), RESP3 with RESP2 fallback
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5"))
+REDIS_PROTOCOL = int(os.getenv("REDIS_PROTOCOL", "3"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))  # Seconds idle before a connection is pinged
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "5"))
+# Conversation states: snapshot + append-only delta log, re-snapshotted every N deltas
+CONV_STATE_SNAPSHOT_EVERY = int(os.getenv("CONV_STATE_SNAPSHOT_EVERY", "10"))
+CONV_STATE_TTL_SECONDS = int(os.getenv("CONV_STATE_TTL_SECONDS", "86400"))  # 24 hours
+CONV_STATE_LOCAL_CACHE_SIZE = int(os.getenv("CONV_STATE_LOCAL_CACHE_SIZE", "256"))  # Decoded states kept per worker (0 disables)
+# Codec of stored states: "json", "orjson", "orjson-zstd" or "orjson-lz4" (legacy JSON values are always readable)
+CONV_STATE_CODEC = os.getenv("CONV_STATE_CODEC", "orjson-zstd")
+CONV_STATE_ZSTD_LEVEL = int(os.getenv("CONV_STATE_ZSTD_LEVEL", "3"))
+# Agent histories: keep the last N exchanges verbatim, fold older ones (M at a time) into a summary by the secondary model
+CONV_HISTORY_SUMMARIZATION = os.getenv("CONV_HISTORY_SUMMARIZATION", "true").lower() == "true"
+CONV_HISTORY_KEEP_EXCHANGES = int(os.getenv("CONV_HISTORY_KEEP_EXCHANGES", "6"))
+CONV_HISTORY_SUMMARIZE_EVERY = int(os.getenv("CONV_HISTORY_SUMMARIZE_EVERY", "4"))
+
+# --- WebSocket Configuration ---
+WS_SEND_QUEUE_MAX_SIZE = int(os.getenv("WS_SEND_QUEUE_MAX_SIZE", "100"))  # Pending messages per socket
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")  # "drop_oldest" or "close"
+# Protocol-level ping frames sent by uvicorn; a socket that doesn't answer within the timeout is closed.
+# Passed to uvicorn by main_server.py and by the Dockerfiles' start command (read there from the container environment).
+WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+WS_PING_TIMEOUT_SECONDS = float(os.getenv("WS_PING_TIMEOUT_SECONDS", "20"))
 
 # --- WismoLabs API Credentials & Token ---
 WISMOLABS_API_URL = get_required_env_variable("WISMOLABS_API_URL")
@@ -0,0 +1,164 @@
+"""
+Exports the knowledge-base embedding model to ONNX (fp32 plus a dynamically quantized
+int8 copy) and verifies both against the torch SentenceTransformer embeddings.
+
+The output directory is what the "onnx" / "onnx-int8" embedding backends load
+(KB_EMBEDDING_ONNX_DIR). Verification reports the cosine similarity between the torch
+and ONNX embeddings of the same texts and exits with status 1 if they disagree.
+
+Usage (from the project root, with the app's .env):
+    python export_onnx_embedding_model.py [--output-dir onnx_models/modernbert-embed-base]
+    python export_onnx_embedding_model.py --verify-only --sample-from-collection 200
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+import numpy as np
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Pooling
+from transformers import AutoModel, AutoTokenizer
+
+import config
+from src.services.logger_config import log_message
+from src.services.chromadb.onnx_embedding_model import (
+    EMBEDDING_CONFIG_FILE,
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_MODEL_FILE,
+    SUPPORTED_POOLING_MODES,
+    OnnxEmbeddingModel,
+)
+
+DEFAULT_MODEL_NAME = "nomic-ai/modernbert-embed-base"
+ONNX_OPSET_VERSION = 17
+
+# Texts used for verification when no collection sample is requested
+VERIFICATION_TEXTS = [
+    "search_query: What is your return policy?",
+    "search_query: How long does shipping to Canada take?",
+    "search_query: Do you print on BOPP or DTF transfers?",
+    "search_query: minimum order quantity for roll labels",
+    "search_query: Can I get a proof before printing my stickers?",
+    "search_document: Die-cut stickers are cut to the shape of your design and printed on durable vinyl.",
+    "search_document: Orders ship within 2-4 business days after proof approval. Expedited shipping is available.",
+    "search_document: Holographic stickers use a rainbow foil material that shifts color in the light.",
+]
+
+
+class _LastHiddenState(torch.nn.Module):
+    """Wraps the transformer so the exported graph has a single `last_hidden_state` output."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+def export_model(model_name: str, output_dir: str, st_model: SentenceTransformer):
+    """Writes the fp32 and int8 ONNX models, tokenizer and embedding config to output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    pooling = next((module for module in st_model if isinstance(module, Pooling)), None)
+    pooling_mode = pooling.get_pooling_mode_str() if pooling else "mean"
+    if pooling_mode not in SUPPORTED_POOLING_MODES:
+        raise ValueError(f"Pooling mode '{pooling_mode}' is not supported by the ONNX backend.")
+
+    # Eager attention exports cleanly; the compiled/unpadded paths don't trace
+    model = AutoModel.from_pretrained(model_name, attn_implementation="eager", reference_compile=False)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    sample = tokenizer(VERIFICATION_TEXTS[:2], padding=True, return_tensors="pt")
+
+    fp32_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    log_message(f"Exporting {model_name} to {fp32_path}", level=1)
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=ONNX_OPSET_VERSION,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+
+    int8_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+    log_message(f"Quantizing (dynamic int8) to {int8_path}", level=1)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, EMBEDDING_CONFIG_FILE), "w", encoding="utf-8") as config_file:
+        json.dump(
+            {
+                "model_name": model_name,
+                "pooling": pooling_mode,
+                "max_seq_length": st_model.max_seq_length,
+            },
+            config_file,
+            indent=2,
+        )
+
+
+def sample_collection_texts(limit: int) -> List[str]:
+    """Returns up to `limit` documents from the local ChromaDB collection, with the document prefix."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH_CONFIG)
+    collection = client.get_collection(name=config.CHROMA_COLLECTION_NAME_CONFIG)
+    documents = collection.get(limit=limit, include=["documents"])["documents"] or []
+    return [f"search_document: {document}" for document in documents]
+
+
+def verify_model(output_dir: str, st_model: SentenceTransformer, texts: List[str], min_cosine: float, min_cosine_int8: float) -> bool:
+    """Compares ONNX embeddings with the torch ones. Returns True if both variants agree."""
+    reference = st_model.encode(texts, normalize_embeddings=True)
+    all_passed = True
+    for label, quantized, threshold in (("onnx", False, min_cosine), ("onnx-int8", True, min_cosine_int8)):
+        candidate = OnnxEmbeddingModel(output_dir, quantized=quantized).encode(texts, normalize_embeddings=True)
+        cosines = np.sum(reference * candidate, axis=1)
+        passed = float(cosines.min()) >= threshold
+        all_passed = all_passed and passed
+        print(
+            f"{label:<10} texts={len(texts):<5} cosine min={cosines.min():.5f} "
+            f"mean={cosines.mean():.5f} threshold={threshold} -> {'OK' if passed else 'FAILED'}"
+        )
+    return all_passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify the ONNX embedding backends.")
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME, help="SentenceTransformer model to export.")
+    parser.add_argument("--output-dir", default=config.KB_EMBEDDING_ONNX_DIR, help="Directory for the exported model.")
+    parser.add_argument("--verify-only", action="store_true", help="Skip the export and only verify.")
+    parser.add_argument("--sample-from-collection", type=int, default=0, help="Also verify on N documents from the local collection.")
+    parser.add_argument("--min-cosine", type=float, default=0.999, help="Minimum cosine agreement for the fp32 model.")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98, help="Minimum cosine agreement for the int8 model.")
+    args = parser.parse_args()
+
+    st_model = SentenceTransformer(args.model_name)
+    if not args.verify_only:
+        export_model(args.model_name, args.output_dir, st_model)
+
+    texts = list(VERIFICATION_TEXTS)
+    if args.sample_from_collection:
+        texts.extend(sample_collection_texts(args.sample_from_collection))
+
+    if not verify_model(args.output_dir, st_model, texts, args.min_cosine, args.min_cosine_int8):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
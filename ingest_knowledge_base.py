@@ -0,0 +1,95 @@
+"""
+Incremental knowledge-base ingestion CLI.
+
+Streams source documents (a directory of .md/.txt/.html files or a .jsonl file), chunks
+them and syncs the ChromaDB collection at CHROMA_DB_PATH: only new or changed chunks are
+embedded and upserted, and chunks of the ingested sources that disappeared are deleted.
+The BM25 index used by hybrid search is refreshed afterwards, and cached FAQ answers built
+from added or deleted chunks are invalidated.
+
+Running app workers keep the collection handle and the BM25 index they loaded at startup,
+so they don't see the new chunks until they are restarted (the cached answers are shared
+through Redis and are invalidated right away). Restart the app after ingesting.
+
+Usage (from the project root, with the app's .env):
+    python ingest_knowledge_base.py path/to/sources [--batch-size 32] [--prune-missing-sources] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Iterable
+
+import chromadb
+
+import config
+from src.services.logger_config import log_message
+from src.services.redis_client import close_redis_pool, initialize_redis_pool
+from src.services.chromadb.answer_cache import invalidate_answers_for_chunks
+from src.services.chromadb.bm25_index import initialize_bm25_index
+from src.services.chromadb.custom_embedding_function import ModernBertEmbeddingFunction
+from src.services.chromadb.ingestion import ingest_documents, iter_source_documents
+
+
+async def _invalidate_cached_answers(chunk_ids: Iterable[str]) -> int:
+    await initialize_redis_pool()
+    try:
+        return await invalidate_answers_for_chunks(chunk_ids)
+    finally:
+        await close_redis_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest source documents into the knowledge base.")
+    parser.add_argument("source", help="Directory of .md/.txt/.html files, or a .jsonl file of documents.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Chunks embedded and upserted per batch.")
+    parser.add_argument(
+        "--prune-missing-sources",
+        action="store_true",
+        help="Also delete chunks whose source is not in this run (use when ingesting the full corpus).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH_CONFIG)
+    embedding_function = ModernBertEmbeddingFunction(
+        backend=config.KB_EMBEDDING_BACKEND,
+        onnx_model_dir=config.KB_EMBEDDING_ONNX_DIR,
+    )
+    collection = client.get_or_create_collection(
+        name=config.CHROMA_COLLECTION_NAME_CONFIG,
+        embedding_function=embedding_function,
+        metadata={"hnsw:space": "cosine"},  # Only used when the collection is created
+    )
+    log_message(f"Ingesting '{args.source}' into '{collection.name}' ({collection.count()} chunks).", level=1)
+
+    report = ingest_documents(
+        collection,
+        embedding_function,
+        iter_source_documents(args.source),
+        batch_size=args.batch_size,
+        prune_missing_sources=args.prune_missing_sources,
+        dry_run=args.dry_run,
+    )
+
+    if not args.dry_run and (report.embedded or report.deleted):
+        initialize_bm25_index(collection)
+        try:
+            asyncio.run(_invalidate_cached_answers(report.changed_ids))
+        except Exception as e:
+            log_message(f"Could not invalidate cached answers for the changed chunks: {e}", log_type="warning")
+
+    log_message(
+        f"{'[dry run] ' if args.dry_run else ''}{report.documents} documents, {report.chunks} chunks: "
+        f"{report.unchanged} unchanged, {report.embedded} embedded, {report.metadata_updated} metadata updated, "
+        f"{report.deleted} deleted in {time.perf_counter() - started_at:.1f}s. "
+        f"Collection now has {collection.count()} chunks.",
+        level=1,
+    )
+    if not args.dry_run and (report.embedded or report.deleted):
+        log_message("Restart the app workers so they load the updated collection and BM25 index.", level=1)
+
+
+if __name__ == "__main__":
+    main()
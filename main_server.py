@@ -12,6 +12,7 @@ import config
 # FastAPI imports
 from fastapi import FastAPI, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 # Import specific message types for reply extraction
 
@@ -40,9 +41,29 @@ from src.services.hubspot.messages_filter import (
 )
 
 # Import the refresh token service function
-from src.services.redis_client import close_redis_pool, initialize_redis_pool
+from src.services.redis_client import close_redis_pool, get_redis_pool_stats, initialize_redis_pool
+from src.services.conversation_state_store import get_conversation_state_stats
+from src.services.conversation_history import get_conversation_history_stats
+from src.services.fast_path_router import get_fast_path_router_stats
+from src.agents.planner.prompt_modules import get_planner_prompt_stats
 from src.services.sy_refresh_token import refresh_sy_token
-from src.services.chromadb.client_manager import initialize_chroma_client, close_chroma_client
+from src.services.chromadb.client_manager import (
+    initialize_chroma_client,
+    warm_up_chroma_collection,
+    get_chroma_readiness,
+    close_chroma_client,
+)
+from src.services.chromadb.query_embedding_cache import get_query_embedding_cache_stats
+from src.services.chromadb.embedding_batcher import get_embedding_batcher_stats
+from src.services.chromadb.answer_cache import get_answer_cache_stats
+from src.services.chromadb.result_compression import get_result_compression_stats
+from src.services.chromadb.retrieval_executor import (
+    initialize_retrieval_executor,
+    run_retrieval,
+    get_retrieval_executor_stats,
+    close_retrieval_executor,
+)
+from src.services.hubspot.owner_directory import initialize_owner_directory, close_owner_directory
 
 # Import the HTML formatting service
 
@@ -74,6 +95,16 @@ async def lifespan(_: FastAPI):
         
         # --- Initialize ChromaDB Client ---
         initialize_chroma_client()
+        initialize_retrieval_executor()
+        # Load the model and HNSW index now so the first visitor doesn't pay for it
+        if config.KB_WARMUP_ON_STARTUP:
+            try:
+                await run_retrieval(warm_up_chroma_collection)
+            except Exception:
+                pass  # Logged by the warm-up; readiness reports the error
+
+        # Preload the HubSpot owner directory (refreshed in the background)
+        await initialize_owner_directory()
 
         # Trigger initial SY token refresh
         log_message("Requesting SY API Token", level=2)
@@ -92,7 +123,9 @@ async def lifespan(_: FastAPI):
         #  Shutdown 
         log_message("Server shutting down... ")
         await close_websocket_manager()
+        await close_owner_directory()
         await close_redis_pool()
+        close_retrieval_executor()
         close_chroma_client()
 
 
@@ -132,11 +165,16 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
     await manager.connect(websocket, conversation_id)
     try:
         while True:
-            # This loop keeps the connection alive.
-            # It will break automatically when the client disconnects.
-            await websocket.receive_text()
+            # This loop keeps the connection open and answers client PINGs. A client that stops
+            # answering uvicorn's protocol pings is disconnected, which ends the loop.
+            message = await websocket.receive_text()
+            await manager.receive_from_client(websocket, conversation_id, message)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, conversation_id)
+        pass
+    except RuntimeError:
+        pass  # The socket was closed by the server (e.g. reaped as dead or too slow)
+    finally:
+        await manager.disconnect(websocket, conversation_id)
 
 
 #   API Endpoint Definition   #
@@ -150,6 +188,42 @@ async def health_check():
     return {"status": "ok", "statusCode": 200,"message": "Server is running"}
 
 
+# Readiness Endpoint #
+@app.get("/ready")
+async def readiness_check():
+    """
+    Returns 200 once the knowledge base is warmed up (503 before that or if the warm-up failed),
+    so load balancers only route traffic to workers that won't pay cold-start latency.
+    """
+    knowledge_base = get_chroma_readiness()
+    ready = knowledge_base["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "knowledge_base": knowledge_base},
+    )
+
+
+# Metrics Endpoint #
+@app.get("/metrics")
+async def metrics():
+    """
+    Returns this worker's runtime gauges and counters (e.g. WebSocket connections and queue depth).
+    """
+    return {
+        "websockets": manager.get_stats() if manager else {},
+        "redis_pool": get_redis_pool_stats(),
+        "conversation_state": get_conversation_state_stats(),
+        "conversation_history": get_conversation_history_stats(),
+        "fast_path_router": get_fast_path_router_stats(),
+        "planner_prompt": get_planner_prompt_stats(),
+        "kb_query_embedding_cache": get_query_embedding_cache_stats(),
+        "kb_retrieval_executor": get_retrieval_executor_stats(),
+        "kb_embedding_batcher": get_embedding_batcher_stats(),
+        "kb_answer_cache": get_answer_cache_stats(),
+        "kb_result_compression": get_result_compression_stats(),
+    }
+
+
 @app.post("/log-payload")
 async def log_payload(request: Request):
     """
@@ -260,4 +334,12 @@ async def hubspot_assignment_webhook_endpoint(payload: TicketPropertyChangeWebho
 #   Run the Server (for local development)   #
 if __name__ == "__main__":
     # Use reload=True for development so the server restarts on code changes
-    uvicorn.run("main_server:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main_server:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws="websockets",
+        ws_ping_interval=config.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=config.WS_PING_TIMEOUT_SECONDS,
+    )
@@ -1,14 +1,18 @@
 """Centralized service for managing agent interactions and state."""
 
 # /src/agents/agents_services.py
-from typing import Sequence, Optional, Dict, Union, ClassVar
+from typing import FrozenSet, Sequence, Optional, Dict, Union, ClassVar
+import copy
 import traceback
 import uuid  # Added for generating conversation IDs
 import re  # Import regex module
-import json  # Add json import
+import time
 
-from src.services.json_utils import json_serializer_default
-from src.services.redis_client import get_redis_client
+from src.services.conversation_state_store import (
+    StoredConversationState,
+    load_conversation_state,
+    save_conversation_state,
+)
 from src.services.logger_config import log_message
 
 # AutoGen imports
@@ -34,6 +38,31 @@ from src.agents.price_quote.price_quote_agent import create_price_quote_agent
 from src.agents.sticker_you.sticker_you_agent import create_sticker_you_agent
 from src.agents.live_product.live_product_agent import create_live_product_agent
 
+# Live progress over the conversation WebSocket
+from src.services.agent_progress import AgentProgressPublisher
+
+# Per-turn coalescing of HubSpot ticket updates
+from src.tools.hubspot.tickets.ticket_tools import ticket_write_buffer
+
+# Semantic cache of validated FAQ answers
+from src.services.chromadb.answer_cache import (
+    append_exchange_to_state,
+    get_cacheable_answer,
+    get_turn_usage,
+    lookup_cached_answer,
+    store_validated_answer,
+)
+from src.tools.chromadb.query_tool import track_retrieved_chunks
+
+# Deterministic answers for obvious simple intents (no Planner call)
+from src.services.fast_path_router import FastPathReply, record_planner_turn, route_message
+
+# Planner prompt modules for the conversation's phase
+from src.agents.planner.prompt_modules import detect_prompt_modules, record_prompt_modules
+
+# Rolling summary of older exchanges in the agents' model contexts
+from src.services.conversation_history import schedule_conversation_compaction
+
 # Import Agent Name
 from src.agents.agent_names import (
     HUBSPOT_AGENT_NAME,
@@ -53,6 +82,10 @@ from config import (
     LLM_PRIMARY_MODEL_FAMILY,
     LLM_SECONDARY_MODEL_NAME,
     LLM_SECONDARY_MODEL_FAMILY,
+    KB_ANSWER_CACHE_ENABLED,
+    CONV_HISTORY_SUMMARIZATION,
+    FAST_PATH_ROUTER_ENABLED,
+    PLANNER_MODULAR_PROMPT,
 )
 
 # Define AgentType alias for clarity
@@ -232,14 +265,174 @@ class AgentService:
         # Rule 4: Fallback - Let LLM decide (should be hit rarely now)
         return None
 
+    # --- Semantic Answer Cache ---
+    @staticmethod
+    async def _answer_from_cache(
+        group_chat: SelectorGroupChat, next_message: TextMessage
+    ) -> Optional[TaskResult]:
+        """
+        Answers the message with a cached validated answer (no LLM calls) and records the
+        exchange in the team's state. Returns None on a miss or if the cache can't be used.
+        """
+        try:
+            cached_answer = await lookup_cached_answer(next_message.content)
+            if not cached_answer:
+                return None
+
+            team_state = await group_chat.save_state()
+            if not append_exchange_to_state(team_state, next_message.content, cached_answer.answer):
+                log_message("Unexpected team state shape; skipping the answer cache.", log_type="warning")
+                return None
+            await group_chat.load_state(team_state)
+        except Exception as e:
+            log_message(f"Answer cache lookup failed, running the turn normally: {e}", log_type="warning")
+            return None
+
+        log_message(
+            f"Answered from cache (similarity {cached_answer.similarity:.3f}, "
+            f"saved {cached_answer.llm_calls} LLM calls).",
+            level=2,
+        )
+        return TaskResult(
+            messages=[
+                next_message,
+                TextMessage(content=cached_answer.answer, source=PLANNER_AGENT_NAME),
+            ],
+            stop_reason="Answered from the FAQ answer cache",
+        )
+
+    @staticmethod
+    def _record_fast_path_reply(
+        team_state: Dict, next_message: TextMessage, fast_path_reply: FastPathReply
+    ) -> Optional[TaskResult]:
+        """
+        Writes a fast-path answer (a direct tool call, no LLM) into a saved team state.
+        Returns None, leaving the state untouched, if the state doesn't have the expected shape.
+        """
+        if not append_exchange_to_state(team_state, next_message.content, fast_path_reply.reply):
+            log_message("Unexpected team state shape; skipping the fast path.", log_type="warning")
+            return None
+
+        log_message(
+            f"Answered via fast path ({fast_path_reply.intent}, confidence {fast_path_reply.confidence:.3f}, "
+            f"{fast_path_reply.elapsed_ms:.0f} ms).",
+            level=2,
+        )
+        return TaskResult(
+            messages=[
+                next_message,
+                TextMessage(content=fast_path_reply.reply, source=PLANNER_AGENT_NAME),
+            ],
+            stop_reason=f"Answered by the fast-path router ({fast_path_reply.intent})",
+        )
+
+    @staticmethod
+    async def _answer_from_fast_path(
+        group_chat: SelectorGroupChat, next_message: TextMessage, fast_path_reply: FastPathReply
+    ) -> Optional[TaskResult]:
+        """
+        Records a fast-path answer in a new team's state (a new conversation has no saved state
+        to write it into). Returns None if it can't be recorded.
+        """
+        try:
+            team_state = await group_chat.save_state()
+            task_result = AgentService._record_fast_path_reply(team_state, next_message, fast_path_reply)
+            if task_result is not None:
+                await group_chat.load_state(team_state)
+            return task_result
+        except Exception as e:
+            log_message(f"Could not record the fast-path answer, running the turn normally: {e}", log_type="warning")
+            return None
+
+    @staticmethod
+    async def _store_in_answer_cache(
+        user_message: str, task_result: TaskResult, retrieved_chunk_ids: Sequence[str]
+    ):
+        """Caches the turn's answer if it was a plain, successful knowledge-base answer."""
+        answer = get_cacheable_answer(task_result.messages)
+        if not answer or not retrieved_chunk_ids:
+            return
+        try:
+            await store_validated_answer(
+                user_message, answer, retrieved_chunk_ids, get_turn_usage(task_result.messages)
+            )
+        except Exception as e:
+            log_message(f"Could not store answer in the answer cache: {e}", log_type="warning")
+
+    @staticmethod
+    async def _create_group_chat(
+        conversation_id: str,
+        saved_state_dict: Optional[Dict],
+        planner_prompt_modules: Optional[FrozenSet[str]],
+        stream_progress: bool,
+    ) -> tuple[SelectorGroupChat, Optional[str]]:
+        """
+        Creates the agents and this request's group chat and loads the saved state into it.
+        Returns the group chat and an error message if the state couldn't be loaded (the chat
+        then starts fresh).
+        """
+        error_message = None
+        # Initialize all agents
+        planner_agent = await create_planner_agent(
+            AgentService.primary_model_client,
+            conversation_id,
+            stream_tokens=stream_progress,
+            prompt_modules=planner_prompt_modules,
+        )
+        sticker_you_agent = create_sticker_you_agent(
+            AgentService.secondary_model_client
+        )
+        live_product_agent = await create_live_product_agent(
+            AgentService.secondary_model_client
+        )
+        price_quote_agent = create_price_quote_agent(
+            AgentService.primary_model_client
+        )
+        hubspot_agent = await create_hubspot_agent(
+            AgentService.secondary_model_client, conversation_id
+        )
+        order_agent = create_order_agent(AgentService.secondary_model_client)
+
+        # --- Create GroupChat Instance for this request --- #
+        active_participants = [
+            planner_agent,
+            sticker_you_agent,
+            live_product_agent,
+            price_quote_agent,
+            hubspot_agent,
+            order_agent,
+        ]
+        group_chat = SelectorGroupChat(
+            participants=active_participants,
+            model_client=AgentService.primary_model_client,
+            termination_condition=AgentService.get_termination_condition(),
+            allow_repeated_speaker=False,
+            selector_func=AgentService.custom_speaker_selector,
+        )
+
+        # --- Load state into the NEW instance if it exists --- #
+        if saved_state_dict:
+            try:
+                await group_chat.load_state(saved_state_dict)
+            except Exception as load_err:
+                error_message = f"Error loading state into new chat instance for {conversation_id}: {load_err}. Starting fresh."
+                log_message(f"    - WARN: {error_message}", log_type="warning")
+                await group_chat.reset()  # Reset the new instance
+        return group_chat, error_message
+
     # Start or continue a chat session
     async def run_chat_session(
         self,
         user_message: str,
         show_console: bool = False,
         conversation_id: Optional[str] = None,
+        stream_progress: bool = False,
     ) -> tuple[Optional[TaskResult], Optional[str], Optional[str]]:
-        """Runs or continues a chat session using the SHARED group_chat instance and agents, handling state."""
+        """
+        Runs or continues a chat session using the SHARED group_chat instance and agents, handling state.
+        With `stream_progress`, agent/tool progress and the Planner's reply tokens are published
+        to the conversation's WebSocket while the turn runs.
+        """
         if (
             not AgentService._initialized
             or not AgentService.primary_model_client
@@ -258,70 +451,24 @@ class AgentService:
             None  # Will be instantiated per request
         )
         saved_state_dict: Optional[Dict] = None
+        stored_state: Optional[StoredConversationState] = None
 
         try:
             # --- Determine Conversation ID & Create Request Context --- #
             if not current_conversation_id:
                 current_conversation_id = str(uuid.uuid4())
             else:
-                # --- Attempt to Load State from Redis --- #
-                async with get_redis_client() as redis:
-                    # Prefix keys for good practice, e.g., "conv_state:<id>"
-                    redis_key = f"conv_state:{current_conversation_id}"
-                    saved_state_json = await redis.get(redis_key)
-                    if saved_state_json:
-                        saved_state_dict = json.loads(saved_state_json)
-                    else:
-                        # ID provided, but no state found - treat as new conversation with this ID
-                        log_message(
-                            f"<--- New conversation started with provided ID: {current_conversation_id} (no prior state found) --->",
-                            level=1,
-                        )
-                        saved_state_dict = None
-
-            # Initialize all agents
-            planner_agent = await create_planner_agent(
-                AgentService.primary_model_client, current_conversation_id
-            )
-            sticker_you_agent = create_sticker_you_agent(
-                AgentService.secondary_model_client
-            )
-            live_product_agent = await create_live_product_agent(
-                AgentService.secondary_model_client
-            )
-            price_quote_agent = create_price_quote_agent(
-                AgentService.primary_model_client
-            )
-            hubspot_agent = await create_hubspot_agent(
-                AgentService.secondary_model_client, current_conversation_id
-            )
-            order_agent = create_order_agent(AgentService.secondary_model_client)
-
-            # --- Create GroupChat Instance for this request --- #
-            active_participants = [
-                planner_agent,
-                sticker_you_agent,
-                live_product_agent,
-                price_quote_agent,
-                hubspot_agent,
-                order_agent,
-            ]
-            group_chat = SelectorGroupChat(
-                participants=active_participants,
-                model_client=AgentService.primary_model_client,
-                termination_condition=AgentService.get_termination_condition(),
-                allow_repeated_speaker=False,
-                selector_func=AgentService.custom_speaker_selector,
-            )
-
-            # --- Load state into the NEW instance if it exists --- #
-            if saved_state_dict:
-                try:
-                    await group_chat.load_state(saved_state_dict)
-                except Exception as load_err:
-                    error_message = f"Error loading state into new chat instance for {current_conversation_id}: {load_err}. Starting fresh."
-                    log_message(f"    - WARN: {error_message}", log_type="warning")
-                    await group_chat.reset()  # Reset the new instance
+                # --- Attempt to Load State from Redis (snapshot + delta log) --- #
+                stored_state = await load_conversation_state(current_conversation_id)
+                if stored_state:
+                    saved_state_dict = stored_state.state
+                else:
+                    # ID provided, but no state found - treat as new conversation with this ID
+                    log_message(
+                        f"<--- New conversation started with provided ID: {current_conversation_id} (no prior state found) --->",
+                        level=1,
+                    )
+                    saved_state_dict = None
 
             # --- Prepare the next message --- #
             # The user_message represents the *next* input in the conversation
@@ -333,30 +480,83 @@ class AgentService:
 
             cancellation_token = CancellationToken()
 
-            # Run the chat - use run() for API flow, run_stream() wrapped in Console for terminal
-            if show_console:
-                task_result = await Console(
-                    group_chat.run_stream(
-                        task=next_message, cancellation_token=cancellation_token
-                    )
+            # --- Answer obvious simple intents (order status, handoff, countries) directly --- #
+            # Routed before the agents are created: a hit in an ongoing conversation is written
+            # straight into its saved state, so the team is only built when it's needed.
+            fast_path_reply = None
+            fast_path_state: Optional[Dict] = None
+            if FAST_PATH_ROUTER_ENABLED:
+                fast_path_reply = await route_message(
+                    next_message.content, current_conversation_id, saved_state_dict
                 )
-            else:
-                # Run the chat. The `next_message` kicks off the next round.
-                task_result = await group_chat.run(
-                    task=next_message, cancellation_token=cancellation_token
+            if fast_path_reply and saved_state_dict:
+                # The loaded state is shared with the local state cache, so write into a copy
+                fast_path_state = copy.deepcopy(saved_state_dict)
+                task_result = AgentService._record_fast_path_reply(
+                    fast_path_state, next_message, fast_path_reply
+                )
+
+            if task_result is None:
+                planner_prompt_modules = (
+                    detect_prompt_modules(user_message, saved_state_dict) if PLANNER_MODULAR_PROMPT else None
                 )
+                group_chat, error_message = await AgentService._create_group_chat(
+                    current_conversation_id, saved_state_dict, planner_prompt_modules, stream_progress
+                )
+                if fast_path_reply and not saved_state_dict:
+                    task_result = await AgentService._answer_from_fast_path(
+                        group_chat, next_message, fast_path_reply
+                    )
+
+            # --- Answer repeated FAQ questions from the semantic cache --- #
+            # Only a conversation's opening question is cached: later turns depend on the context.
+            use_answer_cache = KB_ANSWER_CACHE_ENABLED and not saved_state_dict
+            if use_answer_cache and task_result is None:
+                task_result = await AgentService._answer_from_cache(group_chat, next_message)
+
+            if task_result is None:
+                record_prompt_modules(planner_prompt_modules)
+                turn_start_time = time.perf_counter()
+                # Run the chat - use run() for API flow, run_stream() wrapped in Console for terminal
+                # and run_stream() relayed to the WebSocket when streaming progress.
+                # Concurrent updates to the same ticket during the turn are merged into one PATCH.
+                with track_retrieved_chunks() as retrieved_chunk_ids:
+                    async with ticket_write_buffer():
+                        if show_console or stream_progress:
+                            stream = group_chat.run_stream(
+                                task=next_message, cancellation_token=cancellation_token
+                            )
+                            if stream_progress:
+                                stream = AgentProgressPublisher(current_conversation_id).relay(stream)
+
+                            if show_console:
+                                task_result = await Console(stream)
+                            else:
+                                async for item in stream:
+                                    if isinstance(item, TaskResult):
+                                        task_result = item
+                        else:
+                            # Run the chat. The `next_message` kicks off the next round.
+                            task_result = await group_chat.run(
+                                task=next_message, cancellation_token=cancellation_token
+                            )
+
+                record_planner_turn((time.perf_counter() - turn_start_time) * 1000)
+
+                if use_answer_cache and task_result:
+                    await AgentService._store_in_answer_cache(user_message, task_result, retrieved_chunk_ids)
 
             # --- Save State to Redis --- #
-            final_state_dict = await group_chat.save_state()
-            async with get_redis_client() as redis:
-                redis_key = f"conv_state:{current_conversation_id}"
-                # Serialize the state dictionary to a JSON string
-                final_state_json = json.dumps(final_state_dict, default=json_serializer_default)
-                # Save to Redis with an expiration time
-                # This prevents old conversations from cluttering Redis forever.
-                await redis.set(
-                    redis_key, final_state_json, ex=86400
-                )  # 86400 seconds = 24 hours
+            # Only the changes since the loaded state are appended (periodically snapshotted).
+            # Keys expire after CONV_STATE_TTL_SECONDS so old conversations don't clutter Redis forever.
+            final_state_dict = (
+                await group_chat.save_state() if group_chat is not None else fast_path_state
+            )
+            await save_conversation_state(current_conversation_id, final_state_dict, base=stored_state)
+            # Older exchanges are folded into a summary so the restored contexts stay bounded.
+            # Runs in the background, so the summarizer calls don't delay the reply.
+            if CONV_HISTORY_SUMMARIZATION and AgentService.secondary_model_client:
+                schedule_conversation_compaction(current_conversation_id, AgentService.secondary_model_client)
 
         except Exception as e:
             error_message = f"Error during AutoGen task execution: {e}"
@@ -14,13 +14,19 @@ from src.agents.hubspot.system_message import HUBSPOT_AGENT_SYSTEM_MESSAGE
 from src.agents.agent_names import HUBSPOT_AGENT_NAME
 
 # Conversation and Ticket Tools
-from src.tools.hubspot.conversation.conversation_tools import send_message_to_thread, get_thread_details
+from src.tools.hubspot.conversation.conversation_tools import send_message_to_thread
 from src.tools.hubspot.tickets.ticket_tools import (
     update_ticket,
     move_ticket_to_human_assistance_pipeline,
 )
 from src.tools.hubspot.tickets.dto_responses import TicketDetailResponse
 
+# Cached conversation metadata (thread -> ticket, inbox, contact)
+from src.services.hubspot.conversation_metadata import (
+    get_conversation_metadata,
+    TICKET_ID_FIELD,
+)
+
 # Config imports for default values
 from config import (
     HUBSPOT_DEFAULT_SENDER_ACTOR_ID,
@@ -74,22 +80,18 @@ async def create_hubspot_agent(
         )
     )
 
-    # Look up and add associated ticket ID to memory
+    # Look up and add associated ticket ID to memory (served from the Redis cache when possible)
     try:
-        thread_details = await get_thread_details(thread_id=conversation_id)
-        if not isinstance(thread_details, str):
-            if (hasattr(thread_details, 'threadAssociations') and 
-                thread_details.threadAssociations and 
-                thread_details.threadAssociations.associatedTicketId):
-                
-                ticket_id = thread_details.threadAssociations.associatedTicketId
-                await memory.add(
-                    MemoryContent(
-                        content=f"Associated_HubSpot_Ticket_ID: {ticket_id}",
-                        mime_type=MemoryMimeType.TEXT,
-                        metadata={"priority": "critical", "source": "hubspot_ticket"},
-                    )
+        conversation_metadata = await get_conversation_metadata(conversation_id)
+        if conversation_metadata and conversation_metadata.get(TICKET_ID_FIELD):
+            ticket_id = conversation_metadata[TICKET_ID_FIELD]
+            await memory.add(
+                MemoryContent(
+                    content=f"Associated_HubSpot_Ticket_ID: {ticket_id}",
+                    mime_type=MemoryMimeType.TEXT,
+                    metadata={"priority": "critical", "source": "hubspot_ticket"},
                 )
+            )
     except Exception as e:
         # If we can't get the ticket ID, continue without it
         # The agent can still function for other operations
@@ -3,7 +3,7 @@
 # /src/agents/planner/planner_agent.py
 
 # --- Standard Library Imports ---
-from typing import Optional, List
+from typing import Iterable, Optional, List
 
 # --- Third Party Imports ---
 from autogen_agentchat.agents import AssistantAgent
@@ -11,7 +11,10 @@ from autogen_core.memory import Memory, ListMemory, MemoryContent, MemoryMimeTyp
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 
 # --- First Party Imports ---
-from src.agents.planner.system_message import PLANNER_ASSISTANT_SYSTEM_MESSAGE
+from src.agents.planner.system_message import (
+    PLANNER_ASSISTANT_SYSTEM_MESSAGE,
+    build_planner_system_message,
+)
 
 # Import Agent Name
 from src.agents.agent_names import PLANNER_AGENT_NAME
@@ -20,7 +23,10 @@ from src.services.time_service import is_business_hours
 
 # --- Agent Creation Function ---
 async def create_planner_agent(
-    model_client: OpenAIChatCompletionClient, conversation_id: str
+    model_client: OpenAIChatCompletionClient,
+    conversation_id: str,
+    stream_tokens: bool = False,
+    prompt_modules: Optional[Iterable[str]] = None,
 ) -> AssistantAgent:
     """
     Creates and configures the Planner Assistant Agent with conversation-specific memory.
@@ -28,6 +34,9 @@ async def create_planner_agent(
     Args:
         model_client: An initialized OpenAIChatCompletionClient instance.
         conversation_id: The current HubSpot conversation/thread ID.
+        stream_tokens: If True, the reply is also emitted as streaming chunk events.
+        prompt_modules: Workflow modules to attach to the core system message. If None,
+            the full (monolithic) system message is used.
 
     Returns:
         A configured AssistantAgent instance.
@@ -52,13 +61,20 @@ async def create_planner_agent(
         )
     )
 
+    system_message = (
+        PLANNER_ASSISTANT_SYSTEM_MESSAGE
+        if prompt_modules is None
+        else build_planner_system_message(prompt_modules)
+    )
+
     planner_assistant = AssistantAgent(
         name=PLANNER_AGENT_NAME,
         description="The orchestrator. It coordinates between the StickerYou_Agent (for website/product info & FAQs), Live_Product_Agent (for live product IDs & countries), Price_Quote_Agent, HubSpot_Agent, and Order_Agent. It communicates with the User_Proxy_Agent to interact with the user.",
-        system_message=PLANNER_ASSISTANT_SYSTEM_MESSAGE,
+        system_message=system_message,
         model_client=model_client,
         memory=[memory],
         # tools=[end_planner_turn], # Tool is available via function calling in the new AutoGen versions
         reflect_on_tool_use=False,
+        model_client_stream=stream_tokens,
     )
     return planner_assistant
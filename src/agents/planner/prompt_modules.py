@@ -0,0 +1,202 @@
+"""
+Selects the Planner prompt modules for a turn and reports their token budget. The workflow
+modules attached are those of the current message (keyword rules) and of the conversation's
+ongoing phase, read from the Planner's recent exchanges in the saved state (its delegations
+and the specialists' signals, e.g. an open custom quote or a pending handoff offer).
+"""
+
+# /src/agents/planner/prompt_modules.py
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.agents.agent_names import PLANNER_AGENT_NAME, USER_PROXY_AGENT_NAME
+from src.agents.planner.system_message import (
+    PLANNER_ASSISTANT_SYSTEM_MESSAGE,
+    PLANNER_MODULE_CUSTOM_QUOTE,
+    PLANNER_MODULE_DEV_MODE,
+    PLANNER_MODULE_HANDOFF,
+    PLANNER_MODULE_ORDER_STATUS,
+    PLANNER_MODULE_QUICK_QUOTE,
+    PLANNER_PROMPT_CORE,
+    PLANNER_PROMPT_MODULAR_NOTE,
+    PLANNER_PROMPT_MODULES,
+    PLANNER_PROMPT_SECTIONS,
+)
+from src.agents.price_quote.instructions_constants import (
+    PLANNER_ASK_USER,
+    PLANNER_VALIDATION_SUCCESSFUL_PROCEED_TO_TICKET,
+)
+from src.services.token_counter import count_tokens
+
+# Planner exchanges (a user message and everything that followed it) that define the phase
+RECENT_EXCHANGES = 2
+
+# Multi-turn workflows; while one is in the recent exchanges the next message belongs to it
+OPEN_WORKFLOW_MODULES = frozenset({PLANNER_MODULE_QUICK_QUOTE, PLANNER_MODULE_CUSTOM_QUOTE, PLANNER_MODULE_HANDOFF})
+
+# --- Rules on what the user wrote ---
+_MESSAGE_RULES: Tuple[Tuple[str, re.Pattern], ...] = (
+    (
+        PLANNER_MODULE_QUICK_QUOTE,
+        re.compile(
+            r"\b(price|prices|pricing|cost|costs|how much|quote|cheap|cheaper|discount|compare)\b"
+            r"|\b\d+(\.\d+)?\s*(x|by)\s*\d+|\b\d+\s*(stickers|labels|decals|magnets|tattoos|pieces|pcs|units|rolls|sheets)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        PLANNER_MODULE_CUSTOM_QUOTE,
+        re.compile(r"\b(custom quote|special quote|bulk|wholesale|non[- ]standard|special (size|shape|material))\b", re.IGNORECASE),
+    ),
+    (
+        PLANNER_MODULE_ORDER_STATUS,
+        # Same vocabulary as the fast-path router, plus bare order IDs
+        re.compile(
+            r"\b(order|orders|tracking|track|shipped|shipping status|shipment|package|delivery|delivered)\b"
+            r"|\b([A-Za-z]{2,5}\d{4,8}|\d{5,25})\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        PLANNER_MODULE_HANDOFF,
+        re.compile(
+            r"\b(human|person|someone|somebody|representative|operator|customer service|support team)\b"
+            r"|\b(complain|complaint|terrible|awful|unhappy|disappointed|frustrated|refund|damaged|faded|broken|wrong)\b",
+            re.IGNORECASE,
+        ),
+    ),
+)
+
+# --- Markers (case-insensitive) in the Planner's recent delegations, replies and the specialists' answers ---
+_CONTEXT_MARKERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (PLANNER_MODULE_QUICK_QUOTE, ("Find ID for", "sy_get_specific_price", "sy_get_price_tiers")),
+    (
+        PLANNER_MODULE_CUSTOM_QUOTE,
+        ("custom quote", "special quote", PLANNER_ASK_USER, PLANNER_VALIDATION_SUCCESSFUL_PROCEED_TO_TICKET),
+    ),
+    (PLANNER_MODULE_ORDER_STATUS, ("get_unified_order_status", "order ID", "order number")),
+    (PLANNER_MODULE_HANDOFF, ("move_ticket_to_human_assistance_pipeline", "TASK FAILED", "support ticket", "email address")),
+)
+
+# --- Counters reported by `get_planner_prompt_stats` (per worker) ---
+_prompt_stats: Dict[str, int] = {
+    "turns": 0,
+    "modular_turns": 0,
+    "prompt_tokens_total": 0,
+    "monolithic_tokens_total": 0,
+}
+_module_turns: Counter = Counter()
+
+
+def _message_rule_modules(text: str) -> List[str]:
+    return [module for module, pattern in _MESSAGE_RULES if pattern.search(text)]
+
+
+def _recent_planner_messages(team_state: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The Planner's model-context messages of its last RECENT_EXCHANGES exchanges."""
+    container_state = ((team_state or {}).get("agent_states") or {}).get(PLANNER_AGENT_NAME)
+    if not isinstance(container_state, dict):
+        return []
+    llm_context = (container_state.get("agent_state") or {}).get("llm_context") or {}
+    messages = llm_context.get("messages") if isinstance(llm_context, dict) else None
+    if not isinstance(messages, list):
+        return []
+
+    exchange_starts = [
+        position
+        for position, message in enumerate(messages)
+        if message.get("type") == "UserMessage" and message.get("source") == USER_PROXY_AGENT_NAME
+    ]
+    if len(exchange_starts) > RECENT_EXCHANGES:
+        return messages[exchange_starts[-RECENT_EXCHANGES]:]
+    return messages
+
+
+def detect_prompt_modules(user_message: str, team_state: Optional[Dict[str, Any]] = None) -> FrozenSet[str]:
+    """
+    Detects the workflow modules the Planner needs for this turn.
+
+    Args:
+        user_message: The user's new message.
+        team_state: The saved group-chat state of the conversation (None for a new one).
+
+    Returns:
+        The names of the workflow modules to attach to the core prompt.
+    """
+    modules = set(_message_rule_modules(user_message))
+    if user_message.strip().startswith("-dev"):
+        modules.add(PLANNER_MODULE_DEV_MODE)
+    # Keep the modules of the phase the conversation is in
+    modules.update(detect_phase_modules(team_state))
+    return frozenset(modules)
+
+
+def detect_phase_modules(team_state: Optional[Dict[str, Any]]) -> FrozenSet[str]:
+    """The workflow modules of the conversation's ongoing phase, read from the Planner's recent exchanges."""
+    modules = set()
+    for message in _recent_planner_messages(team_state):
+        content = message.get("content")
+        text = content if isinstance(content, str) else str(content)
+        lowered = text.lower()
+        if message.get("type") == "UserMessage" and message.get("source") == USER_PROXY_AGENT_NAME:
+            modules.update(_message_rule_modules(text))
+            if text.strip().startswith("-dev"):
+                modules.add(PLANNER_MODULE_DEV_MODE)
+            continue
+        modules.update(
+            module for module, markers in _CONTEXT_MARKERS if any(marker.lower() in lowered for marker in markers)
+        )
+    return frozenset(modules)
+
+
+def get_open_workflows(team_state: Optional[Dict[str, Any]]) -> FrozenSet[str]:
+    """The multi-turn workflows (quotes, handoff) the conversation is in the middle of, if any."""
+    return detect_phase_modules(team_state) & OPEN_WORKFLOW_MODULES
+
+
+@lru_cache(maxsize=1)
+def get_planner_prompt_budget() -> Dict[str, int]:
+    """Tokens of the monolithic Planner prompt, of the core (always sent) and of each workflow module."""
+    texts: Dict[str, List[str]] = {}
+    for module, text in PLANNER_PROMPT_SECTIONS:
+        # The modular note is sent with the core whenever the prompt is modular
+        texts.setdefault(PLANNER_PROMPT_CORE if module == PLANNER_PROMPT_MODULAR_NOTE else module, []).append(text)
+    return {
+        "monolithic": count_tokens(PLANNER_ASSISTANT_SYSTEM_MESSAGE),
+        **{module: count_tokens("".join(texts[module])) for module in (PLANNER_PROMPT_CORE, *PLANNER_PROMPT_MODULES)},
+    }
+
+
+def count_prompt_tokens(modules: Optional[Iterable[str]]) -> int:
+    """Approximate tokens of the Planner prompt built with these modules (None = monolithic)."""
+    budget = get_planner_prompt_budget()
+    if modules is None:
+        return budget["monolithic"]
+    return budget[PLANNER_PROMPT_CORE] + sum(budget[module] for module in set(modules))
+
+
+def record_prompt_modules(modules: Optional[FrozenSet[str]]):
+    """Records the Planner prompt used for a turn (None = the monolithic prompt)."""
+    _prompt_stats["turns"] += 1
+    _prompt_stats["prompt_tokens_total"] += count_prompt_tokens(modules)
+    _prompt_stats["monolithic_tokens_total"] += get_planner_prompt_budget()["monolithic"]
+    if modules is not None:
+        _prompt_stats["modular_turns"] += 1
+        _module_turns.update(modules)
+
+
+def get_planner_prompt_stats() -> Dict[str, Any]:
+    """Token budget per module, modules attached per turn and the prompt tokens saved on this worker."""
+    turns = _prompt_stats["turns"]
+    saved = _prompt_stats["monolithic_tokens_total"] - _prompt_stats["prompt_tokens_total"]
+    return {
+        **_prompt_stats,
+        "budget_tokens": get_planner_prompt_budget(),
+        "turns_by_module": dict(_module_turns),
+        # The system message is sent on every Planner call of a turn, so these are per call
+        "avg_prompt_tokens": round(_prompt_stats["prompt_tokens_total"] / turns, 1) if turns else 0.0,
+        "avg_tokens_saved_per_call": round(saved / turns, 1) if turns else 0.0,
+        "saved_ratio": round(saved / _prompt_stats["monolithic_tokens_total"], 4) if turns else 0.0,
+    }
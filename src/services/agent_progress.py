@@ -0,0 +1,183 @@
+"""
+Publishes live agent progress for a conversation over its WebSocket while a turn runs:
+which specialist is working, tool calls starting/finishing and the Planner's reply as it
+is generated. Events are JSON strings sent next to the START/STOP processing signals.
+"""
+
+# /src/services/agent_progress.py
+import json
+import re
+import time
+from typing import AsyncGenerator, List, Optional, Union
+
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import (
+    BaseAgentEvent,
+    BaseChatMessage,
+    ModelClientStreamingChunkEvent,
+    TextMessage,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+)
+
+from src.agents.agent_names import (
+    HUBSPOT_AGENT_NAME,
+    LIVE_PRODUCT_AGENT_NAME,
+    ORDER_AGENT_NAME,
+    PLANNER_AGENT_NAME,
+    PRICE_QUOTE_AGENT_NAME,
+    STICKER_YOU_AGENT_NAME,
+    USER_PROXY_AGENT_NAME,
+)
+from src.services.logger_config import log_message
+from src.services.websocket_manager import manager
+
+# --- WebSocket Progress Event Types ---
+WS_EVT_AGENT_WORKING = "AGENT_WORKING"  # {"agent"}
+WS_EVT_TOOL_STARTED = "TOOL_STARTED"  # {"agent", "tool"}
+WS_EVT_TOOL_FINISHED = "TOOL_FINISHED"  # {"agent", "tool", "is_error"}
+WS_EVT_REPLY_DELTA = "REPLY_DELTA"  # {"text"} - next piece of the user-facing reply
+WS_EVT_REPLY_RESET = "REPLY_RESET"  # {} - discard the partial reply (it turned out to be a delegation)
+
+SPECIALIST_AGENT_NAMES = {
+    PRICE_QUOTE_AGENT_NAME,
+    STICKER_YOU_AGENT_NAME,
+    LIVE_PRODUCT_AGENT_NAME,
+    HUBSPOT_AGENT_NAME,
+    ORDER_AGENT_NAME,
+}
+
+# Same delegation pattern the speaker selector uses on Planner messages
+DELEGATION_TAG_PATTERN = re.compile(r"<(\w+?)>")
+
+# Reply deltas are sent at most this often; the tokens streamed in between are merged
+REPLY_DELTA_INTERVAL_SECONDS = 0.075
+
+# Prefixes removed by `clean_agent_output` before the reply reaches the user
+REPLY_STATUS_PREFIXES = ("TASK COMPLETE:", "TASK FAILED:")
+
+StreamItem = Union[BaseAgentEvent, BaseChatMessage, TaskResult]
+
+
+def visible_reply_text(raw_reply: str) -> str:
+    """
+    Returns the part of a (possibly partial) Planner reply that can be shown to the user.
+    Nothing is shown while the text could still be a status prefix or starts with a tag,
+    and the text stops at the first tag (delegation, `<User_Proxy_Agent>`, quick replies).
+    """
+    text = raw_reply.lstrip()
+    if text.startswith("<"):
+        return ""
+
+    for prefix in REPLY_STATUS_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):].lstrip()
+            break
+        if prefix.startswith(text):
+            return ""  # Still ambiguous, wait for more tokens
+
+    tag_start = text.find("<")
+    if tag_start != -1:
+        text = text[:tag_start]
+    return text
+
+
+class AgentProgressPublisher:
+    """
+    Translates the events of one `run_stream` into WebSocket progress events. The workers
+    holding the conversation's sockets are looked up once per turn, and reply tokens are
+    sent in deltas at most every REPLY_DELTA_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self._current_agent: Optional[str] = None
+        self._reply_buffer = ""
+        self._streamed_reply = ""
+        self._pending_delta = ""
+        self._delta_sent = False
+        self._last_delta_time = 0.0
+        self._remote_workers: Optional[List[str]] = None
+
+    async def relay(self, stream: AsyncGenerator[StreamItem, None]) -> AsyncGenerator[StreamItem, None]:
+        """Yields every item of the stream unchanged, publishing progress along the way."""
+        async for item in stream:
+            try:
+                if isinstance(item, TaskResult):
+                    await self._flush_reply_delta()
+                else:
+                    await self.publish_event(item)
+            except Exception as e:
+                log_message(f"Failed to publish agent progress for {self.conversation_id}: {e}", level=3, log_type="warning")
+            yield item
+
+    async def publish_event(self, event: Union[BaseAgentEvent, BaseChatMessage]):
+        """Publishes the progress events (if any) for a single stream item."""
+        if isinstance(event, ModelClientStreamingChunkEvent):
+            if event.source == PLANNER_AGENT_NAME:
+                await self._publish_reply_chunk(event.content)
+            return
+
+        if isinstance(event, ToolCallRequestEvent):
+            await self._set_current_agent(event.source)
+            for call in event.content:
+                await self._send(WS_EVT_TOOL_STARTED, agent=event.source, tool=call.name)
+            return
+
+        if isinstance(event, ToolCallExecutionEvent):
+            for result in event.content:
+                await self._send(WS_EVT_TOOL_FINISHED, agent=event.source, tool=result.name, is_error=result.is_error)
+            return
+
+        if isinstance(event, TextMessage):
+            if event.source == USER_PROXY_AGENT_NAME or event.source in SPECIALIST_AGENT_NAMES:
+                # The Planner always handles what comes back
+                await self._set_current_agent(PLANNER_AGENT_NAME)
+            elif event.source == PLANNER_AGENT_NAME:
+                await self._finish_planner_message(event.content)
+
+    # --- Internal helpers ---
+    async def _publish_reply_chunk(self, chunk: str):
+        self._reply_buffer += chunk
+        visible = visible_reply_text(self._reply_buffer)
+        if len(visible) > len(self._streamed_reply):
+            self._pending_delta += visible[len(self._streamed_reply):]
+            self._streamed_reply = visible
+            if time.monotonic() - self._last_delta_time >= REPLY_DELTA_INTERVAL_SECONDS:
+                await self._flush_reply_delta()
+
+    async def _flush_reply_delta(self):
+        if self._pending_delta:
+            delta, self._pending_delta = self._pending_delta, ""
+            self._delta_sent = True
+            self._last_delta_time = time.monotonic()
+            await self._send(WS_EVT_REPLY_DELTA, text=delta)
+
+    async def _finish_planner_message(self, content: str):
+        match = DELEGATION_TAG_PATTERN.search(content or "")
+        delegated_agent = match.group(1) if match else None
+        if delegated_agent in SPECIALIST_AGENT_NAMES:
+            self._pending_delta = ""
+            if self._delta_sent:
+                await self._send(WS_EVT_REPLY_RESET)
+            await self._set_current_agent(delegated_agent)
+        else:
+            await self._flush_reply_delta()
+        self._reply_buffer = ""
+        self._streamed_reply = ""
+        self._delta_sent = False
+
+    async def _set_current_agent(self, agent_name: str):
+        if agent_name != self._current_agent:
+            self._current_agent = agent_name
+            await self._send(WS_EVT_AGENT_WORKING, agent=agent_name)
+
+    async def _send(self, event_type: str, **fields):
+        if manager is None:
+            return
+        if self._remote_workers is None:
+            # One presence lookup per turn (a socket reconnecting elsewhere mid-turn gets the next turn)
+            self._remote_workers = await manager.get_remote_workers(self.conversation_id)
+        await manager.send_message(
+            json.dumps({"type": event_type, **fields}), self.conversation_id, remote_workers=self._remote_workers
+        )
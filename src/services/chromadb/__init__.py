@@ -4,12 +4,54 @@ from .custom_embedding_function import ModernBertEmbeddingFunction
 from .client_manager import (
     initialize_chroma_client,
     get_chroma_collection,
+    get_embedding_function,
+    warm_up_chroma_collection,
+    get_chroma_readiness,
     close_chroma_client,
 )
+from .embedding_batcher import (
+    EmbeddingBatcher,
+    embed_query,
+    get_embedding_batcher_stats,
+)
+from .bm25_index import BM25Index, get_bm25_index
+from .hybrid_search import hybrid_query, reciprocal_rank_fusion
+from .ingestion import ingest_documents, iter_source_documents, chunk_text
+from .query_embedding_cache import (
+    get_query_embedding,
+    get_query_embedding_cache_stats,
+    clear_query_embedding_cache,
+)
+from .retrieval_executor import (
+    initialize_retrieval_executor,
+    run_retrieval,
+    get_retrieval_executor_stats,
+    close_retrieval_executor,
+)
 
 __all__ = [
     "ModernBertEmbeddingFunction",
     "initialize_chroma_client",
     "get_chroma_collection", 
+    "get_embedding_function",
+    "warm_up_chroma_collection",
+    "get_chroma_readiness",
     "close_chroma_client",
+    "EmbeddingBatcher",
+    "embed_query",
+    "get_embedding_batcher_stats",
+    "BM25Index",
+    "get_bm25_index",
+    "hybrid_query",
+    "reciprocal_rank_fusion",
+    "ingest_documents",
+    "iter_source_documents",
+    "chunk_text",
+    "get_query_embedding",
+    "get_query_embedding_cache_stats",
+    "clear_query_embedding_cache",
+    "initialize_retrieval_executor",
+    "run_retrieval",
+    "get_retrieval_executor_stats",
+    "close_retrieval_executor",
 ]
@@ -0,0 +1,321 @@
+"""
+Semantic cache of validated FAQ answers. A question whose embedding is close enough to a
+cached question (cosine similarity >= KB_ANSWER_CACHE_SIMILARITY) is answered with the
+stored Planner reply, skipping every LLM call of the turn. Each entry remembers the KB
+chunk IDs its answer came from and is dropped when any of them is re-ingested.
+The question vectors are kept in an in-process matrix, reloaded from Redis only when the
+cache's version counter (bumped on every store/delete) changes.
+"""
+
+# /src/services/chromadb/answer_cache.py
+import base64
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from autogen_agentchat.messages import (
+    BaseAgentEvent,
+    BaseChatMessage,
+    TextMessage,
+    ToolCallRequestEvent,
+    ToolCallSummaryMessage,
+)
+
+import config
+from src.agents.agent_names import PLANNER_AGENT_NAME, STICKER_YOU_AGENT_NAME, USER_PROXY_AGENT_NAME
+from src.services.logger_config import log_message
+from src.services.redis_client import get_redis_client
+from .query_embedding_cache import get_query_embedding
+
+# Define the keys we will use in Redis
+ANSWER_CACHE_ENTRIES_KEY = "kb:answer_cache:entries"  # Hash: entry ID -> JSON entry
+ANSWER_CACHE_EMBEDDINGS_KEY = "kb:answer_cache:embeddings"  # Hash: entry ID -> base64 float32 vector
+ANSWER_CACHE_CREATED_KEY = "kb:answer_cache:created"  # Sorted set: entry ID by creation time
+ANSWER_CACHE_CHUNK_KEY_PREFIX = "kb:answer_cache:chunk:"  # Set per chunk ID: entry IDs using it
+ANSWER_CACHE_VERSION_KEY = "kb:answer_cache:version"  # Counter: bumped whenever entries are added or removed
+
+# Only answers built from the knowledge base alone are cached
+CACHEABLE_TOOL_NAMES = {"query_knowledge_base"}
+
+# --- Counters reported by `get_answer_cache_stats` (per worker) ---
+_cache_stats: Dict[str, int] = {
+    "lookups": 0,
+    "hits": 0,
+    "stored": 0,
+    "invalidated": 0,
+    "saved_llm_calls": 0,
+    "saved_prompt_tokens": 0,
+    "saved_completion_tokens": 0,
+    "matrix_reloads": 0,
+}
+
+# --- In-process copy of the question vectors, valid for `_vectors_version` ---
+_vectors_version: Optional[str] = None
+_vector_entry_ids: List[str] = []
+_vector_matrix: Optional[np.ndarray] = None
+
+
+@dataclass
+class CachedAnswer:
+    entry_id: str
+    question: str
+    answer: str  # Raw Planner reply (tags and quick replies included)
+    chunk_ids: List[str]
+    similarity: float
+    llm_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def _chunk_key(chunk_id: str) -> str:
+    return f"{ANSWER_CACHE_CHUNK_KEY_PREFIX}{chunk_id}"
+
+
+async def _embed_question(question: str) -> np.ndarray:
+    # Same query path as the KB tool, so the query-embedding cache is shared
+    embedding = await get_query_embedding(f"search_query: {question}")
+    return np.asarray(embedding, dtype=np.float32)
+
+
+# --- Turn validation ---
+def get_turn_usage(messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> Dict[str, int]:
+    """Number of model calls and tokens spent in a turn (from the messages' usage records)."""
+    usage = {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for message in messages:
+        if message.models_usage:
+            usage["llm_calls"] += 1
+            usage["prompt_tokens"] += message.models_usage.prompt_tokens
+            usage["completion_tokens"] += message.models_usage.completion_tokens
+    return usage
+
+
+def _is_knowledge_base_result(message: BaseAgentEvent | BaseChatMessage) -> bool:
+    """
+    Whether the message is the StickerYou_Agent's tool summary (it doesn't reflect on tool use)
+    holding knowledge-base results: every result from a cacheable tool, not an error and not empty.
+    """
+    if not isinstance(message, ToolCallSummaryMessage) or message.source != STICKER_YOU_AGENT_NAME or not message.results:
+        return False
+    for result in message.results:
+        if result.name not in CACHEABLE_TOOL_NAMES or result.is_error:
+            return False
+        try:
+            chunks = json.loads(result.content)
+        except (TypeError, ValueError):
+            return False
+        # The tool returns [] when nothing matched and [{"error": ...}] when the query failed
+        if not isinstance(chunks, list) or not chunks or any(isinstance(chunk, dict) and "error" in chunk for chunk in chunks):
+            return False
+    return True
+
+
+def get_cacheable_answer(messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+    """
+    Returns the Planner's final reply if the turn is a plain FAQ answer: only the Planner and
+    the StickerYou_Agent took part, the only tool used was the knowledge base, it returned
+    results and the Planner answered the user. Returns None otherwise.
+    """
+    if not messages:
+        return None
+
+    specialist_succeeded = False
+    for message in messages:
+        if message.source not in (USER_PROXY_AGENT_NAME, PLANNER_AGENT_NAME, STICKER_YOU_AGENT_NAME):
+            return None
+        if isinstance(message, ToolCallRequestEvent):
+            if any(call.name not in CACHEABLE_TOOL_NAMES for call in message.content):
+                return None
+        if _is_knowledge_base_result(message):
+            specialist_succeeded = True
+
+    final_message = messages[-1]
+    if (
+        not specialist_succeeded
+        or not isinstance(final_message, TextMessage)
+        or final_message.source != PLANNER_AGENT_NAME
+        or f"<{USER_PROXY_AGENT_NAME}>" not in final_message.content
+        or "TASK FAILED" in final_message.content
+    ):
+        return None
+    return final_message.content
+
+
+def append_exchange_to_state(team_state: Dict[str, Any], user_message: str, answer: str) -> bool:
+    """
+    Writes a question/answer exchange into a saved SelectorGroupChat state as if the Planner
+    had answered it in a normal turn, so the conversation continues with that context.
+    Returns False (leaving the state untouched) if the state doesn't have the expected shape.
+    """
+    agent_states = team_state.get("agent_states")
+    if not isinstance(agent_states, dict):
+        return False
+    manager_name = next((name for name, state in agent_states.items() if "message_thread" in state), None)
+    planner_state = agent_states.get(PLANNER_AGENT_NAME)
+    if (
+        manager_name is None
+        or not isinstance(planner_state, dict)
+        or planner_state.get("message_buffer")
+        or "messages" not in planner_state.get("agent_state", {}).get("llm_context", {})
+    ):
+        return False
+
+    exchange = [
+        TextMessage(content=user_message, source=USER_PROXY_AGENT_NAME).dump(),
+        TextMessage(content=answer, source=PLANNER_AGENT_NAME).dump(),
+    ]
+    manager_state = agent_states[manager_name]
+    manager_state["message_thread"].extend(exchange)
+    manager_state["current_turn"] = manager_state.get("current_turn", 0) + 1
+    manager_state["previous_speaker"] = PLANNER_AGENT_NAME
+
+    # The Planner consumed the question and produced the answer; everyone else only saw both
+    planner_state["agent_state"]["llm_context"]["messages"].extend([
+        {"type": "UserMessage", "content": user_message, "source": USER_PROXY_AGENT_NAME},
+        {"type": "AssistantMessage", "content": answer, "source": PLANNER_AGENT_NAME},
+    ])
+    for name, state in agent_states.items():
+        if name not in (manager_name, PLANNER_AGENT_NAME) and "message_buffer" in state:
+            state["message_buffer"].extend(exchange)
+    return True
+
+
+# --- Cache operations ---
+async def _get_vector_matrix(redis) -> Tuple[List[str], Optional[np.ndarray]]:
+    """The entry IDs and question vectors, re-read from Redis only when the version counter moved."""
+    global _vectors_version, _vector_entry_ids, _vector_matrix
+    # Read the version first: a write racing the reload only makes the next lookup reload again
+    version = await redis.get(ANSWER_CACHE_VERSION_KEY) or "0"
+    if version == _vectors_version:
+        return _vector_entry_ids, _vector_matrix
+
+    stored_vectors = await redis.hgetall(ANSWER_CACHE_EMBEDDINGS_KEY)
+    entry_ids = list(stored_vectors.keys())
+    matrix = (
+        np.vstack([np.frombuffer(base64.b64decode(stored_vectors[entry_id]), dtype=np.float32) for entry_id in entry_ids])
+        if entry_ids
+        else None
+    )
+    _vectors_version, _vector_entry_ids, _vector_matrix = version, entry_ids, matrix
+    _cache_stats["matrix_reloads"] += 1
+    return entry_ids, matrix
+
+
+async def lookup_cached_answer(question: str) -> Optional[CachedAnswer]:
+    """Returns the cached answer closest to the question if it clears the similarity threshold."""
+    _cache_stats["lookups"] += 1
+    question_vector = await _embed_question(question)
+
+    async with get_redis_client() as redis:
+        entry_ids, matrix = await _get_vector_matrix(redis)
+        if matrix is None:
+            return None
+
+        similarities = matrix @ question_vector
+        best = int(np.argmax(similarities))
+        if float(similarities[best]) < config.KB_ANSWER_CACHE_SIMILARITY:
+            return None
+
+        entry_json = await redis.hget(ANSWER_CACHE_ENTRIES_KEY, entry_ids[best])
+
+    if not entry_json:
+        return None
+    entry = json.loads(entry_json)
+    if time.time() - entry["created_at"] > config.KB_ANSWER_CACHE_TTL_SECONDS:
+        await _delete_entries([entry_ids[best]])
+        return None
+
+    _cache_stats["hits"] += 1
+    _cache_stats["saved_llm_calls"] += entry["llm_calls"]
+    _cache_stats["saved_prompt_tokens"] += entry["prompt_tokens"]
+    _cache_stats["saved_completion_tokens"] += entry["completion_tokens"]
+    return CachedAnswer(
+        entry_id=entry_ids[best],
+        question=entry["question"],
+        answer=entry["answer"],
+        chunk_ids=entry["chunk_ids"],
+        similarity=float(similarities[best]),
+        llm_calls=entry["llm_calls"],
+        prompt_tokens=entry["prompt_tokens"],
+        completion_tokens=entry["completion_tokens"],
+    )
+
+
+async def store_validated_answer(question: str, answer: str, chunk_ids: Iterable[str], usage: Dict[str, int]):
+    """Caches a validated answer with the KB chunk IDs it was built from, evicting the oldest entries beyond the cap."""
+    chunk_ids = sorted(set(chunk_ids))
+    if not chunk_ids:
+        return  # Without its sources the entry could never be invalidated
+
+    question_vector = await _embed_question(question)
+    entry_id = uuid.uuid4().hex
+    entry = {
+        "question": question,
+        "answer": answer,
+        "chunk_ids": chunk_ids,
+        "created_at": time.time(),
+        **usage,
+    }
+
+    async with get_redis_client() as redis:
+        await redis.hset(ANSWER_CACHE_ENTRIES_KEY, entry_id, json.dumps(entry))
+        await redis.hset(ANSWER_CACHE_EMBEDDINGS_KEY, entry_id, base64.b64encode(question_vector.tobytes()).decode("ascii"))
+        await redis.zadd(ANSWER_CACHE_CREATED_KEY, {entry_id: entry["created_at"]})
+        for chunk_id in chunk_ids:
+            await redis.sadd(_chunk_key(chunk_id), entry_id)
+        await redis.incr(ANSWER_CACHE_VERSION_KEY)
+
+        overflow = await redis.zcard(ANSWER_CACHE_CREATED_KEY) - config.KB_ANSWER_CACHE_MAX_ENTRIES
+        oldest_ids = await redis.zrange(ANSWER_CACHE_CREATED_KEY, 0, overflow - 1) if overflow > 0 else []
+
+    if oldest_ids:
+        await _delete_entries(oldest_ids)
+    _cache_stats["stored"] += 1
+
+
+async def _delete_entries(entry_ids: List[str]) -> int:
+    if not entry_ids:
+        return 0
+    async with get_redis_client() as redis:
+        entries = await redis.hmget(ANSWER_CACHE_ENTRIES_KEY, entry_ids)
+        for entry_id, entry_json in zip(entry_ids, entries):
+            if entry_json:
+                for chunk_id in json.loads(entry_json).get("chunk_ids", []):
+                    await redis.srem(_chunk_key(chunk_id), entry_id)
+        await redis.hdel(ANSWER_CACHE_ENTRIES_KEY, *entry_ids)
+        await redis.hdel(ANSWER_CACHE_EMBEDDINGS_KEY, *entry_ids)
+        await redis.zrem(ANSWER_CACHE_CREATED_KEY, *entry_ids)
+        await redis.incr(ANSWER_CACHE_VERSION_KEY)
+    return len(entry_ids)
+
+
+async def invalidate_answers_for_chunks(chunk_ids: Iterable[str]) -> int:
+    """
+    Drops every cached answer built from any of the given chunks (e.g. chunks that were
+    re-ingested or deleted). Returns the number of answers removed.
+    """
+    entry_ids = set()
+    async with get_redis_client() as redis:
+        for chunk_id in chunk_ids:
+            chunk_key = _chunk_key(chunk_id)
+            entry_ids.update(await redis.smembers(chunk_key))
+            await redis.delete(chunk_key)
+
+    removed = await _delete_entries(sorted(entry_ids))
+    _cache_stats["invalidated"] += removed
+    if removed:
+        log_message(f"Invalidated {removed} cached FAQ answers after KB changes.", level=2)
+    return removed
+
+
+def get_answer_cache_stats() -> Dict[str, float]:
+    """Lookups, hits, hit rate and the LLM calls/tokens saved by cache hits on this worker."""
+    lookups = _cache_stats["lookups"]
+    return {
+        **_cache_stats,
+        "hit_rate": round(_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "matrix_entries": len(_vector_entry_ids),
+        "similarity_threshold": config.KB_ANSWER_CACHE_SIMILARITY,
+    }
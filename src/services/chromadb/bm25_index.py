@@ -0,0 +1,143 @@
+"""
+BM25 keyword index over the documents of the knowledge-base collection, used next to
+the vector search so exact-term queries (product codes, acronyms like "DTF" or "BOPP")
+are found. Built from the collection at startup and persisted to disk; the saved index
+is reused while the collection's contents are unchanged.
+"""
+
+# /src/services/chromadb/bm25_index.py
+import hashlib
+import os
+import pickle
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+import config
+from src.services.logger_config import log_message
+
+# Bump when the persisted format or tokenization changes
+BM25_INDEX_VERSION = 1
+
+# Very common words that only add noise to keyword matching
+BM25_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from how i if in is it me my of on or our "
+    "the this to we what when where which who why will with you your".split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases and splits text into alphanumeric tokens, dropping stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in BM25_STOPWORDS]
+
+
+def _fingerprint(ids: List[str], documents: List[str]) -> str:
+    """Hash of the collection contents, used to tell whether a saved index is stale."""
+    digest = hashlib.sha256()
+    for doc_id, document in sorted(zip(ids, documents)):
+        digest.update(doc_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update((document or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """BM25 scores over the collection's documents, addressable by Chroma ID."""
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], fingerprint: str):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.fingerprint = fingerprint
+        self._bm25 = BM25Okapi([tokenize(document or "") for document in documents]) if documents else None
+
+    @staticmethod
+    def read_collection(collection: chromadb.Collection) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        data = collection.get(include=["documents", "metadatas"])
+        return data["ids"], data["documents"] or [], data["metadatas"] or []
+
+    @classmethod
+    def build(cls, collection: chromadb.Collection) -> "BM25Index":
+        ids, documents, metadatas = cls.read_collection(collection)
+        return cls(ids, documents, metadatas, _fingerprint(ids, documents))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as index_file:
+            pickle.dump({"version": BM25_INDEX_VERSION, "index": self}, index_file)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: str) -> Optional["BM25Index"]:
+        """Returns the index saved at path, or None if it is missing, unreadable or outdated."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as index_file:
+                saved = pickle.load(index_file)
+        except Exception as e:
+            log_message(f"Could not read BM25 index at {path}: {e}", level=3, log_type="warning")
+            return None
+        if not isinstance(saved, dict) or saved.get("version") != BM25_INDEX_VERSION:
+            return None
+        return saved.get("index")
+
+    def search(self, query_text: str, top_n: int) -> List[Tuple[int, float]]:
+        """Returns (document position, score) pairs for the best matches with a positive score."""
+        query_tokens = tokenize(query_text)
+        if self._bm25 is None or not query_tokens:
+            return []
+        scores = self._bm25.get_scores(query_tokens)
+        best = np.argsort(scores)[::-1][:top_n]
+        return [(int(position), float(scores[position])) for position in best if scores[position] > 0]
+
+    def idf(self, token: str) -> float:
+        """Inverse document frequency of a (tokenized) term in the collection; 0 if unseen."""
+        return float(self._bm25.idf.get(token, 0.0)) if self._bm25 is not None else 0.0
+
+
+# --- Global variable to hold the shared index ---
+bm25_index: Optional[BM25Index] = None
+
+
+def initialize_bm25_index(collection: chromadb.Collection):
+    """
+    Loads the persisted BM25 index if it matches the collection, otherwise builds and saves it.
+    This should be called once at application startup, after the ChromaDB client.
+    Failures are logged and leave keyword search disabled (vector search keeps working).
+    """
+    global bm25_index
+    path = config.KB_BM25_INDEX_PATH
+    try:
+        ids, documents, metadatas = BM25Index.read_collection(collection)
+        fingerprint = _fingerprint(ids, documents)
+
+        saved_index = BM25Index.load(path)
+        if saved_index is not None and saved_index.fingerprint == fingerprint:
+            bm25_index = saved_index
+            log_message(f"BM25 index loaded from {path} ({len(ids)} documents).", level=3)
+            return
+
+        bm25_index = BM25Index(ids, documents, metadatas, fingerprint)
+        bm25_index.save(path)
+        log_message(f"BM25 index built and saved to {path} ({len(ids)} documents).", level=3)
+    except Exception as e:
+        log_message(f"Failed to initialize BM25 index, keyword search disabled: {e}", level=2, log_type="warning")
+        bm25_index = None
+
+
+def get_bm25_index() -> Optional[BM25Index]:
+    """Returns the BM25 index, or None if it isn't available."""
+    return bm25_index
+
+
+def close_bm25_index():
+    global bm25_index
+    bm25_index = None
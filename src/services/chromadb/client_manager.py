@@ -1,22 +1,32 @@
 # src/services/chromadb/client_manager.py
 
+import time
 import chromadb
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import config
 from src.services.logger_config import log_message
+from src.services.token_counter import count_tokens
 from .custom_embedding_function import ModernBertEmbeddingFunction
+from .bm25_index import initialize_bm25_index, close_bm25_index, get_bm25_index
+
+# Query used to warm up the model, the HNSW index and the tokenizer at startup
+WARMUP_QUERY = "How long does shipping take?"
 
 # --- Global variables to hold the shared instances ---
 chroma_client: Optional[chromadb.PersistentClient] = None
 embedding_function: Optional[ModernBertEmbeddingFunction] = None
+chroma_collection: Optional[chromadb.Collection] = None  # Resolved once, reused by every query
+
+# Readiness of the knowledge base (set by the startup warm-up)
+_readiness: Dict[str, Any] = {"warmed_up": False, "warmup_ms": None, "error": None}
 
 def initialize_chroma_client():
     """
     Initializes the shared ChromaDB client and embedding function.
     This should be called once at application startup.
     """
-    global chroma_client, embedding_function
+    global chroma_client, embedding_function, chroma_collection
     
     if chroma_client is not None:
         log_message("ChromaDB client is already initialized.", level=2)
@@ -31,19 +41,28 @@ def initialize_chroma_client():
         chroma_client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH_CONFIG)
         
         # Initialize the embedding function once (this loads the model)
-        embedding_function = ModernBertEmbeddingFunction()
+        embedding_function = ModernBertEmbeddingFunction(
+            backend=config.KB_EMBEDDING_BACKEND,
+            onnx_model_dir=config.KB_EMBEDDING_ONNX_DIR,
+        )
 
-        # Ping the collection to ensure it's accessible on startup
-        collection = chroma_client.get_collection(
+        # Resolve the collection once (also checks it's accessible on startup)
+        chroma_collection = chroma_client.get_collection(
             name=config.CHROMA_COLLECTION_NAME_CONFIG,
             embedding_function=embedding_function
         )
-        log_message(f"ChromaDB client initialized. Collection '{collection.name}' has {collection.count()} items.", level=3)
+        log_message(f"ChromaDB client initialized. Collection '{chroma_collection.name}' has {chroma_collection.count()} items.", level=3)
+
+        # Keyword index for hybrid search (loaded from disk when the collection is unchanged)
+        if config.KB_HYBRID_SEARCH:
+            initialize_bm25_index(chroma_collection)
 
     except Exception as e:
         log_message(f"CRITICAL: Failed to initialize ChromaDB client: {e}", log_type="error", level=1, prefix="!!!")
         chroma_client = None
         embedding_function = None
+        chroma_collection = None
+        close_bm25_index()
         raise
 
 def get_chroma_collection() -> chromadb.Collection:
@@ -51,21 +70,67 @@ def get_chroma_collection() -> chromadb.Collection:
     Returns the initialized ChromaDB collection instance.
     Raises a ConnectionError if the client is not initialized.
     """
-    if chroma_client is None or embedding_function is None:
+    if chroma_client is None or embedding_function is None or chroma_collection is None:
         raise ConnectionError("ChromaDB client has not been initialized. Call initialize_chroma_client() first.")
-    
-    # The validation in initialize_chroma_client ensures config.CHROMA_COLLECTION_NAME_CONFIG is set
-    return chroma_client.get_collection(
-        name=config.CHROMA_COLLECTION_NAME_CONFIG,
-        embedding_function=embedding_function
-    )
+
+    # Cached at startup, so queries don't re-resolve the collection metadata every time
+    return chroma_collection
+
+def get_embedding_function() -> ModernBertEmbeddingFunction:
+    """
+    Returns the initialized embedding function (the one the collection queries with).
+    Raises a ConnectionError if the client is not initialized.
+    """
+    if embedding_function is None:
+        raise ConnectionError("ChromaDB client has not been initialized. Call initialize_chroma_client() first.")
+    return embedding_function
+
+def warm_up_chroma_collection():
+    """
+    Runs a dummy query end to end (query embedding, vector search, keyword search and token
+    counting) so the model, the HNSW index and the tokenizer are loaded before the first
+    real query. Blocking: run it on the retrieval executor. Records the result for readiness.
+    """
+    started_at = time.perf_counter()
+    try:
+        collection = get_chroma_collection()
+        query_embedding = embedding_function([f"search_query: {WARMUP_QUERY}"])
+        collection.query(query_embeddings=query_embedding, n_results=1, include=["documents", "distances"])
+        index = get_bm25_index()
+        if index is not None:
+            index.search(WARMUP_QUERY, 1)
+        count_tokens(WARMUP_QUERY)
+    except Exception as e:
+        _readiness.update(warmed_up=False, warmup_ms=None, error=str(e))
+        log_message(f"Knowledge base warm-up failed: {e}", log_type="error")
+        raise
+
+    warmup_ms = round((time.perf_counter() - started_at) * 1000, 1)
+    _readiness.update(warmed_up=True, warmup_ms=warmup_ms, error=None)
+    log_message(f"Knowledge base warmed up in {warmup_ms} ms.", level=3)
+
+def get_chroma_readiness() -> Dict[str, Any]:
+    """
+    Returns whether the knowledge base is ready to serve queries: initialized and, unless
+    the startup warm-up is disabled, warmed up.
+    """
+    initialized = chroma_collection is not None
+    ready = initialized and (_readiness["warmed_up"] or not config.KB_WARMUP_ON_STARTUP)
+    return {
+        "ready": ready,
+        **_readiness,
+        "collection": chroma_collection.name if initialized else None,
+    }
 
 def close_chroma_client():
     """
     Cleans up the ChromaDB client resources.
     """
-    global chroma_client, embedding_function
+    global chroma_client, embedding_function, chroma_collection
     if chroma_client:
         log_message("Closing ChromaDB client.", level=2, prefix="---")
         chroma_client = None
-        embedding_function = None
\ No newline at end of file
+        embedding_function = None
+        chroma_collection = None
+        _readiness.update(warmed_up=False, warmup_ms=None, error=None)
+        close_bm25_index()
\ No newline at end of file
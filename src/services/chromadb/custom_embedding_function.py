@@ -1,28 +1,70 @@
 # /src/services/chromadb/custom_embedding_function.py
 
+from typing import List, Optional
+
 import chromadb
 from sentence_transformers import SentenceTransformer
 from src.services.logger_config import log_message
 
+# Embedding backends selectable by config
+EMBEDDING_BACKEND_TORCH = "torch"
+EMBEDDING_BACKEND_ONNX = "onnx"
+EMBEDDING_BACKEND_ONNX_INT8 = "onnx-int8"
+
 class ModernBertEmbeddingFunction(chromadb.EmbeddingFunction):
     """
     Custom embedding function that matches the one used during ingestion.
     It uses the 'nomic-ai/modernbert-embed-base' model and adds the
     required 'search_query:' prefix to input texts for querying.
+    The model runs on torch (SentenceTransformer) or, optionally, on an exported
+    ONNX model (fp32 or int8-quantized) through ONNX Runtime.
     """
-    def __init__(self, model_name: str = "nomic-ai/modernbert-embed-base"):
-        log_message(f"Initializing custom ModernBertEmbeddingFunction with model: {model_name}", level=2)
+    def __init__(
+        self,
+        model_name: str = "nomic-ai/modernbert-embed-base",
+        backend: str = EMBEDDING_BACKEND_TORCH,
+        onnx_model_dir: Optional[str] = None,
+    ):
+        log_message(f"Initializing custom ModernBertEmbeddingFunction with model: {model_name} ({backend})", level=2)
+        self.model_name = model_name
+        self.backend = backend
         try:
-            self.model = SentenceTransformer(model_name)
+            if backend == EMBEDDING_BACKEND_TORCH:
+                self.model = SentenceTransformer(model_name)
+            elif backend in (EMBEDDING_BACKEND_ONNX, EMBEDDING_BACKEND_ONNX_INT8):
+                if not onnx_model_dir:
+                    raise ValueError("onnx_model_dir is required for the ONNX embedding backends.")
+                # Imported here so the torch backend doesn't need ONNX Runtime
+                from .onnx_embedding_model import OnnxEmbeddingModel
+
+                self.model = OnnxEmbeddingModel(
+                    onnx_model_dir, quantized=backend == EMBEDDING_BACKEND_ONNX_INT8
+                )
+                if self.model.model_name != model_name:
+                    log_message(
+                        f"ONNX model in '{onnx_model_dir}' was exported from '{self.model.model_name}', not '{model_name}'.",
+                        log_type="warning",
+                    )
+            else:
+                raise ValueError(f"Unknown embedding backend '{backend}'.")
             log_message("Custom embedding model loaded successfully.", level=3)
         except Exception as e:
-            log_message(f"!!! FAILED to load SentenceTransformer model '{model_name}': {e}", log_type="error")
+            log_message(f"!!! FAILED to load embedding model '{model_name}' ({backend}): {e}", log_type="error")
             raise
 
     def __call__(self, input_texts: chromadb.Documents) -> chromadb.Embeddings:
         # Add the required prefix for querying.
         prefixed_texts = [f"search_query: {text}" for text in input_texts]
-        
+
         embeddings = self.model.encode(prefixed_texts, normalize_embeddings=True)
-        
-        return embeddings.tolist()
\ No newline at end of file
+
+        return embeddings.tolist()
+
+    def embed_documents(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Embeds document chunks for ingestion, with the 'search_document:' prefix."""
+        prefixed_texts = [f"search_document: {text}" for text in texts]
+
+        embeddings = self.model.encode(prefixed_texts, normalize_embeddings=True, batch_size=batch_size)
+
+        return embeddings.tolist()
+
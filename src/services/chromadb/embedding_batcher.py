@@ -0,0 +1,111 @@
+"""
+Micro-batcher for query embeddings. Concurrent requests are collected for a short wait
+window (or until the batch is full) and encoded together in one embedding-function call,
+i.e. one `SentenceTransformer.encode`, instead of one forward pass per query.
+"""
+
+# /src/services/chromadb/embedding_batcher.py
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+from src.services.logger_config import log_message
+from .client_manager import get_embedding_function
+from .retrieval_executor import run_retrieval
+
+
+class EmbeddingBatcher:
+    """Groups concurrent `embed` calls into batches; each caller gets its own future."""
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        # Counters reported by `get_stats`
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Returns the embedding for one text, encoded together with any concurrent requests."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending_requests": len(self._pending),
+        }
+
+    # --- Internal helpers ---
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._encode_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Identical concurrent queries are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            embeddings = await run_retrieval(get_embedding_function(), unique_texts)
+        except Exception as e:
+            log_message(f"Embedding batch of {len(unique_texts)} queries failed: {e}", level=3, log_type="warning")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        embeddings_by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():  # The caller may have been cancelled meanwhile
+                future.set_result(embeddings_by_text[text])
+
+
+# --- Global batcher instance ---
+_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Returns the shared batcher, creating it from config on first use."""
+    global _batcher
+    if _batcher is None:
+        _batcher = EmbeddingBatcher(
+            max_batch_size=config.KB_EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=config.KB_EMBEDDING_BATCH_WAIT_MS,
+        )
+    return _batcher
+
+
+async def embed_query(text: str) -> List[float]:
+    """Embeds a single query through the shared micro-batcher."""
+    return await get_embedding_batcher().embed(text)
+
+
+def get_embedding_batcher_stats() -> Dict[str, float]:
+    """Batch size/wait window settings and observed batch sizes for this worker."""
+    return get_embedding_batcher().get_stats()
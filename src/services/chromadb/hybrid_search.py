@@ -0,0 +1,130 @@
+"""
+Hybrid knowledge-base search: dense (vector) and BM25 (keyword) candidates are fused with
+reciprocal rank fusion (RRF), so a chunk ranked well by either retriever makes the top-k.
+"""
+
+# /src/services/chromadb/hybrid_search.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import chromadb
+import numpy as np
+
+import config
+from .bm25_index import BM25Index, get_bm25_index
+from .client_manager import get_chroma_collection
+from .retrieval_executor import run_retrieval
+
+# Standard RRF constant; dampens the weight of the very top ranks
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(ranked_id_lists: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuses several rankings into one. Each ID scores sum(1 / (k + rank)) over the lists it
+    appears in (rank starting at 1). Returns (ID, score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranked_ids in ranked_id_lists:
+        for rank, doc_id in enumerate(ranked_ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _distance(space: str, query_embedding: np.ndarray, document_embedding: np.ndarray) -> float:
+    """Distance in the collection's space, matching what Chroma returns for vector hits."""
+    if space == "cosine":
+        norms = np.linalg.norm(query_embedding) * np.linalg.norm(document_embedding)
+        return float(1.0 - np.dot(query_embedding, document_embedding) / max(norms, 1e-12))
+    if space == "ip":
+        return float(1.0 - np.dot(query_embedding, document_embedding))
+    return float(np.sum((query_embedding - document_embedding) ** 2))  # "l2" (squared)
+
+
+def _hybrid_query_sync(
+    collection: chromadb.Collection,
+    index: Optional[BM25Index],
+    query_embedding: List[float],
+    keyword_query: str,
+    top_k: int,
+    candidate_k: int,
+) -> List[Dict[str, Any]]:
+    vector_results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=candidate_k,
+        include=["documents", "metadatas", "distances"],
+    )
+    hits: Dict[str, Dict[str, Any]] = {}
+    vector_ids = vector_results["ids"][0] if vector_results.get("ids") else []
+    for i, doc_id in enumerate(vector_ids):
+        hits[doc_id] = {
+            "id": doc_id,
+            "document": vector_results["documents"][0][i],
+            "metadata": vector_results["metadatas"][0][i] or {},
+            "distance": vector_results["distances"][0][i],
+        }
+
+    keyword_ids: List[str] = []
+    if index is not None:
+        for position, _score in index.search(keyword_query, candidate_k):
+            doc_id = index.ids[position]
+            keyword_ids.append(doc_id)
+            hits.setdefault(doc_id, {
+                "id": doc_id,
+                "document": index.documents[position],
+                "metadata": index.metadatas[position] or {},
+                "distance": None,
+            })
+
+    fused = reciprocal_rank_fusion([vector_ids, keyword_ids])[:top_k]
+    results = []
+    for doc_id, rrf_score in fused:
+        hit = hits[doc_id]
+        hit["rrf_score"] = rrf_score
+        results.append(hit)
+
+    # Keyword-only hits have no vector distance yet; compute it so scores stay comparable
+    missing_ids = [hit["id"] for hit in results if hit["distance"] is None]
+    if missing_ids:
+        stored = collection.get(ids=missing_ids, include=["embeddings"])
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        distances = {
+            doc_id: _distance(space, query_vector, np.asarray(embedding, dtype=np.float32))
+            for doc_id, embedding in zip(stored["ids"], stored["embeddings"])
+        }
+        for hit in results:
+            if hit["distance"] is None:
+                hit["distance"] = distances.get(hit["id"])
+
+    return results
+
+
+async def hybrid_query(
+    query_embedding: List[float],
+    keyword_query: str,
+    top_k: int,
+    candidate_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs the vector and BM25 searches on the retrieval executor and fuses them with RRF.
+    Falls back to vector-only ranking when the BM25 index isn't available.
+
+    Args:
+        query_embedding: The embedded query (with its `search_query:` prefix).
+        keyword_query: The raw query text for BM25 (without the prefix).
+        top_k: Number of fused results to return.
+        candidate_k: Candidates taken from each retriever (defaults to KB_HYBRID_CANDIDATES).
+
+    Returns:
+        List of dicts with `id`, `document`, `metadata`, `distance` and `rrf_score`, best first.
+    """
+    candidate_k = max(top_k, candidate_k or config.KB_HYBRID_CANDIDATES)
+    return await run_retrieval(
+        _hybrid_query_sync,
+        get_chroma_collection(),
+        get_bm25_index(),
+        query_embedding,
+        keyword_query,
+        top_k,
+        candidate_k,
+    )
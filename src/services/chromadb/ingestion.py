@@ -0,0 +1,256 @@
+"""
+Incremental ingestion of source documents into the knowledge-base collection.
+
+Documents are streamed, split into chunks and every chunk gets a content-addressed ID
+(hash of its source and text). Only IDs missing from the collection are embedded (in
+batches, with the `search_document:` prefix) and upserted; chunks of the ingested
+sources that no longer exist are deleted. Unchanged content costs no embedding work.
+"""
+
+# /src/services/chromadb/ingestion.py
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import chromadb
+from bs4 import BeautifulSoup
+
+from src.services.logger_config import log_message
+from .custom_embedding_function import ModernBertEmbeddingFunction
+
+# Chunking settings (changing them changes chunk IDs, i.e. triggers a re-embed)
+CHUNK_MAX_CHARS = 1200
+CHUNK_MIN_CHARS = 200
+
+SOURCE_FILE_EXTENSIONS = (".md", ".txt", ".html", ".htm")
+
+# Metadata written on every ingested chunk
+SOURCE_METADATA_KEY = "source"
+CONTENT_HASH_METADATA_KEY = "content_hash"
+CHUNK_INDEX_METADATA_KEY = "chunk_index"
+
+
+@dataclass
+class SourceDocument:
+    source: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Chunk:
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class IngestionReport:
+    documents: int = 0
+    chunks: int = 0
+    unchanged: int = 0
+    embedded: int = 0
+    metadata_updated: int = 0
+    deleted: int = 0
+    changed_ids: Set[str] = field(default_factory=set)  # Chunk IDs that were added or deleted
+
+
+# --- Reading sources ---
+def _html_to_text(raw_html: str) -> str:
+    soup = BeautifulSoup(raw_html, "html.parser")
+    for element in soup(["script", "style", "nav", "footer", "header", "noscript"]):
+        element.decompose()
+    return soup.get_text("\n")
+
+
+def _html_source(raw_html: str) -> Optional[str]:
+    """The page's canonical URL, if it declares one."""
+    canonical = BeautifulSoup(raw_html, "html.parser").find("link", rel="canonical")
+    return canonical.get("href") if canonical else None
+
+
+def iter_source_documents(path: str) -> Iterator[SourceDocument]:
+    """
+    Streams source documents from a JSONL file (one {"source", "text"|"content", ...} object
+    per line; extra keys become metadata) or from a directory of .md/.txt/.html files
+    (source = canonical URL for HTML pages that declare one, otherwise the relative path).
+    """
+    if os.path.isfile(path) and path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as source_file:
+            for line in source_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = record.pop("text", None) or record.pop("content", "")
+                source = str(record.pop(SOURCE_METADATA_KEY))
+                metadata = {key: value for key, value in record.items() if isinstance(value, (str, int, float, bool))}
+                yield SourceDocument(source=source, text=text, metadata=metadata)
+        return
+
+    for root, _dirs, files in os.walk(path):
+        for file_name in sorted(files):
+            if not file_name.lower().endswith(SOURCE_FILE_EXTENSIONS):
+                continue
+            file_path = os.path.join(root, file_name)
+            with open(file_path, "r", encoding="utf-8", errors="replace") as source_file:
+                raw = source_file.read()
+            source = os.path.relpath(file_path, path).replace(os.sep, "/")
+            if file_name.lower().endswith((".html", ".htm")):
+                source = _html_source(raw) or source
+                raw = _html_to_text(raw)
+            yield SourceDocument(source=source, text=raw)
+
+
+# --- Chunking ---
+def _split_long_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    """Splits a paragraph longer than max_chars at sentence boundaries (hard-wrapping as a last resort)."""
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS, min_chars: int = CHUNK_MIN_CHARS) -> List[str]:
+    """Packs paragraphs into chunks of at most max_chars; a short trailing chunk is merged back."""
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+        paragraph = re.sub(r"[ \t]+", " ", paragraph).strip()
+        if paragraph:
+            paragraphs.extend(_split_long_paragraph(paragraph, max_chars) if len(paragraph) > max_chars else [paragraph])
+
+    chunks, current = [], ""
+    for paragraph in paragraphs:
+        if current and len(current) + 2 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        if chunks and len(current) < min_chars and len(chunks[-1]) + 2 + len(current) <= max_chars * 1.5:
+            chunks[-1] = f"{chunks[-1]}\n\n{current}"
+        else:
+            chunks.append(current)
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_document(document: SourceDocument) -> List[Chunk]:
+    """Chunks a document; IDs depend only on source and chunk text, so unchanged chunks keep them."""
+    chunks = []
+    for index, text in enumerate(chunk_text(document.text)):
+        text_hash = content_hash(text)
+        chunk_id = content_hash(f"{document.source}\0{text_hash}")[:32]
+        metadata = {
+            **document.metadata,
+            SOURCE_METADATA_KEY: document.source,
+            CONTENT_HASH_METADATA_KEY: text_hash,
+            CHUNK_INDEX_METADATA_KEY: index,
+        }
+        chunks.append(Chunk(id=chunk_id, text=text, metadata=metadata))
+    return chunks
+
+
+# --- Sync ---
+def _batched(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest_documents(
+    collection: chromadb.Collection,
+    embedding_function: ModernBertEmbeddingFunction,
+    documents: Iterable[SourceDocument],
+    batch_size: int = 32,
+    prune_missing_sources: bool = False,
+    dry_run: bool = False,
+) -> IngestionReport:
+    """
+    Synchronizes the collection with the given documents.
+
+    Args:
+        collection: Target ChromaDB collection.
+        embedding_function: Used to embed new/changed chunks (`embed_documents`).
+        documents: Source documents (streamed; only the current batch of chunks is held).
+        batch_size: Chunks embedded and upserted per call.
+        prune_missing_sources: Also delete chunks whose source wasn't among the documents.
+        dry_run: Report what would change without writing.
+
+    Returns:
+        IngestionReport with counts and the IDs of added/deleted chunks.
+    """
+    report = IngestionReport()
+    existing = collection.get(include=["metadatas"])
+    existing_metadata: Dict[str, Dict[str, Any]] = dict(zip(existing["ids"], existing["metadatas"] or []))
+    seen_ids: Set[str] = set()
+    seen_sources: Set[str] = set()
+    pending: List[Chunk] = []
+
+    def flush_pending():
+        for batch in _batched(pending, batch_size):
+            if not dry_run:
+                embeddings = embedding_function.embed_documents([chunk.text for chunk in batch], batch_size=batch_size)
+                collection.upsert(
+                    ids=[chunk.id for chunk in batch],
+                    documents=[chunk.text for chunk in batch],
+                    metadatas=[chunk.metadata for chunk in batch],
+                    embeddings=embeddings,
+                )
+            report.embedded += len(batch)
+            report.changed_ids.update(chunk.id for chunk in batch)
+            log_message(f"Embedded {report.embedded} new/changed chunks so far.", level=3)
+        pending.clear()
+
+    for document in documents:
+        report.documents += 1
+        seen_sources.add(document.source)
+        for chunk in chunk_document(document):
+            if chunk.id in seen_ids:
+                continue  # Same text repeated within a source
+            seen_ids.add(chunk.id)
+            report.chunks += 1
+
+            stored_metadata = existing_metadata.get(chunk.id)
+            if stored_metadata is None:
+                pending.append(chunk)
+                if len(pending) >= batch_size:
+                    flush_pending()
+            elif stored_metadata != chunk.metadata:
+                # Same text, new position/metadata: no need to re-embed
+                if not dry_run:
+                    collection.update(ids=[chunk.id], metadatas=[chunk.metadata])
+                report.metadata_updated += 1
+            else:
+                report.unchanged += 1
+    flush_pending()
+
+    orphan_ids = [
+        chunk_id
+        for chunk_id, metadata in existing_metadata.items()
+        if chunk_id not in seen_ids
+        and (prune_missing_sources or (metadata or {}).get(SOURCE_METADATA_KEY) in seen_sources)
+    ]
+    for batch in _batched(orphan_ids, 500):
+        if not dry_run:
+            collection.delete(ids=batch)
+        report.deleted += len(batch)
+    report.changed_ids.update(orphan_ids)
+
+    return report
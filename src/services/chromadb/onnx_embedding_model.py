@@ -0,0 +1,89 @@
+"""
+ONNX Runtime backend for the knowledge-base embedding model. Runs a model exported by
+`export_onnx_embedding_model.py` (fp32 or dynamically quantized int8) and exposes the
+subset of `SentenceTransformer.encode` used by `ModernBertEmbeddingFunction`.
+"""
+
+# /src/services/chromadb/onnx_embedding_model.py
+import json
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+# Files written by the export script into the model directory
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_int8.onnx"
+EMBEDDING_CONFIG_FILE = "embedding_config.json"
+
+SUPPORTED_POOLING_MODES = ("mean", "cls")
+
+
+class OnnxEmbeddingModel:
+    """Tokenizes, runs the ONNX graph and pools/normalizes like the SentenceTransformer pipeline."""
+
+    def __init__(self, model_dir: str, quantized: bool = False):
+        config_path = os.path.join(model_dir, EMBEDDING_CONFIG_FILE)
+        model_path = os.path.join(model_dir, ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not os.path.exists(model_path) or not os.path.exists(config_path):
+            raise FileNotFoundError(
+                f"ONNX embedding model not found in '{model_dir}'. Run export_onnx_embedding_model.py first."
+            )
+
+        with open(config_path, "r", encoding="utf-8") as config_file:
+            embedding_config = json.load(config_file)
+        self.model_name: str = embedding_config["model_name"]
+        self.pooling: str = embedding_config["pooling"]
+        self.max_seq_length: Optional[int] = embedding_config.get("max_seq_length")
+        if self.pooling not in SUPPORTED_POOLING_MODES:
+            raise ValueError(f"Unsupported pooling mode '{self.pooling}' in {config_path}.")
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=session_options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        **_kwargs,
+    ) -> np.ndarray:
+        """Returns a (n, dim) float32 array (or (dim,) for a single string), like SentenceTransformer."""
+        single_input = isinstance(sentences, str)
+        texts = [sentences] if single_input else list(sentences)
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batches.append(self._encode_batch(texts[start:start + batch_size]))
+        embeddings = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single_input else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self._input_names}
+        last_hidden_state = self.session.run(None, feeds)[0]
+
+        if self.pooling == "cls":
+            return last_hidden_state[:, 0].astype(np.float32)
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        summed = (last_hidden_state * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
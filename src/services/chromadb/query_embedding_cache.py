@@ -0,0 +1,131 @@
+"""
+Cache of knowledge-base query embeddings, so repeated and popular queries skip the
+model forward pass. Entries are keyed by model name and backend plus a hash of the
+normalized query, and stored as compact float32 bytes in an in-process LRU, optionally
+shared between workers through Redis.
+"""
+
+# /src/services/chromadb/query_embedding_cache.py
+import base64
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from src.services.logger_config import log_message
+from src.services.redis_client import get_redis_client
+from .client_manager import get_embedding_function
+from .embedding_batcher import embed_query
+
+# Define the keys we will use in Redis
+QUERY_EMBEDDING_KEY_PREFIX = "kb:query_emb:"
+QUERY_EMBEDDING_EXPIRY_SECONDS = 7 * 24 * 60 * 60  # 7 days (embeddings only change with the model)
+
+# --- Global variables to hold the shared cache ---
+_embedding_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_stats: Dict[str, int] = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+
+def normalize_query_text(query_text: str) -> str:
+    """
+    Normalizes a query (unicode form and whitespace) so near-identical queries share an entry.
+    Case is kept: the embedding model is cased, and the normalized text is what gets embedded.
+    """
+    text = unicodedata.normalize("NFKC", query_text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _cache_key(model_name: str, normalized_text: str) -> str:
+    text_hash = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+    return f"{QUERY_EMBEDDING_KEY_PREFIX}{model_name}:{text_hash}"
+
+
+def _remember(key: str, vector_bytes: bytes):
+    _embedding_cache[key] = vector_bytes
+    _embedding_cache.move_to_end(key)
+    while len(_embedding_cache) > config.KB_EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+
+async def _get_from_redis(key: str) -> Optional[bytes]:
+    # The shared Redis client decodes responses, so vectors are stored base64-encoded
+    try:
+        async with get_redis_client() as redis:
+            encoded = await redis.get(key)
+        return base64.b64decode(encoded) if encoded else None
+    except Exception as e:
+        log_message(f"Could not read query embedding from Redis: {e}", level=3, log_type="warning")
+        return None
+
+
+async def _store_in_redis(key: str, vector_bytes: bytes):
+    try:
+        async with get_redis_client() as redis:
+            await redis.set(
+                key,
+                base64.b64encode(vector_bytes).decode("ascii"),
+                ex=QUERY_EMBEDDING_EXPIRY_SECONDS,
+            )
+    except Exception as e:
+        log_message(f"Could not store query embedding in Redis: {e}", level=3, log_type="warning")
+
+
+async def get_query_embedding(query_text: str) -> List[float]:
+    """
+    Returns the embedding for a knowledge-base query, computing it with the collection's
+    embedding function only on a cache miss.
+
+    Args:
+        query_text: The query exactly as it would be passed to `collection.query(query_texts=...)`.
+
+    Returns:
+        List[float]: The embedding, ready for `collection.query(query_embeddings=...)`.
+    """
+    embedding_function = get_embedding_function()
+    normalized_text = normalize_query_text(query_text)
+    # Backends produce slightly different vectors, so they don't share entries
+    key = _cache_key(f"{embedding_function.model_name}:{embedding_function.backend}", normalized_text)
+
+    vector_bytes = _embedding_cache.get(key)
+    if vector_bytes is not None:
+        _embedding_cache.move_to_end(key)
+        _cache_stats["memory_hits"] += 1
+        return np.frombuffer(vector_bytes, dtype=np.float32).tolist()
+
+    if config.KB_EMBEDDING_CACHE_USE_REDIS:
+        vector_bytes = await _get_from_redis(key)
+        if vector_bytes is not None:
+            _remember(key, vector_bytes)
+            _cache_stats["redis_hits"] += 1
+            return np.frombuffer(vector_bytes, dtype=np.float32).tolist()
+
+    _cache_stats["misses"] += 1
+    embedding = await embed_query(normalized_text)
+    vector_bytes = np.asarray(embedding, dtype=np.float32).tobytes()
+    _remember(key, vector_bytes)
+    if config.KB_EMBEDDING_CACHE_USE_REDIS:
+        await _store_in_redis(key, vector_bytes)
+    return np.frombuffer(vector_bytes, dtype=np.float32).tolist()
+
+
+def get_query_embedding_cache_stats() -> Dict[str, float]:
+    """Hit/miss counters and hit rate of the query-embedding cache for this worker."""
+    lookups = sum(_cache_stats.values())
+    hits = _cache_stats["memory_hits"] + _cache_stats["redis_hits"]
+    return {
+        **_cache_stats,
+        "entries": len(_embedding_cache),
+        "max_entries": config.KB_EMBEDDING_CACHE_SIZE,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def clear_query_embedding_cache():
+    """Empties the in-process cache and resets its counters (e.g. after switching models)."""
+    _embedding_cache.clear()
+    for name in _cache_stats:
+        _cache_stats[name] = 0
@@ -0,0 +1,119 @@
+"""
+Query-aware compression of knowledge-base results. Each retrieved chunk is cut down to its
+sentences most relevant to the query (query terms weighted by their BM25 IDF) within a
+token budget measured with tiktoken; the kept sentences stay in their original order.
+Tokens before/after compression are counted so the savings per call can be monitored.
+"""
+
+# /src/services/chromadb/result_compression.py
+import re
+from typing import Dict, List, Optional, Set
+
+from src.services.token_counter import count_tokens, truncate_to_tokens
+from .bm25_index import BM25Index, get_bm25_index, tokenize
+
+# Marks the place of sentences dropped between two kept ones
+OMISSION_MARKER = " … "
+
+# Sentence ends, plus line breaks (list items and headings often have no final period)
+_SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+# --- Counters reported by `get_result_compression_stats` (per worker) ---
+_compression_stats: Dict[str, int] = {
+    "calls": 0,
+    "chunks": 0,
+    "chunks_compressed": 0,
+    "tokens_before": 0,
+    "tokens_after": 0,
+}
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT_PATTERN.split(text) if sentence and sentence.strip()]
+
+
+def _sentence_score(sentence: str, query_terms: Set[str], term_weights: Dict[str, float]) -> float:
+    sentence_terms = set(tokenize(sentence))
+    return sum(term_weights[term] for term in query_terms & sentence_terms)
+
+
+def compress_chunk(query_text: str, document: str, token_budget: int, index: Optional[BM25Index] = None) -> str:
+    """
+    Keeps the sentences of a chunk most relevant to the query within token_budget.
+
+    Args:
+        query_text: The user's query (its terms select the sentences).
+        document: Chunk text.
+        token_budget: Maximum tokens of the returned text.
+        index: BM25 index whose IDF weights the query terms (defaults to the shared index).
+
+    Returns:
+        The chunk unchanged if it fits the budget, otherwise its best sentences in
+        document order, with gaps marked by OMISSION_MARKER.
+    """
+    if count_tokens(document) <= token_budget:
+        return document
+
+    sentences = split_sentences(document)
+    query_terms = set(tokenize(query_text))
+    index = index or get_bm25_index()
+    term_weights = {term: (index.idf(term) if index else 0.0) or 1.0 for term in query_terms}
+
+    # Best sentences first; ties go to the earlier sentence (chunks tend to lead with the answer)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda position: (-_sentence_score(sentences[position], query_terms, term_weights), position),
+    )
+
+    kept: List[int] = []
+    used_tokens = 0
+    for position in ranked:
+        sentence_tokens = count_tokens(sentences[position]) + 1
+        if used_tokens + sentence_tokens > token_budget:
+            continue
+        kept.append(position)
+        used_tokens += sentence_tokens
+
+    if not kept:
+        # Not even the best sentence fits: keep as much of it as the budget allows
+        return truncate_to_tokens(sentences[ranked[0]], token_budget)
+
+    kept.sort()
+    pieces = [sentences[kept[0]]]
+    for previous, position in zip(kept, kept[1:]):
+        pieces.append((" " if position == previous + 1 else OMISSION_MARKER) + sentences[position])
+    return "".join(pieces)
+
+
+def compress_results(query_text: str, results: List[Dict], token_budget: int) -> List[Dict]:
+    """Returns copies of the tool results with each `content` compressed to token_budget tokens."""
+    compressed = []
+    for result in results:
+        content = result.get("content") or ""
+        compressed_content = compress_chunk(query_text, content, token_budget)
+        _compression_stats["chunks"] += 1
+        if compressed_content != content:
+            _compression_stats["chunks_compressed"] += 1
+        compressed.append({**result, "content": compressed_content})
+    return compressed
+
+
+def record_compression(tokens_before: int, tokens_after: int):
+    """Records the token counts of one tool response, before and after compression."""
+    _compression_stats["calls"] += 1
+    _compression_stats["tokens_before"] += tokens_before
+    _compression_stats["tokens_after"] += tokens_after
+
+
+def get_result_compression_stats() -> Dict[str, float]:
+    """Tool responses compressed and the tokens saved on this worker (total and per call)."""
+    calls = _compression_stats["calls"]
+    tokens_saved = _compression_stats["tokens_before"] - _compression_stats["tokens_after"]
+    return {
+        **_compression_stats,
+        "tokens_saved": tokens_saved,
+        "tokens_saved_per_call": round(tokens_saved / calls, 1) if calls else 0.0,
+        "compression_ratio": round(_compression_stats["tokens_after"] / _compression_stats["tokens_before"], 4)
+        if _compression_stats["tokens_before"]
+        else 0.0,
+    }
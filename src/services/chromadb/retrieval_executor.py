@@ -0,0 +1,115 @@
+"""
+Dedicated, bounded thread pool for knowledge-base retrieval work (query embedding and
+ChromaDB searches), so CPU-heavy lookups never block the event loop. The number of
+submitted-but-unfinished jobs is capped; callers beyond the cap wait for a slot.
+"""
+
+# /src/services/chromadb/retrieval_executor.py
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+import config
+from src.services.logger_config import log_message
+
+# Number of recent jobs kept for the queue/run time percentiles
+RETRIEVAL_TIMING_WINDOW = 1000
+
+# --- Global variables to hold the shared executor ---
+_executor: Optional[ThreadPoolExecutor] = None
+_pending_slots: Optional[asyncio.Semaphore] = None
+_pending_jobs = 0
+_completed_jobs = 0
+_queue_times: Deque[float] = deque(maxlen=RETRIEVAL_TIMING_WINDOW)
+_run_times: Deque[float] = deque(maxlen=RETRIEVAL_TIMING_WINDOW)
+
+
+def initialize_retrieval_executor():
+    """
+    Creates the retrieval thread pool.
+    This should be called once at application startup.
+    """
+    global _executor, _pending_slots
+    if _executor is not None:
+        log_message("Retrieval executor is already initialized.", level=2)
+        return
+
+    _executor = ThreadPoolExecutor(
+        max_workers=config.KB_RETRIEVAL_WORKERS,
+        thread_name_prefix="kb-retrieval",
+    )
+    _pending_slots = asyncio.Semaphore(config.KB_RETRIEVAL_MAX_PENDING)
+    log_message(
+        f"Retrieval executor initialized ({config.KB_RETRIEVAL_WORKERS} workers, "
+        f"{config.KB_RETRIEVAL_MAX_PENDING} max pending jobs).",
+        level=2,
+    )
+
+
+def close_retrieval_executor():
+    """Shuts the retrieval thread pool down, waiting for running jobs."""
+    global _executor, _pending_slots
+    if _executor:
+        log_message("Closing retrieval executor.", level=2, prefix="---")
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _pending_slots = None
+
+
+async def run_retrieval(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking retrieval call on the retrieval pool and awaits its result.
+    The pool is created on first use if the application did not initialize it.
+
+    Args:
+        func: The blocking callable (e.g. `collection.query` or the embedding function).
+        *args, **kwargs: Arguments passed to `func`.
+
+    Returns:
+        Whatever `func` returns. Exceptions raised by `func` propagate to the caller.
+    """
+    global _pending_jobs, _completed_jobs
+    if _executor is None:
+        initialize_retrieval_executor()
+
+    async with _pending_slots:
+        submitted_at = time.perf_counter()
+
+        def _timed_call():
+            started_at = time.perf_counter()
+            _queue_times.append(started_at - submitted_at)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _run_times.append(time.perf_counter() - started_at)
+
+        _pending_jobs += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_executor, _timed_call)
+        finally:
+            _pending_jobs -= 1
+            _completed_jobs += 1
+
+
+def _percentile_ms(samples: Deque[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
+
+
+def get_retrieval_executor_stats() -> Dict[str, float]:
+    """Pending/completed job counts and queue/run time percentiles (ms) over recent jobs."""
+    return {
+        "workers": config.KB_RETRIEVAL_WORKERS,
+        "max_pending": config.KB_RETRIEVAL_MAX_PENDING,
+        "pending_jobs": _pending_jobs,
+        "completed_jobs": _completed_jobs,
+        "queue_time_p50_ms": _percentile_ms(_queue_times, 50),
+        "queue_time_p99_ms": _percentile_ms(_queue_times, 99),
+        "run_time_p50_ms": _percentile_ms(_run_times, 50),
+        "run_time_p99_ms": _percentile_ms(_run_times, 99),
+    }
@@ -0,0 +1,265 @@
+"""
+Rolling summarization of the agents' conversation history. After a turn, each agent's model
+context keeps its last CONV_HISTORY_KEEP_EXCHANGES exchanges (a user message and everything
+that followed it) verbatim; older exchanges are folded, CONV_HISTORY_SUMMARIZE_EVERY at a
+time, into a running summary written by the secondary model. Custom-quote form data
+collected by the Price_Quote_Agent is carried in the summary, and messages holding the
+validated `form_data_payload` are never folded; a context in which a custom quote is still
+being collected isn't compacted at all, so no field the user already gave depends on the summary.
+
+Compaction runs in the background after the reply has been sent: the saved state is reloaded,
+compacted and written back only if no turn saved the conversation in the meantime.
+"""
+
+# /src/services/conversation_history.py
+import asyncio
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from autogen_core.models import ChatCompletionClient, SystemMessage, UserMessage
+
+import config
+from src.agents.agent_names import USER_PROXY_AGENT_NAME
+from src.agents.price_quote.instructions_constants import (
+    PLANNER_ASK_USER,
+    PLANNER_VALIDATION_SUCCESSFUL_PROCEED_TO_TICKET,
+)
+from src.services.conversation_state_store import load_conversation_state, replace_conversation_state_if_unchanged
+from src.services.logger_config import log_message
+from src.services.token_counter import count_tokens, truncate_to_tokens
+
+# First line of the summary message placed at the start of a compacted context
+HISTORY_SUMMARY_HEADER = "Summary of the earlier conversation (older messages were condensed):"
+
+# Messages containing any of these are kept verbatim
+PINNED_MESSAGE_MARKERS = ("form_data_payload", PLANNER_VALIDATION_SUCCESSFUL_PROCEED_TO_TICKET)
+
+# Tool results are long (API payloads); the summarizer only sees their beginning
+TOOL_RESULT_MAX_TOKENS = 300
+
+SUMMARIZER_SYSTEM_MESSAGE = """You condense the older part of a customer-service chat for the agent `{agent_name}`, which will keep working on the conversation using only your summary plus the most recent messages.
+Write a concise, factual summary of the previous summary (if any) and the new messages. Keep every detail the agent may need later: the customer's name and contact details, products, sizes, quantities, prices and quotes given, order numbers, ticket IDs, decisions taken and questions still pending.
+If the messages contain custom-quote form data (fields collected by the Price_Quote_Agent, keyed by HubSpot internal names), end the summary with one line `form_data: {{...}}` holding a JSON object with every field value collected so far, using the latest value of each field. Never drop or invent field values.
+Output only the summary."""
+
+# --- Counters reported by `get_conversation_history_stats` (per worker) ---
+_history_stats: Dict[str, int] = {
+    "turns": 0,
+    "compactions": 0,
+    "summarizer_failures": 0,
+    "open_quote_skips": 0,  # Contexts left whole while a custom quote was being collected
+    "stale_compactions": 0,  # Discarded because a turn saved the conversation meanwhile
+    "tokens_before": 0,
+    "tokens_after": 0,
+}
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    """Renders a model-context message (as saved in the agent state) as one transcript line."""
+    message_type = message.get("type")
+    content = message.get("content")
+    source = message.get("source", "system")
+
+    if message_type == "FunctionExecutionResultMessage":
+        results = content if isinstance(content, list) else []
+        return "\n".join(
+            f"[tool result {result.get('name', '')}]: {truncate_to_tokens(str(result.get('content', '')), TOOL_RESULT_MAX_TOKENS)}"
+            for result in results
+        )
+    if isinstance(content, list):
+        # Tool calls (or multimodal content)
+        calls = [f"{item.get('name')}({item.get('arguments')})" for item in content if isinstance(item, dict) and "name" in item]
+        rendered = ", ".join(calls) if calls else " ".join(str(item) for item in content if isinstance(item, str))
+        return f"{source} [calls]: {rendered}"
+    return f"{source}: {content}"
+
+
+def _is_summary(message: Dict[str, Any]) -> bool:
+    return message.get("type") == "SystemMessage" and str(message.get("content", "")).startswith(HISTORY_SUMMARY_HEADER)
+
+
+def _is_pinned(message: Dict[str, Any]) -> bool:
+    content = message.get("content")
+    return isinstance(content, str) and any(marker in content for marker in PINNED_MESSAGE_MARKERS)
+
+
+def has_open_custom_quote(messages: List[Dict[str, Any]]) -> bool:
+    """
+    Whether a custom quote is still being collected in this context: the Price_Quote_Agent
+    asked for data (or a confirmation) after its last successful validation.
+    """
+    last_request = last_validation = -1
+    for position, message in enumerate(messages):
+        content = message.get("content")
+        if not isinstance(content, str):
+            continue
+        if PLANNER_VALIDATION_SUCCESSFUL_PROCEED_TO_TICKET in content:
+            last_validation = position
+        elif PLANNER_ASK_USER in content:  # Also matches PLANNER_ASK_USER_FOR_CONFIRMATION
+            last_request = position
+    return last_request > last_validation
+
+
+def count_context_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Approximate tokens of a model context (its messages rendered as text)."""
+    return sum(count_tokens(_message_text(message)) for message in messages)
+
+
+async def compact_agent_context(
+    agent_name: str,
+    messages: List[Dict[str, Any]],
+    model_client: ChatCompletionClient,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Folds an agent's older exchanges into the running summary.
+
+    Args:
+        agent_name: Agent whose context this is (the summary is written for it).
+        messages: The agent's saved model-context messages.
+        model_client: Client used to write the summary (the secondary model).
+
+    Returns:
+        The compacted messages (summary, pinned messages, recent exchanges), or None if
+        there aren't enough old exchanges to fold yet or a custom quote is being collected.
+    """
+    if has_open_custom_quote(messages):
+        # The form fields collected so far must stay verbatim until the quote is validated
+        _history_stats["open_quote_skips"] += 1
+        return None
+
+    previous_summary = messages[0] if messages and _is_summary(messages[0]) else None
+    history = messages[1:] if previous_summary else messages
+
+    # Exchanges start at each user message; tool calls and their results stay together
+    exchange_starts = [
+        position
+        for position, message in enumerate(history)
+        if message.get("type") == "UserMessage" and message.get("source") == USER_PROXY_AGENT_NAME
+    ]
+    folded_exchanges = len(exchange_starts) - config.CONV_HISTORY_KEEP_EXCHANGES
+    if folded_exchanges < config.CONV_HISTORY_SUMMARIZE_EVERY:
+        return None
+
+    cut = exchange_starts[folded_exchanges]
+    folded, kept = history[:cut], history[cut:]
+    pinned = [message for message in folded if _is_pinned(message)]
+
+    previous_text = previous_summary["content"][len(HISTORY_SUMMARY_HEADER):].strip() if previous_summary else "(none)"
+    transcript = "\n".join(_message_text(message) for message in folded)
+    result = await model_client.create(
+        [
+            SystemMessage(content=SUMMARIZER_SYSTEM_MESSAGE.format(agent_name=agent_name)),
+            UserMessage(
+                content=f"Previous summary:\n{previous_text}\n\nNew messages to fold in:\n{transcript}",
+                source="user",
+            ),
+        ]
+    )
+    if not isinstance(result.content, str) or not result.content.strip():
+        raise ValueError("The summarizer returned no text.")
+
+    summary = {"type": "SystemMessage", "content": f"{HISTORY_SUMMARY_HEADER}\n{result.content.strip()}"}
+    return [summary, *pinned, *kept]
+
+
+def _agent_contexts(team_state: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """(agent name, llm_context dict) of every participant with a saved model context."""
+    contexts = []
+    for name, container_state in (team_state.get("agent_states") or {}).items():
+        llm_context = (container_state.get("agent_state") or {}).get("llm_context") if isinstance(container_state, dict) else None
+        if isinstance(llm_context, dict) and isinstance(llm_context.get("messages"), list):
+            contexts.append((name, llm_context))
+    return contexts
+
+
+async def compact_conversation_state(team_state: Dict[str, Any], model_client: ChatCompletionClient) -> Dict[str, int]:
+    """
+    Compacts the model context of every agent in a saved group-chat state (in place) and
+    reports the history tokens before and after. An agent whose summary fails keeps its
+    full history.
+
+    Returns:
+        {"tokens_before": ..., "tokens_after": ..., "compacted_agents": ...}
+    """
+    contexts = _agent_contexts(team_state)
+    tokens_before = {name: count_context_tokens(llm_context["messages"]) for name, llm_context in contexts}
+
+    outcomes = await asyncio.gather(
+        *(compact_agent_context(name, llm_context["messages"], model_client) for name, llm_context in contexts),
+        return_exceptions=True,
+    )
+    compacted_agents = 0
+    for (name, llm_context), outcome in zip(contexts, outcomes):
+        if isinstance(outcome, Exception):
+            _history_stats["summarizer_failures"] += 1
+            log_message(f"Could not summarize the history of {name}, keeping it whole: {outcome}", log_type="warning")
+        elif outcome is not None:
+            llm_context["messages"] = outcome
+            compacted_agents += 1
+    tokens_after = {name: count_context_tokens(llm_context["messages"]) for name, llm_context in contexts}
+
+    _history_stats["turns"] += 1
+    _history_stats["compactions"] += compacted_agents
+    _history_stats["tokens_before"] += sum(tokens_before.values())
+    _history_stats["tokens_after"] += sum(tokens_after.values())
+    log_message(
+        f"History tokens this turn: {sum(tokens_before.values())} -> {sum(tokens_after.values())} "
+        + json.dumps({name: [tokens_before[name], tokens_after[name]] for name in tokens_before}),
+        level=3,
+    )
+    return {
+        "tokens_before": sum(tokens_before.values()),
+        "tokens_after": sum(tokens_after.values()),
+        "compacted_agents": compacted_agents,
+    }
+
+
+# --- Background compaction (per worker) ---
+_compaction_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def _compact_stored_conversation(conversation_id: str, model_client: ChatCompletionClient):
+    stored_state = await load_conversation_state(conversation_id)
+    if stored_state is None or stored_state.version is None:
+        return
+    # The loaded state may be the worker's cached copy, which must not be modified
+    team_state = copy.deepcopy(stored_state.state)
+    outcome = await compact_conversation_state(team_state, model_client)
+    if not outcome["compacted_agents"]:
+        return
+    if not await replace_conversation_state_if_unchanged(conversation_id, team_state, stored_state.version):
+        # A new turn was saved first; the next compaction starts from it
+        _history_stats["stale_compactions"] += 1
+        log_message(f"Discarded the history compaction of {conversation_id}: the conversation moved on.", level=3)
+
+
+def schedule_conversation_compaction(conversation_id: str, model_client: ChatCompletionClient):
+    """
+    Compacts a saved conversation in the background, after the turn's reply went out.
+    At most one compaction per conversation runs at a time on this worker.
+    """
+    running = _compaction_tasks.get(conversation_id)
+    if running is not None and not running.done():
+        return
+
+    async def _run():
+        try:
+            await _compact_stored_conversation(conversation_id, model_client)
+        except Exception as e:
+            log_message(f"Background history compaction of {conversation_id} failed: {e}", log_type="warning")
+        finally:
+            _compaction_tasks.pop(conversation_id, None)
+
+    _compaction_tasks[conversation_id] = asyncio.create_task(_run())
+
+
+def get_conversation_history_stats() -> Dict[str, float]:
+    """Turns measured, compactions, and the average history tokens per turn before/after on this worker."""
+    turns = _history_stats["turns"]
+    return {
+        **_history_stats,
+        "avg_tokens_before": round(_history_stats["tokens_before"] / turns, 1) if turns else 0.0,
+        "avg_tokens_after": round(_history_stats["tokens_after"] / turns, 1) if turns else 0.0,
+        "running_compactions": len(_compaction_tasks),
+    }
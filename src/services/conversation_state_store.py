@@ -0,0 +1,301 @@
+"""
+Persistence of conversation (group chat) states in Redis as a snapshot plus an append-only
+log of deltas. After each turn only what changed since the loaded state is appended (new
+messages of each agent, plus the few scalar fields that changed), so the write volume per
+turn is O(new messages) instead of the whole history. Every CONV_STATE_SNAPSHOT_EVERY
+deltas the full state is written as a new snapshot and the log is dropped. Snapshots and
+deltas are written with the configured state codec (see state_codec.py), as raw bytes through
+the byte-level Redis client.
+
+Each worker also keeps the decoded states it loaded or saved in a write-through LRU, stamped
+with the conversation's version (incremented in Redis on every save). A load whose cached
+version still matches Redis skips fetching and decoding the state; Redis stays the source of
+truth, so a conversation that moved to another worker in the meantime is re-read.
+Background rewrites of a saved state (e.g. history compaction) are written only if the
+conversation's version hasn't moved since they loaded it, so they never overwrite a turn.
+"""
+
+# /src/services/conversation_state_store.py
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+import config
+from src.services.json_utils import json_serializer_default
+from src.services.logger_config import log_message
+from src.services.redis_client import get_redis_bytes_client
+from src.services.state_codec import decode_state, encode_state
+
+# Define the keys we will use in Redis
+CONV_STATE_KEY_PREFIX = "conv_state:"  # String: full state snapshot (encoded)
+CONV_STATE_LOG_KEY_PREFIX = "conv_state_log:"  # List: encoded deltas applied on top of the snapshot
+CONV_STATE_VERSION_KEY_PREFIX = "conv_state_ver:"  # Integer: incremented on every save
+
+# Delta operations
+DELTA_OP_APPEND = "append"  # Items added at the end of a list
+DELTA_OP_SET = "set"  # Value replaced (or added)
+DELTA_OP_DELETE = "delete"  # Key removed
+
+# Appends a delta only if the snapshot exists and the log is still as long as the writer's base,
+# atomically, so two concurrent turns can't both append on top of the same base.
+# KEYS: log, snapshot, version. ARGV: base log length, encoded delta, TTL.
+# Returns {new log length, new version}, or nil if the check failed (nothing is written).
+_APPEND_DELTA_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 or redis.call('LLEN', KEYS[1]) ~= tonumber(ARGV[1]) then
+    return false
+end
+local log_length = redis.call('RPUSH', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+local version = redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+return {log_length, version}
+"""
+
+# Replaces the snapshot (dropping the log) only if the version is still the one the writer loaded.
+# KEYS: snapshot, log, version. ARGV: expected version, encoded state, TTL.
+# Returns the new version, or nil if the conversation was saved in the meantime (nothing is written).
+_REPLACE_IF_UNCHANGED_SCRIPT = """
+if redis.call('GET', KEYS[3]) ~= ARGV[1] then
+    return false
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+redis.call('DEL', KEYS[2])
+local version = redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+return version
+"""
+
+# --- Counters reported by `get_conversation_state_stats` (per worker) ---
+_store_stats: Dict[str, int] = {
+    "loads": 0,
+    "saves": 0,
+    "delta_saves": 0,
+    "snapshot_saves": 0,
+    "delta_bytes": 0,
+    "snapshot_bytes": 0,
+    "write_conflicts": 0,
+    "rewrites": 0,
+    "rewrite_conflicts": 0,
+    "local_hits": 0,
+    "local_stale": 0,
+    "local_misses": 0,
+}
+
+
+@dataclass
+class StoredConversationState:
+    state: Dict[str, Any]
+    log_length: int  # Deltas applied on top of the snapshot; the base for the next delta
+    version: Optional[int] = None  # Conversation version it was loaded/saved at (None before versions existed)
+
+
+@dataclass
+class _CachedConversationState:
+    version: int
+    stored: StoredConversationState
+
+
+# --- Local (per worker) cache of decoded states; the cached dicts are shared, so treat them as read-only ---
+_local_states: "OrderedDict[str, _CachedConversationState]" = OrderedDict()
+
+
+def _state_key(conversation_id: str) -> str:
+    return f"{CONV_STATE_KEY_PREFIX}{conversation_id}"
+
+
+def _log_key(conversation_id: str) -> str:
+    return f"{CONV_STATE_LOG_KEY_PREFIX}{conversation_id}"
+
+
+def _version_key(conversation_id: str) -> str:
+    return f"{CONV_STATE_VERSION_KEY_PREFIX}{conversation_id}"
+
+
+def _remember(conversation_id: str, version: Optional[int], stored: StoredConversationState):
+    if config.CONV_STATE_LOCAL_CACHE_SIZE <= 0:
+        return
+    if version is None:
+        # Written before versions existed; cached again after the next save
+        _local_states.pop(conversation_id, None)
+        return
+    _local_states[conversation_id] = _CachedConversationState(version=version, stored=stored)
+    _local_states.move_to_end(conversation_id)
+    while len(_local_states) > config.CONV_STATE_LOCAL_CACHE_SIZE:
+        _local_states.popitem(last=False)
+
+
+# --- Deltas ---
+def diff_state(old: Any, new: Any, path: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the operations that turn `old` into `new` (both JSON-compatible). Dicts are
+    compared key by key; a list that only grew becomes an `append` of the new items;
+    anything else that changed is `set` whole.
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+        for key, new_value in new.items():
+            if key not in old:
+                operations.append({"op": DELTA_OP_SET, "path": path + [key], "value": new_value})
+            elif old[key] != new_value:
+                operations.extend(diff_state(old[key], new_value, path + [key]))
+        operations.extend({"op": DELTA_OP_DELETE, "path": path + [key]} for key in old if key not in new)
+        return operations
+
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[: len(old)] == old:
+        return [{"op": DELTA_OP_APPEND, "path": path, "items": new[len(old):]}]
+
+    return [{"op": DELTA_OP_SET, "path": path, "value": new}]
+
+
+def apply_delta(state: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Applies the operations produced by `diff_state` to state (in place) and returns it."""
+    for operation in operations:
+        path = operation["path"]
+        if not path:
+            # The whole state was replaced
+            state = operation["value"] if operation["op"] == DELTA_OP_SET else state
+            continue
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        if operation["op"] == DELTA_OP_APPEND:
+            parent[path[-1]].extend(operation["items"])
+        elif operation["op"] == DELTA_OP_SET:
+            parent[path[-1]] = operation["value"]
+        elif operation["op"] == DELTA_OP_DELETE:
+            parent.pop(path[-1], None)
+    return state
+
+
+# --- Load / save ---
+async def load_conversation_state(conversation_id: str) -> Optional[StoredConversationState]:
+    """
+    Reconstructs a conversation's state from its snapshot and delta log; None if there is none.
+    If this worker's cached copy is still the current version, it is returned without
+    fetching the state (the returned state must not be modified).
+    """
+    cached = _local_states.get(conversation_id)
+    async with get_redis_bytes_client() as redis:
+        if cached is not None:
+            current_version = await redis.get(_version_key(conversation_id))
+            if current_version is not None and int(current_version) == cached.version:
+                _local_states.move_to_end(conversation_id)
+                _store_stats["loads"] += 1
+                _store_stats["local_hits"] += 1
+                return cached.stored
+            _store_stats["local_stale"] += 1
+        else:
+            _store_stats["local_misses"] += 1
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.get(_state_key(conversation_id))
+            pipe.lrange(_log_key(conversation_id), 0, -1)
+            pipe.get(_version_key(conversation_id))
+            snapshot_value, delta_entries, version = await pipe.execute()
+
+    if not snapshot_value:
+        _local_states.pop(conversation_id, None)
+        return None
+    _store_stats["loads"] += 1
+
+    state = decode_state(snapshot_value)
+    for delta_entry in delta_entries:
+        state = apply_delta(state, decode_state(delta_entry))
+    version = int(version) if version is not None else None
+    stored = StoredConversationState(state=state, log_length=len(delta_entries), version=version)
+    _remember(conversation_id, version, stored)
+    return stored
+
+
+async def save_conversation_state(
+    conversation_id: str,
+    state: Dict[str, Any],
+    base: Optional[StoredConversationState] = None,
+):
+    """
+    Persists a conversation's state. With the state it was loaded from (`base`), only the
+    delta is appended to the log, checked and appended atomically; a snapshot is written
+    instead for new conversations, every CONV_STATE_SNAPSHOT_EVERY deltas, or if another
+    writer appended in the meantime.
+    The saved state is kept in this worker's cache with the new version.
+    """
+    _store_stats["saves"] += 1
+    # Normalize to plain JSON types so the comparison with the loaded (JSON) base is exact
+    state = orjson.loads(orjson.dumps(state, default=json_serializer_default))
+
+    if base is not None and base.log_length < config.CONV_STATE_SNAPSHOT_EVERY:
+        operations = diff_state(base.state, state)
+        delta_value = encode_state(operations)
+        async with get_redis_bytes_client() as redis:
+            append_delta = redis.register_script(_APPEND_DELTA_SCRIPT)
+            appended = await append_delta(
+                keys=[_log_key(conversation_id), _state_key(conversation_id), _version_key(conversation_id)],
+                args=[base.log_length, delta_value, config.CONV_STATE_TTL_SECONDS],
+            )
+
+        if appended:
+            log_length, version = (int(value) for value in appended)
+            _store_stats["delta_saves"] += 1
+            _store_stats["delta_bytes"] += len(delta_value)
+            _remember(conversation_id, version, StoredConversationState(state=state, log_length=log_length, version=version))
+            return
+        # The log no longer matches our base (concurrent turn or expired snapshot): nothing was
+        # appended, the full state is written instead (last writer wins)
+        _store_stats["write_conflicts"] += 1
+        log_message(
+            f"Conversation state log of {conversation_id} changed concurrently; writing a snapshot.",
+            log_type="warning",
+        )
+
+    state_value = encode_state(state)
+    async with get_redis_bytes_client() as redis:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(_state_key(conversation_id), state_value, ex=config.CONV_STATE_TTL_SECONDS)
+            pipe.delete(_log_key(conversation_id))
+            pipe.incr(_version_key(conversation_id))
+            pipe.expire(_version_key(conversation_id), config.CONV_STATE_TTL_SECONDS)
+            _, _, version, _ = await pipe.execute()
+    _store_stats["snapshot_saves"] += 1
+    _store_stats["snapshot_bytes"] += len(state_value)
+    _remember(conversation_id, version, StoredConversationState(state=state, log_length=0, version=version))
+
+
+async def replace_conversation_state_if_unchanged(conversation_id: str, state: Dict[str, Any], version: int) -> bool:
+    """
+    Writes a rewritten state (as a new snapshot) only if the conversation is still at the
+    version it was loaded at. Returns False, writing nothing, if a turn saved it meanwhile.
+    """
+    state = orjson.loads(orjson.dumps(state, default=json_serializer_default))
+    state_value = encode_state(state)
+    async with get_redis_bytes_client() as redis:
+        replace_if_unchanged = redis.register_script(_REPLACE_IF_UNCHANGED_SCRIPT)
+        new_version = await replace_if_unchanged(
+            keys=[_state_key(conversation_id), _log_key(conversation_id), _version_key(conversation_id)],
+            args=[version, state_value, config.CONV_STATE_TTL_SECONDS],
+        )
+
+    if new_version is None:
+        _store_stats["rewrite_conflicts"] += 1
+        return False
+    _store_stats["rewrites"] += 1
+    _store_stats["snapshot_bytes"] += len(state_value)
+    new_version = int(new_version)
+    _remember(conversation_id, new_version, StoredConversationState(state=state, log_length=0, version=new_version))
+    return True
+
+
+def get_conversation_state_stats() -> Dict[str, float]:
+    """Saves by kind, the average bytes written per save, and local cache hits on this worker."""
+    saves = _store_stats["saves"]
+    written = _store_stats["delta_bytes"] + _store_stats["snapshot_bytes"]
+    lookups = _store_stats["local_hits"] + _store_stats["local_stale"] + _store_stats["local_misses"]
+    return {
+        **_store_stats,
+        "avg_bytes_per_save": round(written / saves, 1) if saves else 0.0,
+        "local_cache_size": len(_local_states),
+        "local_hit_rate": round(_store_stats["local_hits"] / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,29 @@
+"""
+Fast-path helpers for decoding API responses and validating them into DTOs.
+TypeAdapters are built once per type and reused, and JSON is decoded with orjson.
+"""
+
+# /src/services/dto_parsing.py
+from functools import lru_cache
+from typing import Any, Type, TypeVar, Union
+
+import orjson
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(dto_type: Type[T]) -> TypeAdapter:
+    """Returns the cached TypeAdapter for a DTO type (e.g. `List[ProductDetail]`)."""
+    return TypeAdapter(dto_type)
+
+
+def loads_json(raw: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodes a JSON document with orjson. Raises orjson.JSONDecodeError (a json.JSONDecodeError)."""
+    return orjson.loads(raw)
+
+
+def parse_dto(dto_type: Type[T], data: Any) -> T:
+    """Validates already-decoded data (dict/list) into the given DTO type."""
+    return get_type_adapter(dto_type).validate_python(data)
@@ -0,0 +1,320 @@
+"""
+Deterministic fast path ahead of the Planner. Obvious single-intent messages (order status
+with an order ID, a request to talk to a human, the list of countries) are answered by
+calling the right tool directly, without any LLM call. A message takes the fast path only
+if a keyword rule matches, the entities the tool needs are present, and the embedding
+classifier agrees with confidence >= FAST_PATH_CONFIDENCE_THRESHOLD; everything else runs
+through the group chat as usual, and so does any message sent while the conversation is in
+the middle of a multi-turn workflow (a quote or a handoff) the Planner is running.
+"""
+
+# /src/services/fast_path_router.py
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import config
+from src.agents.agent_names import USER_PROXY_AGENT_NAME
+from src.agents.planner.prompt_modules import get_open_workflows
+from src.markdown_info.website_url_references import SY_USER_HISTORY_LINK
+from src.services.chromadb.query_embedding_cache import get_query_embedding
+from src.services.hubspot.conversation_metadata import TICKET_ID_FIELD, get_conversation_metadata
+from src.services.logger_config import log_message
+from src.services.time_service import is_business_hours
+from src.tools.hubspot.tickets.dto_requests import TicketProperties
+from src.tools.hubspot.tickets.ticket_tools import move_ticket_to_human_assistance_pipeline
+from src.tools.order_status.unified_order_status import get_unified_order_status
+from src.tools.sticker_api.sy_api import API_ERROR_PREFIX, get_live_countries
+
+# Intents handled by the fast path
+INTENT_ORDER_STATUS = "order_status"
+INTENT_HANDOFF = "handoff"
+INTENT_COUNTRY_LIST = "country_list"
+INTENT_OTHER = "other"  # Negative examples: anything that needs the Planner
+
+WISMO_TRACKING_URL = "https://app.wismolabs.com/stickeryou/tracking?TRK="
+
+# --- Rules: a message is only a candidate for an intent if its rule matches ---
+_INTENT_RULES: Dict[str, re.Pattern] = {
+    INTENT_ORDER_STATUS: re.compile(
+        r"\b(order|tracking|track|shipped|shipping status|shipment|package|delivery|delivered)\b", re.IGNORECASE
+    ),
+    INTENT_HANDOFF: re.compile(
+        r"\b(talk|speak|chat|connect|transfer|put me through)\b.*\b(human|person|agent|representative|someone|somebody|"
+        r"real people|customer service|support team|operator)\b"
+        r"|\b(human|live|real) (agent|person|support|representative)\b",
+        re.IGNORECASE,
+    ),
+    INTENT_COUNTRY_LIST: re.compile(
+        r"\b(countr(y|ies))\b.*\b(ship|deliver|available|support|serve|list|which|what)\b"
+        r"|\b(ship|deliver|available|support|serve|list|which|what)\b.*\bcountr(y|ies)\b",
+        re.IGNORECASE,
+    ),
+}
+
+# Order IDs look like "SHO26994" / "MINE44771" (letters + digits) or are purely numeric (often 19 digits).
+# A numeric ID only counts right after "order" (optionally "ID"/"number"/"#") or "#", so quantities,
+# ZIP codes and phone numbers aren't taken for one ("to order 10000 stickers" is not an ID either).
+_ORDER_ID_PATTERN = re.compile(
+    r"\b([A-Za-z]{2,5}\d{4,8})\b"
+    r"|(?:(?<!\bto\s)\border\s*(?:id|number|no\.?)?\s*[:#]?\s*|#\s*)(\d{5,25})\b"
+    r"(?!\s*(?:x\b|stickers|labels|decals|magnets|tattoos|pieces|pcs|units|rolls|sheets))",
+    re.IGNORECASE,
+)
+
+# --- Embedding classifier examples ---
+_INTENT_EXAMPLES: Dict[str, List[str]] = {
+    INTENT_ORDER_STATUS: [
+        "Where is my order 2507101610254719426?",
+        "What is the status of my order SHO26994?",
+        "Can I get a tracking update for order MINE44771?",
+        "Has my order 884213 shipped yet?",
+        "Track order WON11274",
+        "When will my order 551234 be delivered?",
+    ],
+    INTENT_HANDOFF: [
+        "I want to talk to a human",
+        "Can I speak to a real person?",
+        "Connect me with a customer service representative",
+        "Let me talk to an agent please",
+        "I need to speak with someone from your support team",
+        "Transfer me to a live agent",
+    ],
+    INTENT_COUNTRY_LIST: [
+        "Which countries do you ship to?",
+        "What countries do you deliver to?",
+        "Do you have a list of the countries you support?",
+        "Which countries are available for shipping?",
+        "Show me the list of countries",
+    ],
+    INTENT_OTHER: [
+        "How much are 500 die-cut stickers 3x3 inches?",
+        "I want to change the shipping address of my order 123456",
+        "My order 123456 arrived damaged, I want a refund",
+        "Can I cancel my order?",
+        "How long does shipping to Canada take?",
+        "What is your return policy?",
+        "I need a custom quote for holographic labels",
+        "Do you ship to Germany and how much does it cost?",
+        "Can a person apply the stickers to a car?",
+        "I want to reorder my last order",
+    ],
+}
+
+
+@dataclass
+class RoutedIntent:
+    intent: str
+    confidence: float  # Cosine similarity to the intent's closest example
+    order_id: Optional[str] = None
+
+
+@dataclass
+class FastPathReply:
+    intent: str
+    confidence: float
+    reply: str  # Planner-formatted reply, ending with the User_Proxy_Agent tag
+    elapsed_ms: float
+
+
+# --- Global variables for the example embeddings and counters ---
+_example_matrix: Optional[np.ndarray] = None
+_example_intents: List[str] = []
+_router_stats: Dict[str, float] = {
+    "messages": 0,
+    "open_workflow_skips": 0,  # Sent mid-quote/handoff, left to the Planner
+    "candidates": 0,  # A rule matched
+    "below_threshold": 0,
+    "bypassed": 0,
+    "tool_fallbacks": 0,  # Routed, but the tool couldn't answer; the Planner handled it
+    "fast_path_ms_total": 0.0,
+    "planner_turns": 0,
+    "planner_turn_ms_total": 0.0,
+}
+_bypassed_by_intent: Dict[str, int] = {
+    INTENT_ORDER_STATUS: 0,
+    INTENT_HANDOFF: 0,
+    INTENT_COUNTRY_LIST: 0,
+}
+
+
+async def _embed(text: str) -> np.ndarray:
+    # Same query path as the KB tool, so the query-embedding cache is shared
+    embedding = await get_query_embedding(f"search_query: {text}")
+    return np.asarray(embedding, dtype=np.float32)
+
+
+async def _get_example_matrix() -> np.ndarray:
+    """Embeds the classifier examples once per worker."""
+    global _example_matrix, _example_intents
+    if _example_matrix is None:
+        intents, vectors = [], []
+        for intent, examples in _INTENT_EXAMPLES.items():
+            for example in examples:
+                intents.append(intent)
+                vectors.append(await _embed(example))
+        _example_intents = intents
+        _example_matrix = np.vstack(vectors)
+    return _example_matrix
+
+
+def extract_order_id(message: str) -> Optional[str]:
+    """The order ID mentioned in a message, if exactly one is."""
+    order_ids = {(lettered or numeric).upper() for lettered, numeric in _ORDER_ID_PATTERN.findall(message)}
+    return order_ids.pop() if len(order_ids) == 1 else None
+
+
+async def classify_message(message: str) -> Optional[RoutedIntent]:
+    """
+    Classifies a visitor message for the fast path.
+
+    Returns:
+        The intent with its confidence (and extracted entities), or None if no rule matches,
+        the required entities are missing, or the classifier's closest example belongs to
+        another intent.
+    """
+    text = message.strip()
+    if text.startswith("-dev") or len(text.split()) > config.FAST_PATH_MAX_WORDS:
+        return None
+
+    candidates = [intent for intent, rule in _INTENT_RULES.items() if rule.search(text)]
+    order_id = extract_order_id(text) if INTENT_ORDER_STATUS in candidates else None
+    if INTENT_ORDER_STATUS in candidates and not order_id:
+        # Without an order ID the Planner asks for it
+        candidates.remove(INTENT_ORDER_STATUS)
+    if not candidates:
+        return None
+    _router_stats["candidates"] += 1
+
+    example_matrix = await _get_example_matrix()
+    similarities = example_matrix @ await _embed(text)
+    best = int(np.argmax(similarities))
+    intent = _example_intents[best]
+    if intent not in candidates:
+        return None
+    return RoutedIntent(intent=intent, confidence=float(similarities[best]), order_id=order_id)
+
+
+# --- Tool calls and replies (same wording as the Planner's workflows) ---
+async def _answer_order_status(order_id: str) -> Optional[str]:
+    result = await get_unified_order_status(order_id)
+    if result.get("status") == "Error":
+        return (
+            "TASK FAILED: I couldn't retrieve the details for that order. This might mean the order ID is incorrect, "
+            f"or it hasn't been shipped yet. You can verify your recent orders by visiting your {SY_USER_HISTORY_LINK}. "
+            f"If you still need help, I can create a support ticket for our team to investigate. <{USER_PROXY_AGENT_NAME}>"
+        )
+    if result.get("trackingNumber"):
+        return (
+            f"TASK COMPLETE: The current status for your order is '{result.get('statusDetails')}', and it was last "
+            f"updated at {result.get('lastUpdate')}. You can follow its journey here: "
+            f"[Track Your Order]({WISMO_TRACKING_URL}{result['trackingNumber']}). <{USER_PROXY_AGENT_NAME}>"
+        )
+    return f"TASK COMPLETE: I've checked on your order {order_id}. {result.get('statusDetails')} <{USER_PROXY_AGENT_NAME}>"
+
+
+async def _answer_handoff(conversation_id: str) -> Optional[str]:
+    metadata = await get_conversation_metadata(conversation_id)
+    ticket_id = metadata.get(TICKET_ID_FIELD) if metadata else None
+    if not ticket_id:
+        return None  # No ticket to move (e.g. not a HubSpot conversation)
+
+    result = await move_ticket_to_human_assistance_pipeline(
+        ticket_id,
+        conversation_id,
+        TicketProperties(content="User requested to speak with a human."),
+    )
+    if not result.startswith("SUCCESS"):
+        return f"TASK FAILED: I'm sorry, there was a system error while requesting assistance. Please try again later. <{USER_PROXY_AGENT_NAME}>"
+    if is_business_hours():
+        return f"Thank you. I have notified the team. Someone will be in touch with you shortly. <{USER_PROXY_AGENT_NAME}>"
+    return (
+        "Thank you. Our team is currently offline, but I have left them a notification and they will get in touch "
+        f"with you as soon as they're back. <{USER_PROXY_AGENT_NAME}>"
+    )
+
+
+async def _answer_country_list() -> Optional[str]:
+    quick_replies = await get_live_countries(returnAsQuickReply=True)
+    if not isinstance(quick_replies, str) or quick_replies.startswith(API_ERROR_PREFIX):
+        return None
+    return f"These are the countries we can ship to. Please select yours: {quick_replies} <{USER_PROXY_AGENT_NAME}>"
+
+
+async def route_message(
+    message: str, conversation_id: str, team_state: Optional[Dict[str, Any]] = None
+) -> Optional[FastPathReply]:
+    """
+    Answers a visitor message directly if it is a high-confidence simple intent.
+
+    Args:
+        message: The visitor's message.
+        conversation_id: The conversation it belongs to (needed for handoffs).
+        team_state: The conversation's saved group-chat state (None for a new one).
+
+    Returns:
+        The reply, or None if the message should go to the Planner.
+    """
+    start_time = time.perf_counter()
+    _router_stats["messages"] += 1
+    try:
+        if get_open_workflows(team_state):
+            # e.g. "I'd like to order 10000" is a quantity for the open quote, not an order ID
+            _router_stats["open_workflow_skips"] += 1
+            return None
+        routed = await classify_message(message)
+        if routed is None:
+            return None
+        if routed.confidence < config.FAST_PATH_CONFIDENCE_THRESHOLD:
+            _router_stats["below_threshold"] += 1
+            return None
+
+        if routed.intent == INTENT_ORDER_STATUS:
+            reply = await _answer_order_status(routed.order_id)
+        elif routed.intent == INTENT_HANDOFF:
+            reply = await _answer_handoff(conversation_id)
+        else:
+            reply = await _answer_country_list()
+    except Exception as e:
+        log_message(f"Fast-path routing failed, using the Planner: {e}", log_type="warning")
+        return None
+
+    if reply is None:
+        _router_stats["tool_fallbacks"] += 1
+        return None
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    _router_stats["bypassed"] += 1
+    _router_stats["fast_path_ms_total"] += elapsed_ms
+    _bypassed_by_intent[routed.intent] += 1
+    return FastPathReply(intent=routed.intent, confidence=routed.confidence, reply=reply, elapsed_ms=elapsed_ms)
+
+
+def record_planner_turn(elapsed_ms: float):
+    """Records the duration of a turn run through the group chat (the baseline for latency saved)."""
+    _router_stats["planner_turns"] += 1
+    _router_stats["planner_turn_ms_total"] += elapsed_ms
+
+
+def get_fast_path_router_stats() -> Dict[str, float]:
+    """Bypass rate, bypasses per intent and the estimated latency saved on this worker."""
+    messages = _router_stats["messages"]
+    bypassed = _router_stats["bypassed"]
+    planner_turns = _router_stats["planner_turns"]
+    avg_fast_path_ms = _router_stats["fast_path_ms_total"] / bypassed if bypassed else 0.0
+    avg_planner_turn_ms = _router_stats["planner_turn_ms_total"] / planner_turns if planner_turns else 0.0
+    return {
+        **{name: round(value, 1) if isinstance(value, float) else value for name, value in _router_stats.items()},
+        "bypassed_by_intent": dict(_bypassed_by_intent),
+        "bypass_rate": round(bypassed / messages, 4) if messages else 0.0,
+        "confidence_threshold": config.FAST_PATH_CONFIDENCE_THRESHOLD,
+        "avg_fast_path_ms": round(avg_fast_path_ms, 1),
+        "avg_planner_turn_ms": round(avg_planner_turn_ms, 1),
+        # Estimate: each bypassed turn would have taken an average group-chat turn
+        "estimated_ms_saved": round(bypassed * max(avg_planner_turn_ms - avg_fast_path_ms, 0.0), 1)
+        if planner_turns
+        else 0.0,
+    }
@@ -0,0 +1,138 @@
+"""
+Caches HubSpot conversation metadata (associated ticket, inbox and contact) in Redis
+so agent setup does not need to fetch the thread details on every turn. Threads without a
+ticket yet are cached too, for a short time, since HubSpot may associate one on its own.
+"""
+
+# /src/services/hubspot/conversation_metadata.py
+from typing import Dict, Optional
+
+from src.services.redis_client import get_redis_client
+from src.services.logger_config import log_message
+from src.tools.hubspot.conversation.conversation_tools import get_thread_summary
+
+# Define the keys we will use in Redis
+CONVERSATION_METADATA_KEY_PREFIX = "hubspot:conv_meta:"
+TICKET_CONVERSATION_KEY_PREFIX = "hubspot:ticket_conv:"
+
+# Hash fields stored for each conversation
+TICKET_ID_FIELD = "ticket_id"
+INBOX_ID_FIELD = "inbox_id"
+CONTACT_ID_FIELD = "contact_id"
+
+# Expiry time in seconds (matches the conversation state expiry)
+CONVERSATION_METADATA_EXPIRY_SECONDS = 24 * 60 * 60  # 24 hours
+# Entries without a ticket (tickets our tools create replace them right away)
+CONVERSATION_METADATA_NO_TICKET_EXPIRY_SECONDS = 5 * 60  # 5 minutes
+
+
+def _metadata_key(conversation_id: str) -> str:
+    return f"{CONVERSATION_METADATA_KEY_PREFIX}{conversation_id}"
+
+
+def _ticket_key(ticket_id: str) -> str:
+    return f"{TICKET_CONVERSATION_KEY_PREFIX}{ticket_id}"
+
+
+async def cache_conversation_metadata(
+    conversation_id: str,
+    ticket_id: Optional[str] = None,
+    inbox_id: Optional[str] = None,
+    contact_id: Optional[str] = None,
+):
+    """
+    Stores (or merges) the metadata for a conversation and refreshes its expiry.
+    A reverse ticket -> conversation key is kept so ticket webhooks can invalidate the entry.
+    An entry without a ticket gets the short expiry; merging a ticket ID in gives it the full one.
+    """
+    fields = {
+        TICKET_ID_FIELD: ticket_id,
+        INBOX_ID_FIELD: inbox_id,
+        CONTACT_ID_FIELD: contact_id,
+    }
+    mapping = {key: str(value) for key, value in fields.items() if value}
+    if not conversation_id or not mapping:
+        return
+
+    async with get_redis_client() as redis:
+        metadata_key = _metadata_key(conversation_id)
+        await redis.hset(metadata_key, mapping=mapping)
+        has_ticket = bool(ticket_id) or bool(await redis.hexists(metadata_key, TICKET_ID_FIELD))
+        await redis.expire(
+            metadata_key,
+            CONVERSATION_METADATA_EXPIRY_SECONDS if has_ticket else CONVERSATION_METADATA_NO_TICKET_EXPIRY_SECONDS,
+        )
+        if ticket_id:
+            await redis.set(
+                _ticket_key(str(ticket_id)),
+                conversation_id,
+                ex=CONVERSATION_METADATA_EXPIRY_SECONDS,
+            )
+
+
+async def get_cached_conversation_metadata(conversation_id: str) -> Optional[Dict[str, str]]:
+    """Returns the cached metadata for a conversation, or None if nothing is cached."""
+    async with get_redis_client() as redis:
+        metadata = await redis.hgetall(_metadata_key(conversation_id))
+    return metadata or None
+
+
+async def get_conversation_metadata(conversation_id: str) -> Optional[Dict[str, str]]:
+    """
+    Returns the metadata for a conversation, reading from Redis first and falling back
+    to HubSpot's thread details on a miss. The result is cached whether or not the thread
+    has a ticket; a ticketless entry expires after a few minutes, so a ticket HubSpot
+    associates on its own is picked up.
+    """
+    try:
+        metadata = await get_cached_conversation_metadata(conversation_id)
+        if metadata:
+            return metadata
+    except Exception as e:
+        log_message(f"Could not read conversation metadata cache for {conversation_id}: {e}", level=3, log_type="warning")
+
+    thread_details = await get_thread_summary(thread_id=conversation_id)
+    if isinstance(thread_details, str):
+        log_message(f"Could not fetch thread details for {conversation_id}: {thread_details}", level=3, log_type="warning")
+        return None
+
+    ticket_id = None
+    if thread_details.threadAssociations and thread_details.threadAssociations.associatedTicketId:
+        ticket_id = thread_details.threadAssociations.associatedTicketId
+
+    metadata = {
+        TICKET_ID_FIELD: ticket_id,
+        INBOX_ID_FIELD: thread_details.inboxId,
+        CONTACT_ID_FIELD: thread_details.associatedContactId,
+    }
+    metadata = {key: value for key, value in metadata.items() if value}
+
+    try:
+        await cache_conversation_metadata(
+            conversation_id,
+            ticket_id=ticket_id,
+            inbox_id=thread_details.inboxId,
+            contact_id=thread_details.associatedContactId,
+        )
+    except Exception as e:
+        log_message(f"Could not cache conversation metadata for {conversation_id}: {e}", level=3, log_type="warning")
+
+    return metadata
+
+
+async def invalidate_conversation_metadata(
+    conversation_id: Optional[str] = None, ticket_id: Optional[str] = None
+):
+    """
+    Removes the cached metadata for a conversation. When only the ticket ID is known
+    (e.g. from a ticket property-change webhook) the conversation is resolved through
+    the reverse ticket key.
+    """
+    async with get_redis_client() as redis:
+        if ticket_id:
+            ticket_key = _ticket_key(str(ticket_id))
+            if not conversation_id:
+                conversation_id = await redis.get(ticket_key)
+            await redis.delete(ticket_key)
+        if conversation_id:
+            await redis.delete(_metadata_key(conversation_id))
@@ -0,0 +1,125 @@
+"""
+In-memory directory of HubSpot owners, used to resolve owner names for assignment
+webhooks without calling the Owners API on every handoff.
+"""
+
+# /src/services/hubspot/owner_directory.py
+import asyncio
+from typing import Dict, Optional
+
+import config
+from hubspot.crm.owners.exceptions import ApiException as OwnersApiException
+from src.services.logger_config import log_message
+
+# Paging and refresh settings
+OWNER_PAGE_SIZE = 100  # Maximum page size allowed by the Owners API
+OWNER_DIRECTORY_REFRESH_SECONDS = 6 * 60 * 60  # 6 hours
+
+# --- Global variables to hold the shared directory ---
+owners_by_id: Dict[str, object] = {}
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def load_all_owners() -> Dict[str, object]:
+    """Fetches every active owner, page by page, and returns them keyed by owner ID."""
+    owners: Dict[str, object] = {}
+    after = None
+    while True:
+        page = await asyncio.to_thread(
+            config.HUBSPOT_CLIENT.crm.owners.owners_api.get_page,
+            after=after,
+            limit=OWNER_PAGE_SIZE,
+            archived=False,
+        )
+        for owner in page.results or []:
+            owners[str(owner.id)] = owner
+
+        next_page = page.paging.next if page.paging else None
+        after = next_page.after if next_page else None
+        if not after:
+            return owners
+
+
+async def refresh_owner_directory() -> bool:
+    """
+    Reloads the owner directory. On failure the previous directory is kept.
+
+    Returns:
+        bool: True if the directory was refreshed, False otherwise.
+    """
+    global owners_by_id
+    try:
+        owners_by_id = await load_all_owners()
+        log_message(f"Owner directory loaded with {len(owners_by_id)} owners.", level=3)
+        return True
+    except Exception as e:
+        log_message(f"Failed to refresh owner directory: {e}", level=3, log_type="warning")
+        return False
+
+
+async def _refresh_periodically():
+    """Background loop that keeps the owner directory fresh."""
+    while True:
+        await asyncio.sleep(OWNER_DIRECTORY_REFRESH_SECONDS)
+        await refresh_owner_directory()
+
+
+async def initialize_owner_directory():
+    """
+    Preloads the owner directory and schedules its periodic refresh.
+    This should be called once at application startup.
+    """
+    global _refresh_task
+    if _refresh_task is not None:
+        log_message("Owner directory is already initialized.", level=2)
+        return
+
+    log_message("Initializing HubSpot owner directory...", level=2)
+    await refresh_owner_directory()
+    _refresh_task = asyncio.create_task(_refresh_periodically())
+
+
+async def close_owner_directory():
+    """Stops the periodic refresh and clears the directory."""
+    global _refresh_task, owners_by_id
+    if _refresh_task:
+        log_message("Closing owner directory.", level=2, prefix="---")
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    owners_by_id = {}
+
+
+async def get_owner(owner_id: str):
+    """
+    Returns the owner for the given ID from the directory, falling back to the
+    Owners API on a miss (and remembering the result). Returns None if not found.
+    """
+    owner_id = str(owner_id)
+    owner = owners_by_id.get(owner_id)
+    if owner is not None:
+        return owner
+
+    try:
+        owner = await asyncio.to_thread(
+            config.HUBSPOT_CLIENT.crm.owners.owners_api.get_by_id,
+            owner_id=int(owner_id),
+        )
+    except OwnersApiException as e:
+        log_message(f"API error fetching owner {owner_id}: {e}", log_type="error")
+        return None
+    except Exception as e:
+        log_message(f"Unexpected error fetching owner {owner_id}: {e}", log_type="error")
+        return None
+
+    owners_by_id[owner_id] = owner
+    return owner
+
+
+async def get_owner_first_name(owner_id: str) -> Optional[str]:
+    """Returns the first name of the given owner, or None if it can't be resolved."""
+    owner = await get_owner(owner_id)
+    return owner.first_name if owner else None
@@ -4,12 +4,13 @@ import asyncio
 import config
 from src.models.hubspot_webhooks import TicketPropertyChangeWebhookPayload
 from hubspot.crm.tickets.exceptions import ApiException as TicketsApiException
-from hubspot.crm.owners.exceptions import ApiException as OwnersApiException
 from src.tools.hubspot.conversation.dto_requests import CreateMessageRequest
 from src.services.time_service import is_business_hours
 from src.services.logger_config import log_message
 from src.tools.hubspot.conversation.conversation_tools import send_message_to_thread
 from src.services.hubspot.messages_filter import add_conversation_to_handed_off
+from src.services.hubspot.conversation_metadata import invalidate_conversation_metadata
+from src.services.hubspot.owner_directory import get_owner_first_name
 
 # --- Improved, Context-Aware Messages ---
 def get_handoff_messages(owner_name: str = None):
@@ -33,6 +34,12 @@ async def process_assignment_webhook(payload: TicketPropertyChangeWebhookPayload
     """
     for event in payload:
         try:
+            # Any property change on a ticket invalidates the cached conversation metadata for it
+            try:
+                await invalidate_conversation_metadata(ticket_id=str(event.objectId))
+            except Exception as e:
+                log_message(f"Could not invalidate conversation metadata for ticket {event.objectId}: {e}", log_type="warning")
+
             # Check the propertyName for each event to ensure we're acting on the right one. (Rare case since this endpoint handles assignment only)
             if event.propertyName != "was_handed_off" or event.propertyValue.lower() != "yes":
                 # Ignore if not a handoff activation or not the right property
@@ -65,20 +72,18 @@ async def process_assignment_webhook(payload: TicketPropertyChangeWebhookPayload
                 log_message(f"Ticket {ticket_id} has no associated conversation.", log_type="warning")
                 continue # Move to the next event
 
+            # A ticket HubSpot created itself has no reverse key, so clear the conversation's entry directly
+            try:
+                await invalidate_conversation_metadata(conversation_id=conversation_id, ticket_id=ticket_id)
+            except Exception as e:
+                log_message(f"Could not invalidate conversation metadata for {conversation_id}: {e}", log_type="warning")
+
             # --- 2. Get Owner Name if an owner is assigned ---
+            # Served from the in-memory owner directory; falls back to the API on a miss.
+            # If the name can't be resolved we proceed without it, the logic handles it gracefully.
             owner_name = None
             if hubspot_owner_id:
-                try:
-                    owner_response = await asyncio.to_thread(
-                        config.HUBSPOT_CLIENT.crm.owners.owners_api.get_by_id,
-                        owner_id=int(hubspot_owner_id)
-                    )
-                    owner_name = owner_response.first_name
-                except OwnersApiException as e:
-                    log_message(f"API error fetching owner {hubspot_owner_id}: {e}", log_type="error")
-                    # Proceed without the name, the logic will handle it gracefully
-                except Exception as e:
-                    log_message(f"Unexpected error fetching owner {hubspot_owner_id}: {e}", log_type="error")
+                owner_name = await get_owner_first_name(hubspot_owner_id)
 
             # --- 3. Determine the Scenario and Message ---
             messages = get_handoff_messages(owner_name)
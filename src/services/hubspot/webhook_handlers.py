@@ -25,7 +25,7 @@ from src.services.hubspot.ack_recieved_mesage import (
     send_ack_of_received_to_conversation,
 )
 from src.tools.hubspot.conversation.dto_responses import (
-    MessageDetail,
+    MessageSummary,
     MessageType,
     MessageDirection,
 )
@@ -35,7 +35,7 @@ from src.tools.hubspot.conversation.dto_requests import (
 
 # HubSpot Tools used in webhook handler
 from src.tools.hubspot.conversation.conversation_tools import (
-    get_message_details,
+    get_message_summary,
     send_message_to_thread,
 )
 
@@ -220,11 +220,12 @@ async def process_incoming_hubspot_message(conversation_id: str, message_id: str
 
         # 1. Fetch message details
         try:
-            msg_details_model = await get_message_details(
+            # Lean projection: only the fields needed below are validated
+            msg_details_model = await get_message_summary(
                 thread_id=conversation_id, message_id=message_id
             )
 
-            if isinstance(msg_details_model, MessageDetail):
+            if isinstance(msg_details_model, MessageSummary):
                 message_content = msg_details_model.text
                 # 2. Check if the message is relevant for agent processing
                 is_message_type = msg_details_model.type == MessageType.MESSAGE
@@ -246,7 +247,7 @@ async def process_incoming_hubspot_message(conversation_id: str, message_id: str
                 log_message(f"Failed to fetch message details: {msg_details_model}", level=2, prefix="!!!", log_type="error")
             else:
                 log_message(
-                    f"Unexpected response from get_message_details: {type(msg_details_model)}", level=2, prefix="!!!", log_type="error"
+                    f"Unexpected response from get_message_summary: {type(msg_details_model)}", level=2, prefix="!!!", log_type="error"
                 )
 
         except Exception as fetch_exc:
@@ -288,6 +289,7 @@ async def process_incoming_hubspot_message(conversation_id: str, message_id: str
                     user_message=user_message_for_agent,
                     show_console=True,  # Set to False if running purely as backend service
                     conversation_id=conversation_id,
+                    stream_progress=True,  # Agent progress and reply tokens over the WebSocket
                 )
                 await process_agent_response(
                     conversation_id, task_result, error_message
@@ -1,33 +1,110 @@
 """Manages the connection to the Redis cache."""
 
+import time
 import redis.asyncio as redis
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, Optional
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError
+from redis.utils import HIREDIS_AVAILABLE
 
-from config import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD
+from config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_PASSWORD,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT_SECONDS,
+    REDIS_PROTOCOL,
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_SOCKET_CONNECT_TIMEOUT,
+)
 from src.services.logger_config import log_message
 
-# This will hold the connection pool.
-redis_pool = None
+# --- Pool counters reported by `get_redis_pool_stats` (per worker) ---
+_pool_stats: Dict[str, float] = {
+    "acquires": 0,
+    "acquire_timeouts": 0,
+    "acquire_wait_ms_total": 0.0,
+    "acquire_wait_ms_max": 0.0,
+    "max_in_use": 0,
+}
+
+
+class _InstrumentedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool (callers wait up to `timeout` for a free connection) that records acquire waits."""
+
+    async def get_connection(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except RedisConnectionError:
+            # Also raised when no connection frees up within the pool timeout
+            _pool_stats["acquire_timeouts"] += 1
+            raise
+        finally:
+            wait_ms = (time.perf_counter() - start_time) * 1000
+            _pool_stats["acquire_wait_ms_total"] += wait_ms
+            _pool_stats["acquire_wait_ms_max"] = max(_pool_stats["acquire_wait_ms_max"], wait_ms)
+        _pool_stats["acquires"] += 1
+        _pool_stats["max_in_use"] = max(_pool_stats["max_in_use"], len(getattr(self, "_in_use_connections", ())))
+        return connection
+
+
+# The connection pool and the single client shared by the whole worker.
+redis_pool: Optional[redis.BlockingConnectionPool] = None
+redis_client: Optional[redis.Redis] = None
+# Byte-level client for binary values (e.g. compressed conversation states). redis-py fixes the
+# response decoding per connection, so it has its own pool, created and closed with the shared one.
+redis_bytes_pool: Optional[redis.BlockingConnectionPool] = None
+redis_bytes_client: Optional[redis.Redis] = None
+
+
+def _create_pool(protocol: int, decode_responses: bool = True) -> redis.BlockingConnectionPool:
+    # Construct the redis URL with 'rediss://' for SSL connections
+    redis_url = f"rediss://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}"
+    # redis-py parses replies with hiredis automatically when it is installed
+    return _InstrumentedBlockingConnectionPool.from_url(
+        redis_url,
+        decode_responses=decode_responses,  # Decode responses to strings (except for the byte-level client)
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT_SECONDS,  # Max wait for a free connection
+        protocol=protocol,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+    )
 
 
 async def initialize_redis_pool():
-    """Initializes the Redis connection pool."""
-    global redis_pool
+    """Initializes the Redis connection pools and the shared clients."""
+    global redis_pool, redis_client, redis_bytes_pool, redis_bytes_client
     if redis_pool is None:
         log_message("Initializing Redis connection pool...", level=2)
+        protocol = REDIS_PROTOCOL
         try:
-            # Construct the redis URL with 'rediss://' for SSL connections
-            redis_url = f"rediss://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}"
-            redis_pool = redis.ConnectionPool.from_url(
-                redis_url,
-                decode_responses=True,  # Decode responses to strings
-                max_connections=20,
+            try:
+                redis_pool = _create_pool(protocol)
+                redis_client = redis.Redis(connection_pool=redis_pool)
+                # Test the connection
+                await redis_client.ping()
+            except ResponseError as e:
+                if protocol == 2:
+                    raise
+                # Servers older than Redis 6 reject HELLO 3
+                log_message(f"Redis rejected RESP{protocol} ({e}); falling back to RESP2.", level=2, log_type="warning")
+                await redis_pool.disconnect()
+                protocol = 2
+                redis_pool = _create_pool(protocol)
+                redis_client = redis.Redis(connection_pool=redis_pool)
+                await redis_client.ping()
+            redis_bytes_pool = _create_pool(protocol, decode_responses=False)
+            redis_bytes_client = redis.Redis(connection_pool=redis_bytes_pool)
+            log_message(
+                f"Redis connection pool initialized successfully (RESP{protocol}, "
+                f"hiredis {'on' if HIREDIS_AVAILABLE else 'off'}, max {REDIS_MAX_CONNECTIONS} connections).",
+                level=3,
             )
-            # Test the connection
-            client = redis.Redis(connection_pool=redis_pool)
-            await client.ping()
-            log_message("Redis connection pool initialized successfully.", level=3)
         except Exception as e:
             log_message(
                 f"Failed to initialize Redis connection pool: {e}",
@@ -36,29 +113,63 @@ async def initialize_redis_pool():
                 prefix="!!! CRITICAL:",
             )
             redis_pool = None  # Ensure it's None on failure
+            redis_client = None
+            redis_bytes_pool = None
+            redis_bytes_client = None
             raise
 
 
 async def close_redis_pool():
-    """Closes the Redis connection pool."""
-    global redis_pool
+    """Closes the shared clients and the Redis connection pools."""
+    global redis_pool, redis_client, redis_bytes_pool, redis_bytes_client
     if redis_pool:
         log_message("Closing Redis connection pool...", level=1, prefix="---")
+        if redis_client is not None:
+            await redis_client.aclose(close_connection_pool=False)
+            redis_client = None
         await redis_pool.disconnect()
         redis_pool = None
+    if redis_bytes_pool:
+        if redis_bytes_client is not None:
+            await redis_bytes_client.aclose(close_connection_pool=False)
+            redis_bytes_client = None
+        await redis_bytes_pool.disconnect()
+        redis_bytes_pool = None
 
 
 @asynccontextmanager
 async def get_redis_client() -> AsyncGenerator[redis.Redis, None]:
-    """Provides a Redis connection from the pool."""
-    if redis_pool is None:
+    """Provides the shared Redis client (each command borrows a connection from the pool)."""
+    if redis_client is None:
         raise ConnectionError(
             "Redis pool is not initialized. Call initialize_redis_pool() first."
         )
+    yield redis_client
+
+
+@asynccontextmanager
+async def get_redis_bytes_client() -> AsyncGenerator[redis.Redis, None]:
+    """Provides the byte-level client: responses are returned as bytes, not decoded to str."""
+    if redis_bytes_client is None:
+        raise ConnectionError(
+            "Redis pool is not initialized. Call initialize_redis_pool() first."
+        )
+    yield redis_bytes_client
+
 
-    client = redis.Redis(connection_pool=redis_pool)
-    try:
-        yield client
-    finally:
-        # The connection is returned to the pool automatically by the client
-        pass
+def get_redis_pool_stats() -> Dict[str, float]:
+    """Connections in use / idle now, plus acquire counts, timeouts and waits on this worker."""
+    in_use = len(getattr(redis_pool, "_in_use_connections", ())) if redis_pool else 0
+    idle = len(getattr(redis_pool, "_available_connections", ())) if redis_pool else 0
+    acquires = _pool_stats["acquires"]
+    return {
+        **_pool_stats,
+        "acquire_wait_ms_total": round(_pool_stats["acquire_wait_ms_total"], 1),
+        "acquire_wait_ms_max": round(_pool_stats["acquire_wait_ms_max"], 2),
+        "avg_acquire_wait_ms": round(_pool_stats["acquire_wait_ms_total"] / acquires, 3) if acquires else 0.0,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "in_use": in_use,
+        "idle": idle,
+        "utilization": round(in_use / REDIS_MAX_CONNECTIONS, 3) if REDIS_MAX_CONNECTIONS else 0.0,
+        "hiredis": HIREDIS_AVAILABLE,
+    }
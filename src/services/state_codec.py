@@ -0,0 +1,118 @@
+"""
+Pluggable codec for the conversation states kept in Redis. Values are serialized with orjson
+and optionally compressed (zstd, or lz4 when installed). Encoded values are bytes: a version
+header naming the codec, followed by the raw payload (they are stored through the byte-level
+Redis client). Version 1 values, whose payload was base64 text, and values without a header
+(legacy plain JSON) are still read transparently.
+"""
+
+# /src/services/state_codec.py
+import base64
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+import orjson
+import zstandard
+
+import config
+from src.services.json_utils import json_serializer_default
+
+# Header of encoded values: "<prefix><version>:<codec name>:<payload>"
+STATE_CODEC_HEADER_PREFIX = b"~sc"
+STATE_CODEC_VERSION = 2
+STATE_CODEC_VERSION_BASE64 = 1  # Older values: the payload is base64-encoded
+
+# Built-in codecs
+STATE_CODEC_JSON = "json"  # Plain JSON text, no header (same format as legacy values)
+STATE_CODEC_ORJSON = "orjson"  # orjson bytes, no compression
+STATE_CODEC_ORJSON_ZSTD = "orjson-zstd"
+STATE_CODEC_ORJSON_LZ4 = "orjson-lz4"  # Needs the optional `lz4` package
+
+
+@dataclass
+class StateCodec:
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+_codecs: Dict[str, StateCodec] = {}
+
+
+def register_state_codec(name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]):
+    """Registers a codec (compression of the orjson bytes) under a name usable in CONV_STATE_CODEC."""
+    if ":" in name:
+        raise ValueError("Codec names can't contain ':'.")
+    _codecs[name] = StateCodec(name=name, compress=compress, decompress=decompress)
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+# zstd (de)compressors are reused; states are encoded on the event loop thread
+_zstd_compressor = zstandard.ZstdCompressor(level=config.CONV_STATE_ZSTD_LEVEL)
+_zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+def _lz4_compress(data: bytes) -> bytes:
+    # Imported here so lz4 is only needed when the lz4 codec is used
+    import lz4.frame
+
+    return lz4.frame.compress(data)
+
+
+def _lz4_decompress(data: bytes) -> bytes:
+    import lz4.frame
+
+    return lz4.frame.decompress(data)
+
+
+register_state_codec(STATE_CODEC_ORJSON, _identity, _identity)
+register_state_codec(STATE_CODEC_ORJSON_ZSTD, _zstd_compressor.compress, _zstd_decompressor.decompress)
+register_state_codec(STATE_CODEC_ORJSON_LZ4, _lz4_compress, _lz4_decompress)
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=json_serializer_default)
+
+
+def encode_state(value: Any, codec_name: Optional[str] = None) -> bytes:
+    """
+    Encodes a JSON-compatible value (datetimes are written as ISO strings).
+
+    Args:
+        value: The state (or delta) to encode.
+        codec_name: Codec to use; defaults to CONV_STATE_CODEC.
+
+    Returns:
+        The header-prefixed payload, or plain JSON (UTF-8) for the "json" codec.
+    """
+    codec_name = codec_name or config.CONV_STATE_CODEC
+    if codec_name == STATE_CODEC_JSON:
+        return _dumps(value)
+
+    codec = _codecs.get(codec_name)
+    if codec is None:
+        raise ValueError(f"Unknown state codec '{codec_name}'.")
+    header = STATE_CODEC_HEADER_PREFIX + f"{STATE_CODEC_VERSION}:{codec.name}:".encode("ascii")
+    return header + codec.compress(_dumps(value))
+
+
+def decode_state(raw: Union[str, bytes]) -> Any:
+    """Decodes a value written by `encode_state` with any codec or version, or a legacy plain-JSON value."""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if not raw.startswith(STATE_CODEC_HEADER_PREFIX):
+        return orjson.loads(raw)  # Legacy / "json" codec
+
+    version, codec_name, payload = raw[len(STATE_CODEC_HEADER_PREFIX):].split(b":", 2)
+    version, codec_name = int(version), codec_name.decode("ascii")
+    if version == STATE_CODEC_VERSION_BASE64:
+        payload = base64.b64decode(payload)
+    elif version != STATE_CODEC_VERSION:
+        raise ValueError(f"Unsupported state codec version {version}.")
+    codec = _codecs.get(codec_name)
+    if codec is None:
+        raise ValueError(f"Unknown state codec '{codec_name}'.")
+    return orjson.loads(codec.decompress(payload))
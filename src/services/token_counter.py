@@ -0,0 +1,42 @@
+"""
+Token counting with tiktoken, shared by the features that work with token budgets.
+Falls back to an estimate of 4 characters per token if the encoding can't be loaded.
+"""
+
+# /src/services/token_counter.py
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+
+import config
+from src.services.logger_config import log_message
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """Returns the configured tiktoken encoding (loaded once), or None if unavailable."""
+    try:
+        return tiktoken.get_encoding(config.KB_TOKENIZER_ENCODING)
+    except Exception as e:
+        log_message(
+            f"Could not load tiktoken encoding '{config.KB_TOKENIZER_ENCODING}', estimating token counts: {e}",
+            log_type="warning",
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text (approximated as 4 characters per token if tiktoken is unavailable)."""
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Returns the longest prefix of text that fits in max_tokens."""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
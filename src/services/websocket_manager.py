@@ -2,70 +2,362 @@
 
 # src/services/websocket_manager.py
 import asyncio
+import json
+import time
+import uuid
 from typing import Dict, List, Optional
 from fastapi import WebSocket
+from starlette.websockets import WebSocketState
 
+from config import WS_SEND_QUEUE_MAX_SIZE, WS_SLOW_CONSUMER_POLICY
 from src.services.logger_config import log_message
+from src.services.redis_client import get_redis_client
 
 # --- WebSocket Message Constants ---
 WS_MSG_START_PROCESSING = "START_PROCESSING"
 WS_MSG_STOP_PROCESSING = "STOP_PROCESSING"
+WS_MSG_PING = "PING"
+WS_MSG_PONG = "PONG"
+
+# --- Per-socket delivery ---
+# Every socket has a bounded outbound queue drained by its own sender task, so a slow or
+# half-open client only ever blocks itself. When a queue is full the policy decides whether
+# the oldest pending message is dropped or the socket is closed.
+WS_POLICY_DROP_OLDEST = "drop_oldest"
+WS_POLICY_CLOSE = "close"
+WS_SEND_TIMEOUT_SECONDS = 10
+# Liveness uses WebSocket protocol pings sent by uvicorn (`ws_ping_interval`/`ws_ping_timeout`,
+# see WS_PING_INTERVAL_SECONDS): browsers answer them without any client code, and a socket
+# that stops answering is closed, which ends its receive loop and removes it here. The
+# periodic sweep reaps sockets whose sender stopped or that closed without a disconnect.
+# Clients may still send a text PING and get a PONG back.
+WS_REAP_INTERVAL_SECONDS = 30
+
+# --- Cross-worker routing (Redis pub/sub + presence) ---
+# Each worker listens on its own channel. Presence is a sorted set per conversation
+# (member = worker ID, score = expiry timestamp) refreshed by a heartbeat, so entries
+# left behind by a crashed worker expire on their own.
+WS_WORKER_CHANNEL_PREFIX = "ws:worker:"
+WS_PRESENCE_KEY_PREFIX = "ws:presence:"
+WS_PRESENCE_TTL_SECONDS = 60
+WS_PRESENCE_REFRESH_SECONDS = 20
+WS_LISTENER_RETRY_SECONDS = 5
+WS_LISTENER_POLL_SECONDS = 1.0
+
+
+def _presence_key(conversation_id: str) -> str:
+    return f"{WS_PRESENCE_KEY_PREFIX}{conversation_id}"
+
+
+def _worker_channel(worker_id: str) -> str:
+    return f"{WS_WORKER_CHANNEL_PREFIX}{worker_id}"
+
+
+class ClientConnection:
+    """A single socket with its bounded outbound queue and sender task."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_MAX_SIZE)
+        self.sender_task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def is_alive(self) -> bool:
+        """False once the socket is closed (by either side or a failed ping) or its sender stopped."""
+        if self.closed or (self.sender_task and self.sender_task.done()):
+            return False
+        return (
+            self.websocket.client_state != WebSocketState.DISCONNECTED
+            and self.websocket.application_state != WebSocketState.DISCONNECTED
+        )
 
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, List[ClientConnection]] = {}
+        self.worker_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        self._presence_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        # Counters reported by `get_stats`
+        self.dropped_messages = 0
+        self.reaped_connections = 0
 
+    # --- Lifecycle ---
+    async def start(self):
+        """Starts listening on this worker's channel, refreshing presence entries and reaping dead sockets."""
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_for_remote_messages())
+        if self._presence_task is None:
+            self._presence_task = asyncio.create_task(self._refresh_presence_periodically())
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_periodically())
+        log_message(f"WebSocket manager started for worker {self.worker_id}.", level=3)
+
+    async def stop(self):
+        """Stops the background tasks started by `start`."""
+        for task in (self._listener_task, self._presence_task, self._reaper_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener_task = None
+        self._presence_task = None
+        self._reaper_task = None
+
+    # --- Connections ---
     async def connect(self, websocket: WebSocket, conversation_id: str):
         await websocket.accept()
+        connection = ClientConnection(websocket)
+        connection.sender_task = asyncio.create_task(self._send_loop(connection, conversation_id))
         if conversation_id not in self.active_connections:
             self.active_connections[conversation_id] = []
-        self.active_connections[conversation_id].append(websocket)
+        self.active_connections[conversation_id].append(connection)
+        await self._mark_present(conversation_id)
+
+    async def disconnect(self, websocket: WebSocket, conversation_id: str):
+        connection = self._find_connection(websocket, conversation_id)
+        if connection:
+            await self._remove_connection(connection, conversation_id)
 
-    def disconnect(self, websocket: WebSocket, conversation_id: str):
-        if conversation_id in self.active_connections:
-            self.active_connections[conversation_id].remove(websocket)
+    async def receive_from_client(self, websocket: WebSocket, conversation_id: str, message: str):
+        """Answers client PINGs."""
+        connection = self._find_connection(websocket, conversation_id)
+        if not connection:
+            return
+        if message == WS_MSG_PING:
+            await self._enqueue(connection, WS_MSG_PONG, conversation_id)
 
-    async def send_message(self, message: str, conversation_id: str) -> bool:
+    async def send_message(
+        self, message: str, conversation_id: str, remote_workers: Optional[List[str]] = None
+    ) -> bool:
         """
-        Sends a message to conversation_id.
+        Sends a message to conversation_id, on this worker and on any other worker
+        holding a socket for it (via Redis pub/sub). Local sockets get the message
+        through their outbound queues.
+        `remote_workers` (from `get_remote_workers`) skips the presence lookup, for
+        callers sending many messages in a row.
         Returns True if messages were sent, False otherwise.
         """
-        # Check that the key exists AND that the list of connections is not empty
-        if conversation_id in self.active_connections and self.active_connections[conversation_id]:
-            tasks = [connection.send_text(message) for connection in self.active_connections[conversation_id]]
-            await asyncio.gather(*tasks, return_exceptions=True)
-            return True
-        
-        return False
+        was_sent = await self._send_local(message, conversation_id)
+
+        if remote_workers is None:
+            remote_workers = await self.get_remote_workers(conversation_id)
+        if remote_workers:
+            payload = json.dumps({"conversation_id": conversation_id, "message": message})
+            try:
+                async with get_redis_client() as redis:
+                    for worker_id in remote_workers:
+                        receivers = await redis.publish(_worker_channel(worker_id), payload)
+                        was_sent = was_sent or receivers > 0
+            except Exception as e:
+                log_message(f"Failed to publish WebSocket message for {conversation_id}: {e}", level=3, log_type="warning")
+
+        return was_sent
+
+    async def reap_dead_connections(self) -> int:
+        """Closes and removes every socket that is no longer alive. Returns how many were reaped."""
+        reaped = 0
+        for conversation_id, connections in list(self.active_connections.items()):
+            for connection in list(connections):
+                if not connection.is_alive():
+                    await self._remove_connection(connection, conversation_id, close=True)
+                    reaped += 1
+        if reaped:
+            self.reaped_connections += reaped
+            log_message(f"Reaped {reaped} dead WebSocket connection(s).", level=3)
+        return reaped
+
+    def get_stats(self) -> Dict[str, int]:
+        """Gauges and counters for this worker's sockets."""
+        queue_depths = [
+            connection.queue.qsize()
+            for connections in self.active_connections.values()
+            for connection in connections
+        ]
+        return {
+            "connections": len(queue_depths),
+            "conversations": len(self.active_connections),
+            "queue_depth_total": sum(queue_depths),
+            "queue_depth_max": max(queue_depths, default=0),
+            "dropped_messages": self.dropped_messages,
+            "reaped_connections": self.reaped_connections,
+        }
 
     async def disconnect_all(self):
         """Gracefully disconnects all active WebSocket connections."""
         log_message("Disconnecting all active WebSocket connections.", level=2, prefix="---")
         tasks = []
-        for conv_id in list(self.active_connections.keys()):
-            connections = self.active_connections.pop(conv_id, [])
-            for ws in connections:
-                tasks.append(ws.close())
-        
+        for conv_id, connections in list(self.active_connections.items()):
+            for connection in list(connections):
+                tasks.append(self._remove_connection(connection, conv_id, close=True))
+
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
         log_message("Finished disconnecting all WebSockets.", level=2, prefix="---")
 
+    # --- Internal helpers ---
+    def _find_connection(self, websocket: WebSocket, conversation_id: str) -> Optional[ClientConnection]:
+        for connection in self.active_connections.get(conversation_id, []):
+            if connection.websocket is websocket:
+                return connection
+        return None
+
+    async def _remove_connection(self, connection: ClientConnection, conversation_id: str, close: bool = False):
+        """Stops the socket's sender, removes it and (optionally) closes it. Safe to call twice."""
+        if connection.closed:
+            return
+        connection.closed = True
+
+        if connection.sender_task and connection.sender_task is not asyncio.current_task():
+            connection.sender_task.cancel()
+
+        connections = self.active_connections.get(conversation_id)
+        if connections is not None:
+            if connection in connections:
+                connections.remove(connection)
+            if not connections:
+                del self.active_connections[conversation_id]
+                await self._clear_presence(conversation_id)
+
+        if close and connection.websocket.client_state != WebSocketState.DISCONNECTED:
+            try:
+                await connection.websocket.close()
+            except Exception:
+                pass  # The socket is already gone
+
+    async def _send_loop(self, connection: ClientConnection, conversation_id: str):
+        """Drains a socket's queue. A failed or timed-out send removes the socket."""
+        while True:
+            message = await connection.queue.get()
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(message), WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_message(f"WebSocket send failed for {conversation_id}, closing socket: {e!r}", level=3, log_type="warning")
+                await self._remove_connection(connection, conversation_id, close=True)
+                return
+
+    async def _enqueue(self, connection: ClientConnection, message: str, conversation_id: str) -> bool:
+        """Queues a message for one socket, applying the slow-consumer policy when it is full."""
+        if connection.closed:
+            return False
+        try:
+            connection.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped_messages += 1
+
+        if WS_SLOW_CONSUMER_POLICY == WS_POLICY_CLOSE:
+            log_message(f"WebSocket send queue full for {conversation_id}, closing slow socket.", level=3, log_type="warning")
+            await self._remove_connection(connection, conversation_id, close=True)
+            return False
+
+        # Drop the oldest pending message to make room
+        connection.queue.get_nowait()
+        connection.queue.put_nowait(message)
+        return True
+
+    async def _send_local(self, message: str, conversation_id: str) -> bool:
+        """Queues a message for the sockets held by this worker."""
+        was_sent = False
+        for connection in list(self.active_connections.get(conversation_id, [])):
+            was_sent = await self._enqueue(connection, message, conversation_id) or was_sent
+        return was_sent
+
+    async def _reap_periodically(self):
+        """Reaps dead sockets (protocol pings detect the half-open ones)."""
+        while True:
+            await asyncio.sleep(WS_REAP_INTERVAL_SECONDS)
+            try:
+                await self.reap_dead_connections()
+            except Exception as e:
+                log_message(f"WebSocket reaper error: {e}", level=3, log_type="warning")
+
+    async def _mark_present(self, conversation_id: str):
+        """Records (or refreshes) that this worker holds a socket for the conversation."""
+        try:
+            async with get_redis_client() as redis:
+                key = _presence_key(conversation_id)
+                await redis.zadd(key, {self.worker_id: time.time() + WS_PRESENCE_TTL_SECONDS})
+                await redis.expire(key, WS_PRESENCE_TTL_SECONDS)
+        except Exception as e:
+            log_message(f"Failed to record WebSocket presence for {conversation_id}: {e}", level=3, log_type="warning")
+
+    async def _clear_presence(self, conversation_id: str):
+        try:
+            async with get_redis_client() as redis:
+                await redis.zrem(_presence_key(conversation_id), self.worker_id)
+        except Exception as e:
+            log_message(f"Failed to clear WebSocket presence for {conversation_id}: {e}", level=3, log_type="warning")
+
+    async def get_remote_workers(self, conversation_id: str) -> List[str]:
+        """Returns the other workers currently holding a socket for the conversation."""
+        try:
+            async with get_redis_client() as redis:
+                key = _presence_key(conversation_id)
+                now = time.time()
+                await redis.zremrangebyscore(key, "-inf", now)
+                workers = await redis.zrangebyscore(key, now, "+inf")
+        except Exception as e:
+            log_message(f"Failed to read WebSocket presence for {conversation_id}: {e}", level=3, log_type="warning")
+            return []
+        return [worker_id for worker_id in workers if worker_id != self.worker_id]
+
+    async def _refresh_presence_periodically(self):
+        while True:
+            await asyncio.sleep(WS_PRESENCE_REFRESH_SECONDS)
+            for conversation_id in list(self.active_connections.keys()):
+                await self._mark_present(conversation_id)
+
+    async def _listen_for_remote_messages(self):
+        """Delivers messages published by other workers to the sockets held here."""
+        channel = _worker_channel(self.worker_id)
+        while True:
+            try:
+                async with get_redis_client() as redis:
+                    pubsub = redis.pubsub()
+                    await pubsub.subscribe(channel)
+                    try:
+                        while True:
+                            # Poll with a timeout: a blocking read would hit the client's socket timeout
+                            # whenever the channel is idle
+                            event = await pubsub.get_message(
+                                ignore_subscribe_messages=True, timeout=WS_LISTENER_POLL_SECONDS
+                            )
+                            if event is None or event.get("type") != "message":
+                                continue
+                            data = json.loads(event["data"])
+                            await self._send_local(data["message"], data["conversation_id"])
+                    finally:
+                        await pubsub.unsubscribe(channel)
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_message(f"WebSocket pub/sub listener error, retrying: {e}", level=3, log_type="warning")
+                await asyncio.sleep(WS_LISTENER_RETRY_SECONDS)
+
+
 # --- Global Manager Instance ---
 manager: Optional[ConnectionManager] = ConnectionManager()
 
 
 async def initialize_websocket_manager():
-    """Initializes the WebSocket Connection Manager."""
+    """Initializes the WebSocket Connection Manager and its cross-worker routing."""
     global manager
     if manager is None:
         manager = ConnectionManager()
+    await manager.start()
 
 
 async def close_websocket_manager():
     """Closes all connections and shuts down the WebSocket Manager."""
     global manager
     if manager:
+        await manager.stop()
         await manager.disconnect_all()
-        manager = None
\ No newline at end of file
+        manager = None
@@ -1,7 +1,8 @@
 """ChromaDB tools package for knowledge base querying."""
 
-from .query_tool import query_knowledge_base
+from .query_tool import query_knowledge_base, track_retrieved_chunks
 
 __all__ = [
     "query_knowledge_base",
+    "track_retrieved_chunks",
 ]
@@ -1,51 +1,80 @@
 # src/tools/chromadb/query_tool.py
 
 import json
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
 
-from src.services.chromadb.client_manager import get_chroma_collection
+import config
+from src.services.chromadb.hybrid_search import hybrid_query
+from src.services.chromadb.query_embedding_cache import get_query_embedding
+from src.services.chromadb.result_compression import compress_results, record_compression
 from src.services.logger_config import log_message
+from src.services.token_counter import count_tokens
+
+# Number of chunks returned to the agent
+KB_RESULTS_TOP_K = 3
+
+# Per-turn record of the chunk IDs returned to the agent (e.g. for the answer cache).
+# None when no tracker is active.
+_retrieved_chunk_ids: ContextVar[Optional[List[str]]] = ContextVar("retrieved_chunk_ids", default=None)
+
+
+@contextmanager
+def track_retrieved_chunks():
+    """Collects the IDs of every chunk `query_knowledge_base` returns inside the block."""
+    chunk_ids: List[str] = []
+    token = _retrieved_chunk_ids.set(chunk_ids)
+    try:
+        yield chunk_ids
+    finally:
+        _retrieved_chunk_ids.reset(token)
 
 # --- Tool Function ---
 async def query_knowledge_base(query_text: str) -> str:
     """
     Queries the ChromaDB knowledge base with a given text string and returns
-    the top 3 most relevant document chunks as a JSON formatted string.
+    the top 3 most relevant document chunks as a compact JSON string, each chunk cut down
+    to its sentences most relevant to the query.
     This tool is used by the StickerYou_Agent to find information to answer user questions.
     """
     
     try:
-        # 1. Get the pre-initialized collection
-        collection = get_chroma_collection()
-
-        # 2. Prepare and execute the query with the required prefix
+        # 1. Prepare the query embedding with the required prefix
+        # The embedding comes from the query-embedding cache (computed only on a miss)
         prefixed_query = f"search_query: {query_text}"
-        query_results = collection.query(
-            query_texts=[prefixed_query],
-            n_results=3,
-            include=["documents", "metadatas", "distances"],
-        )
-
-        # 3. Format the results into a JSON string
-        if not query_results or not query_results.get("ids") or not query_results["ids"][0]:
+        query_embedding = await get_query_embedding(prefixed_query)
+
+        # 2. Execute the hybrid (vector + BM25, fused with RRF) search on the retrieval pool
+        # so it doesn't block the event loop. Keywords are matched on the raw query text.
+        hits = await hybrid_query(query_embedding, query_text, top_k=KB_RESULTS_TOP_K)
+
+        # 3. Format the results into a compact JSON string
+        if not hits:
             log_message("No results found in ChromaDB for the query.", level=3)
             return json.dumps([])
 
-        results_list = []
-        documents = query_results["documents"][0]
-        metadatas = query_results["metadatas"][0]
-        distances = query_results["distances"][0]
+        tracked_chunk_ids = _retrieved_chunk_ids.get()
+        if tracked_chunk_ids is not None:
+            tracked_chunk_ids.extend(hit["id"] for hit in hits)
 
-        for i, doc in enumerate(documents):
+        results_list = []
+        for i, hit in enumerate(hits):
             results_list.append({
                 "result_number": i + 1,
-                "content": doc,
-                "source": metadatas[i].get("source", "N/A"),
-                "relevance_score": 1 - distances[i]
+                "content": hit["document"],
+                "source": hit["metadata"].get("source", "N/A"),
+                "relevance_score": round(1 - hit["distance"], 4) if hit["distance"] is not None else None
             })
-        
-        final_json_string = json.dumps(results_list, indent=2)
-        log_message(f"Returning {len(documents)} results as JSON to agent.", level=3)
+
+        final_json_string = json.dumps(results_list, separators=(",", ":"), ensure_ascii=False)
+        if config.KB_RESULT_COMPRESSION:
+            # Tokens of the uncompressed (previously pretty-printed) response, to track the savings
+            tokens_before = count_tokens(json.dumps(results_list, indent=2))
+            compressed_results = compress_results(query_text, results_list, config.KB_RESULT_CHUNK_TOKEN_BUDGET)
+            final_json_string = json.dumps(compressed_results, separators=(",", ":"), ensure_ascii=False)
+            record_compression(tokens_before, count_tokens(final_json_string))
+        log_message(f"Returning {len(hits)} results as JSON to agent.", level=3)
         return final_json_string
 
     except Exception as e:
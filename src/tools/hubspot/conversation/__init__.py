@@ -10,13 +10,21 @@ from .conversation_tools import (
     get_inbox_details,
     list_inboxes,
     get_message_details,
+    get_message_summary,
     get_original_message_content,
     archive_thread,
     get_thread_details,
+    get_thread_summary,
     get_thread_messages,
     list_threads,
     send_message_to_thread,
     update_thread,
+    iter_channel_accounts,
+    iter_channels,
+    iter_inboxes,
+    iter_thread_messages,
+    iter_threads,
+    HubSpotPaginationError,
 )
 
 from .dto_requests import (
@@ -47,6 +55,8 @@ from .dto_responses import (
     MessageDetailResponse,
     OriginalMessageContentResponse,
     CreateMessageResponse,
+    MessageSummary,
+    ThreadSummary,
 )
 
 __all__ = [
@@ -60,13 +70,22 @@ __all__ = [
     "get_inbox_details",
     "list_inboxes",
     "get_message_details",
+    "get_message_summary",
     "get_original_message_content",
     "archive_thread",
     "get_thread_details",
+    "get_thread_summary",
     "get_thread_messages",
     "list_threads",
     "send_message_to_thread",
     "update_thread",
+    # Paginated iterators
+    "iter_channel_accounts",
+    "iter_channels",
+    "iter_inboxes",
+    "iter_thread_messages",
+    "iter_threads",
+    "HubSpotPaginationError",
     # Request DTOs
     "BatchReadActorsRequest",
     "CreateMessageRequest",
@@ -93,4 +112,6 @@ __all__ = [
     "MessageDetailResponse",
     "OriginalMessageContentResponse",
     "CreateMessageResponse",
+    "MessageSummary",
+    "ThreadSummary",
 ]
@@ -2,16 +2,21 @@
 
 # /src/tools/hubspot/conversation/conversation_tools.py
 import asyncio
-from typing import Optional, List, Union, Dict, Any
+from typing import Optional, List, Union, Dict, Any, AsyncIterator, Awaitable, Callable
 from urllib.parse import urlencode
 
 # Import config for client and defaults
 import config
 from src.services.clean_agent_tags import clean_agent_output
+from src.services.dto_parsing import loads_json, parse_dto
 
 # Import Pydantic models for request/response validation
 from .dto_responses import (
     ThreadDetail,
+    MessageDetail,
+    Inbox,
+    Channel,
+    ChannelAccount,
     ListMessagesResponse,
     ListThreadsResponse,
     ThreadStatus,
@@ -27,6 +32,8 @@ from .dto_responses import (
     MessageDetailResponse,
     OriginalMessageContentResponse,
     CreateMessageResponse,
+    MessageSummary,
+    ThreadSummary,
 )
 from .dto_requests import (
     BatchReadActorsRequest,
@@ -96,8 +103,8 @@ async def _make_hubspot_api_request(
                 if status_code == 204:
                     return None  # Explicitly return None for 204
                 try:
-                    # Try parsing JSON for other 2xx codes
-                    return response.json()
+                    # Try parsing JSON for other 2xx codes (orjson straight from the raw bytes)
+                    return loads_json(response.content)
                 except Exception as json_err:
                     # Success status but no valid JSON?
                     try:
@@ -413,6 +420,38 @@ async def get_message_details(
         return f"{ERROR_PREFIX} Unexpected successful response type from helper for get_message_details: {type(result).__name__}"
 
 
+async def get_message_summary(
+    thread_id: str, message_id: str
+) -> Union[MessageSummary, str]:
+    """Retrieves a lean projection of a message (type, direction, text, senders, attachments).
+    Used on the webhook hot path instead of validating the full MessageDetailResponse.
+    Allowed Scopes: [Internal]
+    Args:
+        thread_id: The unique ID of the thread.
+        message_id: The unique ID of the message.
+    Returns: A MessageSummary model instance, or an error string.
+    """
+    if not thread_id:
+        return f"{ERROR_PREFIX} thread_id is required."
+    if not message_id:
+        return f"{ERROR_PREFIX} message_id is required."
+
+    api_path = (
+        f"/conversations/v3/conversations/threads/{thread_id}/messages/{message_id}"
+    )
+    result = await _make_hubspot_api_request("GET", api_path)
+
+    if isinstance(result, str):
+        return result
+    elif isinstance(result, dict):
+        try:
+            return parse_dto(MessageSummary, result)
+        except Exception as parse_err:
+            return f"{ERROR_PREFIX} Failed to validate successful response for get_message_summary: {parse_err}. Data: {str(result)[:200]}..."
+    else:
+        return f"{ERROR_PREFIX} Unexpected successful response type from helper for get_message_summary: {type(result).__name__}"
+
+
 async def get_original_message_content(
     thread_id: str, message_id: str
 ) -> Union[OriginalMessageContentResponse, str]:
@@ -497,6 +536,37 @@ async def get_thread_details(
         return f"{ERROR_PREFIX} Unexpected successful response type from helper for get_thread_details: {type(result).__name__}"
 
 
+async def get_thread_summary(
+    thread_id: str, association: Optional[str] = 'TICKET'
+) -> Union[ThreadSummary, str]:
+    """Retrieves a lean projection of a thread (inbox, contact and associated ticket IDs).
+    Allowed Scopes: [Internal]
+    Args:
+        thread_id: The unique ID of the thread.
+        association: Optional. Specify an association type (e.g., 'TICKET') to include associated object IDs.
+    Returns: A ThreadSummary model instance on success, or an error string.
+    """
+    if not thread_id:
+        return f"{ERROR_PREFIX} thread_id is required."
+
+    api_path = f"/conversations/v3/conversations/threads/{thread_id}"
+    query_params = {}
+    if association:
+        query_params["association"] = association
+
+    result = await _make_hubspot_api_request("GET", api_path, query_params=query_params)
+
+    if isinstance(result, str):
+        return result
+    elif isinstance(result, dict):
+        try:
+            return parse_dto(ThreadSummary, result)
+        except Exception as parse_err:
+            return f"{ERROR_PREFIX} Failed to validate successful response for get_thread_summary: {parse_err}. Data: {str(result)[:200]}..."
+    else:
+        return f"{ERROR_PREFIX} Unexpected successful response type from helper for get_thread_summary: {type(result).__name__}"
+
+
 async def get_thread_messages(
     thread_id: str,
     limit: Optional[int] = None,
@@ -726,3 +796,156 @@ async def update_thread(
     else:
         # PATCH should return a dict on success
         return f"{ERROR_PREFIX} Unexpected successful response type from helper for update_thread: {type(result).__name__}"
+
+
+# --- Paginated Iterators --- #
+# Async generators that walk every page of a list endpoint. The next page is requested
+# while the caller is still processing the current one, and the pending request is
+# cancelled if the caller stops early (break / aclose) or `max_items` is reached.
+
+
+class HubSpotPaginationError(Exception):
+    """Raised by the paginated iterators when a page request fails."""
+
+
+async def _iterate_pages(
+    fetch_page: Callable[[Optional[str]], Awaitable[Any]],
+    max_items: Optional[int] = None,
+) -> AsyncIterator[Any]:
+    """Internal helper that yields every result across pages, prefetching one page ahead.
+
+    Args:
+        fetch_page: Coroutine function taking the `after` cursor and returning a list
+                    response model (with `results` and `paging`) or an error string.
+        max_items: Optional. Stop after yielding this many results.
+    """
+    if max_items is not None and max_items <= 0:
+        return
+
+    yielded = 0
+    pending = asyncio.create_task(fetch_page(None))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+
+            if isinstance(page, str):
+                raise HubSpotPaginationError(page)
+
+            next_cursor = page.paging.next.after if page.paging and page.paging.next else None
+            # Read-ahead: request the next page before handing out the current one
+            if next_cursor and (max_items is None or yielded + len(page.results) < max_items):
+                pending = asyncio.create_task(fetch_page(next_cursor))
+
+            for item in page.results:
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+def iter_channel_accounts(
+    channel_id: Optional[str] = None,
+    inbox_id: Optional[str] = None,
+    page_size: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> AsyncIterator[ChannelAccount]:
+    """Iterates over all channel accounts, following paging cursors.
+    Args:
+        channel_id: Optional. Filter by channel ID.
+        inbox_id: Optional. Filter by inbox ID.
+        page_size: Optional. Results requested per page.
+        max_items: Optional. Stop after this many channel accounts.
+    Returns: An async iterator of ChannelAccount models. Raises HubSpotPaginationError if a page fails.
+    """
+    return _iterate_pages(
+        lambda after: list_channel_accounts(
+            channel_id=channel_id, inbox_id=inbox_id, limit=page_size, after=after
+        ),
+        max_items=max_items,
+    )
+
+
+def iter_channels(
+    page_size: Optional[int] = None, max_items: Optional[int] = None
+) -> AsyncIterator[Channel]:
+    """Iterates over all channels, following paging cursors.
+    Args:
+        page_size: Optional. Results requested per page.
+        max_items: Optional. Stop after this many channels.
+    Returns: An async iterator of Channel models. Raises HubSpotPaginationError if a page fails.
+    """
+    return _iterate_pages(
+        lambda after: list_channels(limit=page_size, after=after),
+        max_items=max_items,
+    )
+
+
+def iter_inboxes(
+    page_size: Optional[int] = None, max_items: Optional[int] = None
+) -> AsyncIterator[Inbox]:
+    """Iterates over all conversation inboxes, following paging cursors.
+    Args:
+        page_size: Optional. Results requested per page.
+        max_items: Optional. Stop after this many inboxes.
+    Returns: An async iterator of Inbox models. Raises HubSpotPaginationError if a page fails.
+    """
+    return _iterate_pages(
+        lambda after: list_inboxes(limit=page_size, after=after),
+        max_items=max_items,
+    )
+
+
+def iter_thread_messages(
+    thread_id: str,
+    sort: Optional[str] = None,
+    page_size: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> AsyncIterator[MessageDetail]:
+    """Iterates over the full message history of a thread, following paging cursors.
+    Args:
+        thread_id: The unique ID of the thread.
+        sort: Optional. Sort direction ('createdAt' or '-createdAt').
+        page_size: Optional. Results requested per page.
+        max_items: Optional. Stop after this many messages.
+    Returns: An async iterator of MessageDetail models. Raises HubSpotPaginationError if a page fails.
+    """
+    return _iterate_pages(
+        lambda after: get_thread_messages(
+            thread_id=thread_id, limit=page_size, after=after, sort=sort
+        ),
+        max_items=max_items,
+    )
+
+
+def iter_threads(
+    thread_status: Optional[ThreadStatus] = None,
+    inbox_id: Optional[str] = None,
+    associated_contact_id: Optional[str] = None,
+    sort: Optional[str] = None,
+    association: Optional[str] = None,
+    page_size: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> AsyncIterator[ThreadDetail]:
+    """Iterates over conversation threads matching the filters, following paging cursors.
+    Args:
+        thread_status, inbox_id, associated_contact_id, sort, association: Same filters as `list_threads`.
+        page_size: Optional. Results requested per page.
+        max_items: Optional. Stop after this many threads.
+    Returns: An async iterator of ThreadDetail models. Raises HubSpotPaginationError if a page fails.
+    """
+    return _iterate_pages(
+        lambda after: list_threads(
+            limit=page_size,
+            after=after,
+            thread_status=thread_status,
+            inbox_id=inbox_id,
+            associated_contact_id=associated_contact_id,
+            sort=sort,
+            association=association,
+        ),
+        max_items=max_items,
+    )
@@ -393,6 +393,47 @@ class ThreadDetail(BaseModel):
     }
 
 
+# --- Lean Projection Models ---
+# Small views of the larger DTOs for hot paths that only read a few fields.
+# Unknown fields are ignored, so validation skips most of the payload.
+
+
+class MessageSenderSummary(BaseModel):
+    """Projection of MessageSender holding only the actor ID."""
+
+    actorId: Optional[str] = Field(None, description="The HubSpot actor ID of the sender.")
+
+
+class MessageSummary(BaseModel):
+    """Projection of MessageDetail with the fields needed to decide if a message is for the agent."""
+
+    id: str = Field(..., description="The unique ID of the message.")
+    type: Optional[MessageType] = Field(None, description="The type of the message/event.")
+    direction: Optional[MessageDirection] = Field(
+        None, description="Direction of the message (INCOMING or OUTGOING)."
+    )
+    text: Optional[str] = Field(None, description="Plain text content of the message.")
+    senders: Optional[List[MessageSenderSummary]] = Field(
+        None, description="List of senders (usually one)."
+    )
+    attachments: Optional[List[Dict[str, Any]]] = Field(
+        None, description="List of attachments (structure varies)."
+    )
+
+
+class ThreadSummary(BaseModel):
+    """Projection of ThreadDetail with the IDs used for conversation metadata."""
+
+    id: str = Field(..., description="The unique ID of the thread.")
+    inboxId: Optional[str] = Field(None, description="ID of the inbox the thread belongs to.")
+    associatedContactId: Optional[str] = Field(
+        None, description="ID of the primary associated contact."
+    )
+    threadAssociations: Optional[ThreadAssociations] = Field(
+        None, description="Contains IDs of associated objects like tickets."
+    )
+
+
 # --- Specific Endpoint Response Models ---
 
 # GET /conversations/v3/conversations/actors/{actorId}
@@ -1,7 +1,13 @@
 """HubSpot Ticket Tools"""
 
 # From ticket_tools.py
-from .ticket_tools import create_ticket, create_support_ticket_for_conversation, update_ticket
+from .ticket_tools import (
+    create_ticket,
+    create_support_ticket_for_conversation,
+    update_ticket,
+    flush_ticket_updates,
+    ticket_write_buffer,
+)
 
 # From constants.py
 from .constants import (
@@ -38,6 +44,8 @@ __all__ = [
     "create_ticket",
     "create_support_ticket_for_conversation",
     "update_ticket",
+    "flush_ticket_updates",
+    "ticket_write_buffer",
     # constants
     "AssociationCategory",
     "AssociationTypeIdTicket",
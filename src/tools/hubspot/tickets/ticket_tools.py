@@ -5,7 +5,9 @@ Tools for interacting with HubSpot Tickets API using the SDK.
 # /src/tools/hubspot/tickets/ticket_tools.py
 import asyncio  # For async operations
 import traceback  # For logging exceptions
-from typing import Optional, Union, List, Dict, Any  # Standard typing
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Union, List, Dict, Any, Tuple  # Standard typing
 
 # HubSpot SDK imports
 import config
@@ -28,6 +30,7 @@ from config import (
 # Import the new pipeline logic helper
 from src.constants import YesNoEnum
 from src.services.hubspot.messages_filter import add_conversation_to_handed_off
+from src.services.hubspot.conversation_metadata import cache_conversation_metadata
 from src.services import logger_config
 
 from src.services.time_service import is_business_hours
@@ -52,6 +55,12 @@ from src.tools.hubspot.tickets.dto_responses import (
 # Tool-specific constants
 HUBSPOT_TICKET_TOOL_ERROR_PREFIX = "HUBSPOT_TICKET_TOOL_FAILED:"
 
+# Per-turn ticket write buffer (see `ticket_write_buffer`).
+# None when no buffer is active, in which case updates are sent immediately.
+_ticket_write_buffer: ContextVar[Optional["_TicketWriteBuffer"]] = ContextVar(
+    "ticket_write_buffer", default=None
+)
+
 
 def _format_error(tool_name: str, e: Exception) -> str:
     """Helper to format error messages."""
@@ -195,6 +204,20 @@ async def create_support_ticket_for_conversation(
         # 3. Call the generic create_ticket tool
         ticket_creation_result = await create_ticket(generic_ticket_request)
 
+        # Remember the new ticket for this conversation so agent setup can skip the thread lookup
+        # (replaces a cached "no ticket yet" entry and gives it the full expiry)
+        if not isinstance(ticket_creation_result, str) and getattr(ticket_creation_result, "id", None):
+            try:
+                await cache_conversation_metadata(
+                    conversation_id, ticket_id=str(ticket_creation_result.id)
+                )
+            except Exception as cache_err:
+                logger_config.log_message(
+                    f"Could not cache ticket association for conversation {conversation_id}: {cache_err}",
+                    level=3,
+                    log_type="warning",
+                )
+
         # If ticket creation was successful (i.e., not an error string) and
         # the ticket type is 'Issue', add conversation_id to handed-off set.
         # We check if it's NOT an error string because create_ticket returns SimplePublicObject on success.
@@ -216,6 +239,27 @@ async def create_support_ticket_for_conversation(
         return _format_error("create_support_ticket_for_conversation", e)
 
 # --- Update Tool ---
+async def _send_ticket_update(
+    ticket_id: str, properties_payload: Dict[str, Any]
+) -> Union[TicketDetailResponse, str]:
+    """Sends a single PATCH for the given ticket through the SDK."""
+    try:
+        simple_public_object_input = SimplePublicObjectInput(properties=properties_payload)
+
+        api_response = await asyncio.to_thread(
+            HUBSPOT_CLIENT.crm.tickets.basic_api.update,
+            ticket_id=ticket_id,
+            simple_public_object_input=simple_public_object_input,
+        )
+        return api_response
+
+    except ApiException as e:
+        return _format_error("update_ticket", e)
+    except Exception as e:
+        logger_config.log_message(traceback.format_exc(), log_type="error")
+        return _format_error("update_ticket", e)
+
+
 async def update_ticket(
     ticket_id: str, properties: TicketProperties
 ) -> Union[TicketDetailResponse, str]:
@@ -242,21 +286,130 @@ async def update_ticket(
         if not properties_payload:
             return f"{HUBSPOT_TICKET_TOOL_ERROR_PREFIX} update_ticket - properties object cannot be empty."
 
-        simple_public_object_input = SimplePublicObjectInput(properties=properties_payload)
-
-        api_response = await asyncio.to_thread(
-            HUBSPOT_CLIENT.crm.tickets.basic_api.update,
-            ticket_id=ticket_id,
-            simple_public_object_input=simple_public_object_input,
-        )
-        return api_response
-
-    except ApiException as e:
-        return _format_error("update_ticket", e)
     except Exception as e:
         logger_config.log_message(traceback.format_exc(), log_type="error")
         return _format_error("update_ticket", e)
 
+    # Inside a turn, updates made while a PATCH for the same ticket is in flight are merged
+    # into the next one. The call still waits for HubSpot's answer, so the agent sees the real result.
+    write_buffer = _ticket_write_buffer.get()
+    if write_buffer is not None:
+        return await write_buffer.submit(
+            str(ticket_id), properties.model_dump(mode="json", exclude_none=True)
+        )
+
+    return await _send_ticket_update(ticket_id, properties_payload)
+
+
+class _TicketWriteBuffer:
+    """
+    Collects the ticket updates of one turn. An update for a ticket with no PATCH in flight
+    is sent right away (no waiting window); updates made while one is in flight are merged
+    and sent as one PATCH as soon as it returns. Each caller awaits the result of its own update.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._senders: Dict[str, asyncio.Task] = {}
+
+    async def submit(
+        self, ticket_id: str, properties_payload: Dict[str, Any]
+    ) -> Union[TicketDetailResponse, str]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(ticket_id, []).append((properties_payload, future))
+        if ticket_id not in self._senders:
+            # Updates submitted in the same loop iteration (parallel tool calls) join this first PATCH
+            self._senders[ticket_id] = asyncio.create_task(self._send_pending(ticket_id))
+        return await future
+
+    async def flush(self, ticket_id: Optional[str] = None):
+        """Waits until the submitted updates (of one ticket, or all) have been sent."""
+        while True:
+            senders = [
+                sender
+                for current_ticket_id, sender in self._senders.items()
+                if ticket_id is None or current_ticket_id == str(ticket_id)
+            ]
+            if not senders:
+                return
+            await asyncio.gather(*senders, return_exceptions=True)
+
+    # --- Internal helpers ---
+    async def _send_pending(self, ticket_id: str):
+        batch: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        try:
+            while self._pending.get(ticket_id):
+                batch = self._pending.pop(ticket_id)
+                await _send_ticket_batch(ticket_id, batch)
+                batch = []
+        except BaseException as e:
+            # Don't leave callers waiting forever (e.g. the turn was cancelled mid-send)
+            for _, future in batch + self._pending.pop(ticket_id, []):
+                if not future.done():
+                    future.set_result(_format_error("update_ticket", e))
+            raise
+        finally:
+            self._senders.pop(ticket_id, None)
+
+
+async def _send_ticket_batch(
+    ticket_id: str, batch: List[Tuple[Dict[str, Any], asyncio.Future]]
+) -> List[Union[TicketDetailResponse, str]]:
+    """
+    Sends the merged updates of a batch as one PATCH and resolves each caller's future.
+    If the merged update is rejected, the updates are replayed one by one, so each caller
+    gets the result of its own update and a single bad property does not drop the others.
+    """
+    merged_properties: Dict[str, Any] = {}
+    for properties_payload, _ in batch:
+        merged_properties.update(properties_payload)
+
+    result = await _send_ticket_update(ticket_id, merged_properties)
+    if isinstance(result, str) and len(batch) > 1:
+        logger_config.log_message(
+            f"Coalesced update for ticket {ticket_id} failed, replaying {len(batch)} updates individually: {result}",
+            level=3,
+            log_type="warning",
+        )
+        results = [await _send_ticket_update(ticket_id, properties_payload) for properties_payload, _ in batch]
+    else:
+        results = [result] * len(batch)
+
+    for (_, future), own_result in zip(batch, results):
+        if not future.done():  # The caller may have been cancelled meanwhile
+            future.set_result(own_result)
+    return results
+
+
+async def flush_ticket_updates(ticket_id: Optional[str] = None):
+    """
+    Waits until the buffered ticket updates of the current turn have been sent.
+
+    Args:
+        ticket_id: Optional. Only wait for this ticket; all buffered tickets otherwise.
+    """
+    write_buffer = _ticket_write_buffer.get()
+    if write_buffer is not None:
+        await write_buffer.flush(ticket_id)
+
+
+@asynccontextmanager
+async def ticket_write_buffer():
+    """
+    Merges `update_ticket` calls made inside the block (e.g. during one agent turn) that hit
+    a ticket while a PATCH for it is in flight into one follow-up PATCH. Every call still
+    returns HubSpot's answer for its own update, so nothing is left unsent when the agent
+    (and then the Planner) reports the result; the block waits for in-flight sends on exit.
+    """
+    token = _ticket_write_buffer.set(_TicketWriteBuffer())
+    try:
+        yield
+    finally:
+        try:
+            await flush_ticket_updates()
+        finally:
+            _ticket_write_buffer.reset(token)
+
 async def move_ticket_to_human_assistance_pipeline(
     ticket_id: str,
     conversation_id: str,
@@ -302,6 +455,7 @@ async def move_ticket_to_human_assistance_pipeline(
     final_properties_to_update.created_on_business_hours = YesNoEnum.YES if on_business_hours else YesNoEnum.NO
     
     # 4. Call the generic update_ticket tool with the combined properties
+    # (the result is that of this update, even if it was merged with others in the turn)
     update_result = await update_ticket(ticket_id, final_properties_to_update)
 
     if isinstance(update_result, str) and update_result.startswith(HUBSPOT_TICKET_TOOL_ERROR_PREFIX):
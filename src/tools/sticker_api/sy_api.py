@@ -9,6 +9,7 @@ import httpx
 import config
 from pydantic import ValidationError
 from src.services.logger_config import log_message
+from src.services.dto_parsing import loads_json, parse_dto
 
 # Import specific DTOs using absolute paths from src
 from src.tools.sticker_api.dtos.responses import (
@@ -106,7 +107,7 @@ async def _make_sy_api_request(
                             return response
 
                         else:
-                            json_response = response.json()
+                            json_response = loads_json(response.content)
                             # Validate expected type (Dict or List)
                             if isinstance(json_response, (dict, list)):
                                 return json_response
@@ -281,10 +282,10 @@ async def sy_get_design_preview(
 def format_countries_as_qr(countries: List[Country]) -> str:
     """Formats a list of Country objects into a JSON string for Quick Replies."""
     qr_options = [
-        {"label": country["name"], "value": country["name"]} for country in countries
+        {"label": country.name, "value": country.name} for country in countries
     ]
     # Note: <country_selection> is a placeholder type. The Planner should use this.
-    return f"{{QUICK_REPLIES_START_TAG}}<country_selection>:{json.dumps(qr_options)}{{QUICK_REPLIES_END_TAG}}"
+    return f"{QUICK_REPLIES_START_TAG}<country_selection>:{json.dumps(qr_options)}{QUICK_REPLIES_END_TAG}"
 
 
 def format_products_as_qr(products: List[ProductDetail]) -> str:
@@ -414,7 +415,7 @@ async def get_live_products(
         total_matches = len(product_candidates)
 
     # Step 4: Enrich the candidates and convert to Pydantic models for easier handling
-    enriched_product_models = []
+    enriched_products = []
     for product_dict in product_candidates:
         if not isinstance(product_dict, dict):
             continue
@@ -430,7 +431,10 @@ async def get_live_products(
         enriched_product = product_dict.copy()
         enriched_product["name"] = product_name_from_map
         enriched_product["quick_reply_label"] = label
-        enriched_product_models.append(ProductDetail(**enriched_product))
+        enriched_products.append(enriched_product)
+
+    # Validate the whole list in one call through the cached List[ProductDetail] adapter
+    enriched_product_models = parse_dto(List[ProductDetail], enriched_products)
 
     # Step 5: Determine definitive match and generate quick replies if needed
     definitive_product = None
@@ -0,0 +1,81 @@
+"""
+Checks which turns the FAQ answer cache accepts, on the message sequence a knowledge-base
+answer produces in the group chat (the StickerYou_Agent doesn't reflect on tool use, so its
+reply is the tool call summary).
+
+Run from the project root, with the project's environment (.env):
+    python -m pytest tests
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("autogen_agentchat")
+
+from autogen_agentchat.messages import (  # noqa: E402
+    TextMessage,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+    ToolCallSummaryMessage,
+)
+from autogen_core import FunctionCall  # noqa: E402
+from autogen_core.models import FunctionExecutionResult, RequestUsage  # noqa: E402
+
+from src.agents.agent_names import PLANNER_AGENT_NAME, STICKER_YOU_AGENT_NAME, USER_PROXY_AGENT_NAME  # noqa: E402
+from src.services.chromadb.answer_cache import get_cacheable_answer, get_turn_usage  # noqa: E402
+
+QUESTION = "How long does shipping take?"
+FINAL_REPLY = f"Orders usually ship within 2-3 business days after proof approval. <{USER_PROXY_AGENT_NAME}>"
+KB_RESULTS = json.dumps(
+    [{"result_number": 1, "content": "Orders ship within 2-3 business days.", "source": "shipping.md", "relevance_score": 0.83}]
+)
+
+
+def _knowledge_base_turn(tool_name: str = "query_knowledge_base", tool_output: str = KB_RESULTS, is_error: bool = False):
+    """User question, Planner delegation, StickerYou tool call/execution/summary and the Planner's reply."""
+    call = FunctionCall(id="call_1", name=tool_name, arguments=json.dumps({"query_text": QUESTION}))
+    result = FunctionExecutionResult(content=tool_output, name=tool_name, call_id="call_1", is_error=is_error)
+    usage = RequestUsage(prompt_tokens=1000, completion_tokens=50)
+    return [
+        TextMessage(content=QUESTION, source=USER_PROXY_AGENT_NAME),
+        TextMessage(
+            content=f"<{STICKER_YOU_AGENT_NAME}> : Query the knowledge base for \"{QUESTION}\"",
+            source=PLANNER_AGENT_NAME,
+            models_usage=usage,
+        ),
+        ToolCallRequestEvent(content=[call], source=STICKER_YOU_AGENT_NAME, models_usage=usage),
+        ToolCallExecutionEvent(content=[result], source=STICKER_YOU_AGENT_NAME),
+        ToolCallSummaryMessage(content=tool_output, tool_calls=[call], results=[result], source=STICKER_YOU_AGENT_NAME),
+        TextMessage(content=FINAL_REPLY, source=PLANNER_AGENT_NAME, models_usage=usage),
+    ]
+
+
+def test_knowledge_base_answer_is_cacheable():
+    messages = _knowledge_base_turn()
+
+    assert get_cacheable_answer(messages) == FINAL_REPLY
+    assert get_turn_usage(messages) == {"llm_calls": 3, "prompt_tokens": 3000, "completion_tokens": 150}
+
+
+@pytest.mark.parametrize(
+    "tool_output, is_error",
+    [
+        ("[]", False),  # Nothing found
+        (json.dumps([{"error": "An exception occurred while querying the knowledge base: timeout"}]), False),
+        ("Error: timeout", True),
+    ],
+)
+def test_empty_or_failed_knowledge_base_result_is_not_cacheable(tool_output, is_error):
+    assert get_cacheable_answer(_knowledge_base_turn(tool_output=tool_output, is_error=is_error)) is None
+
+
+def test_answer_using_other_tools_is_not_cacheable():
+    assert get_cacheable_answer(_knowledge_base_turn(tool_name="sy_list_countries")) is None
+
+
+def test_turn_without_a_reply_to_the_user_is_not_cacheable():
+    messages = _knowledge_base_turn()
+    messages[-1] = TextMessage(content=f"<{STICKER_YOU_AGENT_NAME}> : Query again", source=PLANNER_AGENT_NAME)
+
+    assert get_cacheable_answer(messages) is None